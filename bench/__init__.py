@@ -0,0 +1 @@
+"""Benchmarks for the BASIC compiler. Run modules with `python -m bench.<name>`."""
@@ -0,0 +1,66 @@
+"""
+Startup latency with and without a precompiled artifact (`compiler.py build`).
+
+    python -m bench.artifact [--program samples/city_game.bas] [--n 10]
+
+"in-process" times one run inside this process: run_source from the source
+text against loading the artifact and running it. "process" times a whole
+`python compiler.py prog.bas` against `python compiler.py run prog.bbc`,
+interpreter start-up and imports included. Both at -O0 and -O2, best of
+`--n` runs, with the sample's usual input.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from io import StringIO
+
+from bench.fusion import CITY_GAME_INPUT
+from compiler import build_artifact, run_artifact, run_source
+from src.artifact import Artifact
+from src.options import CompileOptions
+
+
+def best(fn, n: int) -> float:
+    t = float("inf")
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        t = min(t, time.perf_counter() - start)
+    return t
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--program", default="samples/city_game.bas")
+    ap.add_argument("--n", type=int, default=10)
+    args = ap.parse_args()
+    with open(args.program, encoding="utf-8") as f:
+        source = f.read()
+    stdin = CITY_GAME_INPUT if "city_game" in args.program else ""
+    print(f"{args.program}: {'':>12} {'source':>10} {'artifact':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for level in (0, 2):
+            options = CompileOptions.for_level(level)
+            path = os.path.join(tmp, f"prog-O{level}.bbc")
+            build_artifact(source, options, name=args.program).write(path)
+            from_source = best(lambda: run_source(source, StringIO(stdin), StringIO(), options), args.n)
+            from_artifact = best(lambda: run_artifact(Artifact.read(path), StringIO(stdin), StringIO()), args.n)
+            print(f"{'in-process':>12} -O{level} {from_source * 1e3:8.2f}ms {from_artifact * 1e3:8.2f}ms"
+                  f" {from_source / from_artifact:7.1f}x")
+
+            def process(*command):
+                subprocess.run([sys.executable, "compiler.py", *command], input=stdin, text=True,
+                               stdout=subprocess.DEVNULL, check=True)
+
+            source_command = (args.program,) if level == 0 else ("-O", str(level), args.program)
+            from_source = best(lambda: process(*source_command), args.n)
+            from_artifact = best(lambda: process("run", path), args.n)
+            print(f"{'process':>12} -O{level} {from_source * 1e3:8.2f}ms {from_artifact * 1e3:8.2f}ms"
+                  f" {from_source / from_artifact:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
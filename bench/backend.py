@@ -0,0 +1,79 @@
+"""
+Codegen backend benchmark: time from BASIC AST to a runnable code object.
+
+    python -m bench.backend [--lines 2000] [--n 5]
+
+"text" generates Python source and has `compile()` parse it; "ast" builds the
+`ast.Module` directly and compiles that. Both start from the same parsed and
+optimised program, so lexing and parsing BASIC are not included. Times are
+the best of `--n` runs, split into code generation and `compile()`.
+"""
+import argparse
+import time
+import warnings
+
+from src.codegen import Transpiler
+from src.optimize import optimize
+from src.options import CompileOptions
+from src.parser import parse
+
+STATEMENTS = [
+    "LET A = A + {i} * B - (C / 2)",
+    "IF A > {i} THEN GOTO {target}",
+    "PRINT A, B",
+    "FOR I = 1 TO 10\nLET S = S + I\nNEXT I",
+    "GOSUB 99990",
+]
+
+
+def generated_program(lines: int) -> str:
+    """`lines` lines cycling through STATEMENTS, plus a subroutine at 99990."""
+    body = [
+        f"{10 * (i + 1)} " + STATEMENTS[i % len(STATEMENTS)].format(i=i, target=10 * (i + 3))
+        for i in range(lines)
+    ]
+    return "\n".join(body) + "\n99990 RETURN\n"
+
+
+def best(fn, n: int):
+    """(best time, result) of `n` calls."""
+    result, t = None, float("inf")
+    for _ in range(n):
+        start = time.perf_counter()
+        result = fn()
+        t = min(t, time.perf_counter() - start)
+    return t, result
+
+
+def measure(program, options: CompileOptions, n: int):
+    """{backend: (generate seconds, compile seconds)}"""
+    times = {}
+    for backend, method in (("text", Transpiler.transpile), ("ast", Transpiler.transpile_ast)):
+        gen, code = best(lambda: method(Transpiler(options), program), n)
+        comp, _ = best(lambda: compile(code, "<basic>", "exec"), n)
+        times[backend] = (gen, comp)
+    return times
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--lines", type=int, default=2000, help="size of the generated program")
+    ap.add_argument("--n", type=int, default=5)
+    args = ap.parse_args()
+    with open("samples/city_game.bas", encoding="utf-8") as f:
+        programs = {"city_game.bas": f.read(), f"generated-{args.lines}": generated_program(args.lines)}
+    print(f"{'program':>16} {'-O':>2} {'backend':>7} {'generate':>10} {'compile':>10} {'total':>10}")
+    for name, source in programs.items():
+        for level in range(3):
+            options = CompileOptions.for_level(level)
+            program = optimize(parse(source), options.opt_level)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                times = measure(program, options, args.n)
+            for backend, (gen, comp) in times.items():
+                print(f"{name:>16} {level:>2} {backend:>7} {gen * 1e3:8.2f}ms {comp * 1e3:8.2f}ms"
+                      f" {(gen + comp) * 1e3:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
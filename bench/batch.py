@@ -0,0 +1,77 @@
+"""
+Batch compilation benchmark: compile_many over a corpus, by worker count.
+
+    python -m bench.batch [--files 400] [--lines 100] [-O 0] [--workers 1,2,4]
+
+The corpus is `--files` generated programs (bench.programs, every shape in
+turn, `--lines` lines each) in a temporary directory. "serial" compiles them
+one by one with compile_code in this process, as a plain loop would; each
+worker count then times compile_many. "speedup" is serial time over the
+batch's, "efficiency" the speedup per worker (1.0 is linear scaling). The
+default worker counts run from 1 up to the CPU count, doubling.
+"""
+import argparse
+import os
+import tempfile
+import time
+import warnings
+
+from bench.programs import SHAPES, generate
+from compiler import compile_code, compile_many
+from src.options import CompileOptions
+
+
+def write_corpus(directory: str, files: int, lines: int) -> None:
+    shapes = sorted(SHAPES)
+    for i in range(files):
+        shape = shapes[i % len(shapes)]
+        subdirectory = os.path.join(directory, shape)
+        os.makedirs(subdirectory, exist_ok=True)
+        with open(os.path.join(subdirectory, f"prog{i:04}.bas"), "w", encoding="utf-8") as f:
+            f.write(generate(shape, lines, seed=i).source)
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def default_workers() -> list:
+    counts, n = [], 1
+    while n < (os.cpu_count() or 1):
+        counts.append(n)
+        n *= 2
+    return counts + [os.cpu_count() or 1]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--files", type=int, default=400)
+    ap.add_argument("--lines", type=int, default=100, help="lines of each generated program")
+    ap.add_argument("-O", dest="level", type=int, default=0)
+    ap.add_argument("--workers", default=None, help="comma-separated worker counts")
+    args = ap.parse_args()
+    options = CompileOptions.for_level(args.level)
+    counts = [int(n) for n in args.workers.split(",")] if args.workers else default_workers()
+    warnings.simplefilter("ignore")
+    with tempfile.TemporaryDirectory() as directory:
+        write_corpus(directory, args.files, args.lines)
+        paths = sorted(os.path.join(root, name) for root, _, names in os.walk(directory) for name in names)
+
+        def serial():
+            for path in paths:
+                with open(path, encoding="utf-8") as f:
+                    compile_code(f.read(), options)
+
+        base = timed(serial)
+        print(f"{args.files} files of {args.lines} lines, -O{args.level}, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'time':>9} {'speedup':>8} {'efficiency':>10}")
+        print(f"{'serial':>8} {base:8.2f}s {1:7.2f}x {1:10.2f}")
+        for workers in counts:
+            t = timed(lambda: compile_many([directory], options, workers))
+            print(f"{workers:>8} {t:8.2f}s {base / t:7.2f}x {base / t / workers:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Compile-cache benchmark: time to get a runnable code object for a program.
+
+    python -m bench.cache [samples/city_game.bas] [-O 2] [--n 200]
+
+"cold" compiles every time; "memory" hits the in-process LRU; "disk" uses a
+fresh CompileCache on a warm directory each time, as a new process would.
+"""
+import argparse
+import tempfile
+import time
+
+from compiler import compile_code
+from src.cache import CompileCache
+from src.options import CompileOptions
+
+
+def per_call(fn, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("path", nargs="?", default="samples/city_game.bas")
+    ap.add_argument("-O", dest="level", type=int, default=2)
+    ap.add_argument("--n", type=int, default=200)
+    args = ap.parse_args()
+    with open(args.path, encoding="utf-8") as f:
+        source = f.read()
+    options = CompileOptions.for_level(args.level)
+    memory = CompileCache()
+    compile_code(source, options, memory)
+    with tempfile.TemporaryDirectory() as directory:
+        compile_code(source, options, CompileCache(directory=directory))
+        times = {
+            "cold": per_call(lambda: compile_code(source, options), args.n),
+            "memory": per_call(lambda: compile_code(source, options, memory), args.n),
+            "disk": per_call(lambda: compile_code(source, options, CompileCache(directory=directory)), args.n),
+        }
+    for name, t in times.items():
+        print(f"{name:>7} {t * 1e3:9.3f} ms  {times['cold'] / t:8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
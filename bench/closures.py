@@ -0,0 +1,55 @@
+"""
+Closure engine benchmark: startup and throughput against transpile + exec.
+
+    python -m bench.closures [--n 5] [--iterations 100000]
+
+Each program (the bench.tiered set: samples, generated programs, long loops)
+runs from its source text to its last line, parsing included, on "exec" at
+-O0 (run_source's default) and -O2 and on "closure" (src/closures.py).
+"startup" times building the closures against transpiling and compiling,
+without running anything. Times are the best of `--n` runs; "ratio" is
+closure time over -O2 exec time, below 1 where closures win.
+"""
+import argparse
+import time
+import warnings
+from io import StringIO
+
+from bench.tiered import programs
+from compiler import compile_code, run_source
+from src.closures import ClosureProgram
+from src.optimize import optimize
+from src.options import CompileOptions
+from src.parser import parse
+
+
+def best(fn, n: int) -> float:
+    t = float("inf")
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        t = min(t, time.perf_counter() - start)
+    return t
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--n", type=int, default=5)
+    ap.add_argument("--iterations", type=int, default=100000, help="rounds of the long loops")
+    args = ap.parse_args()
+    o0, o2 = CompileOptions(), CompileOptions.for_level(2)
+    warnings.simplefilter("ignore")
+    print(f"{'program':>16} {'exec -O0':>10} {'exec -O2':>10} {'closure':>10} {'ratio':>6}"
+          f"   startup: {'exec -O2':>10} {'closure':>10}")
+    for name, (source, stdin) in programs(args.iterations).items():
+        t0 = best(lambda: run_source(source, StringIO(stdin), StringIO(), o0), args.n)
+        t2 = best(lambda: run_source(source, StringIO(stdin), StringIO(), o2), args.n)
+        tc = best(lambda: run_source(source, StringIO(stdin), StringIO(), o0, engine="closure"), args.n)
+        s2 = best(lambda: compile_code(source, o2), args.n)
+        sc = best(lambda: ClosureProgram(optimize(parse(source), 0), StringIO(stdin), StringIO(), o0), args.n)
+        print(f"{name:>16} {t0 * 1e3:8.2f}ms {t2 * 1e3:8.2f}ms {tc * 1e3:8.2f}ms {tc / t2:5.2f}x"
+              f"            {s2 * 1e3:8.2f}ms {sc * 1e3:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
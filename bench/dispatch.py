@@ -0,0 +1,47 @@
+"""
+Dispatch benchmark: linear `if _pc == i:` chain vs. block-function jump table.
+
+    python -m bench.dispatch [--sizes 100 1000 10000] [--passes N]
+
+Each generated program has `size` numbered lines executed `passes` times via a
+GOTO back to the top, so every line costs one dispatch.
+"""
+import argparse
+import time
+from io import StringIO
+
+from compiler import compile_source
+from src.options import CompileOptions
+
+
+def straight_line_program(size: int, passes: int) -> str:
+    lines = ["10 LET N = N + 1"]
+    for i in range(1, size - 1):
+        lines.append(f"{10 + i * 10} LET A = A + {i % 7}")
+    lines.append(f"{size * 10} IF N < {passes} THEN GOTO 10")
+    return "\n".join(lines) + "\n"
+
+
+def time_run(source: str, options: CompileOptions) -> float:
+    code = compile(compile_source(source, options), "<basic>", "exec")
+    globs = {"__name__": "__main__", "print": lambda *a, **k: None, "input": StringIO().readline}
+    start = time.perf_counter()
+    exec(code, globs)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--passes", type=int, default=3)
+    args = ap.parse_args()
+    print(f"{'lines':>7} {'chain (s)':>10} {'table (s)':>10} {'speedup':>8}")
+    for size in args.sizes:
+        source = straight_line_program(size, args.passes)
+        chain = time_run(source, CompileOptions(dispatch="chain"))
+        table = time_run(source, CompileOptions(dispatch="table"))
+        print(f"{size:>7} {chain:>10.4f} {table:>10.4f} {chain / table:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
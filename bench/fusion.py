@@ -0,0 +1,63 @@
+"""
+Block-fusion report: static blocks and dynamic dispatches on a sample program.
+
+    python -m bench.fusion [samples/city_game.bas] [--stdin "1\\n5\\n7\\n"]
+
+Dispatches are counted in table mode as calls to `_block_*` functions.
+"""
+import argparse
+import random
+import sys
+from io import StringIO
+
+from compiler import compile_source
+from src.codegen import Transpiler
+from src.options import CompileOptions
+from src.parser import parse
+
+CITY_GAME_INPUT = "1\n5\n2\n10\n3\n1\n4\n1\n5\n5\n5\n6\n7\n"
+
+
+def count_dispatches(source: str, stdin: str, fuse: bool) -> int:
+    code = compile(compile_source(source, CompileOptions(dispatch="table", fuse_blocks=fuse)), "<basic>", "exec")
+    feed = StringIO(stdin)
+    globs = {
+        "__name__": "__main__",
+        "print": lambda *a, **k: None,
+        "input": lambda prompt="": feed.readline().rstrip("\n"),
+    }
+    calls = 0
+
+    def profiler(frame, event, arg):
+        nonlocal calls
+        if event == "call" and frame.f_code.co_name.startswith("_block_"):
+            calls += 1
+
+    random.seed(0)
+    sys.setprofile(profiler)
+    try:
+        exec(code, globs)
+    finally:
+        sys.setprofile(None)
+    return calls
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("path", nargs="?", default="samples/city_game.bas")
+    ap.add_argument("--stdin", default=CITY_GAME_INPUT)
+    args = ap.parse_args()
+    with open(args.path, encoding="utf-8") as f:
+        source = f.read()
+    stdin = args.stdin.encode().decode("unicode_escape")
+    program = parse(source)
+    plain, fused = Transpiler(), Transpiler(CompileOptions(fuse_blocks=True))
+    plain.transpile(program)
+    fused.transpile(program)
+    before, after = count_dispatches(source, stdin, False), count_dispatches(source, stdin, True)
+    print(f"blocks:     {len(plain._blocks):>6} -> {len(fused._blocks):>6}")
+    print(f"dispatches: {before:>6} -> {after:>6}  ({100 * (before - after) / before:.1f}% removed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+GOSUB benchmark: `_gosub_stack` dispatch vs. subroutines compiled to functions.
+
+    python -m bench.gosub [--turns 3000]
+
+Runs a GOSUB-heavy kernel and a long scripted `city_game.bas` session
+(tax and next year, over and over) at -O1 and -O2, with and without
+`subroutine_functions`.
+"""
+import argparse
+import random
+import time
+
+from compiler import compile_source
+from src.options import CompileOptions
+
+KERNEL = """
+10 LET I = I + 1
+20 GOSUB 100
+30 IF I < {n} THEN GOTO 10
+40 END
+100 LET S = S + I
+110 IF S > 1000 THEN GOSUB 200
+120 RETURN
+200 LET S = S - 1000
+210 RETURN
+"""
+
+
+def time_run(source: str, options: CompileOptions, stdin: str = "", repeat: int = 3) -> float:
+    """Best of `repeat` runs, with output discarded."""
+    code = compile(compile_source(source, options), "<basic>", "exec")
+    best = float("inf")
+    for _ in range(repeat):
+        lines = iter(stdin.splitlines())
+        globs = {"__name__": "__main__", "print": lambda *a, **k: None,
+                 "input": lambda prompt="": next(lines)}
+        random.seed(0)
+        start = time.perf_counter()
+        exec(code, globs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--turns", type=int, default=3000)
+    args = ap.parse_args()
+    with open("samples/city_game.bas", encoding="utf-8") as f:
+        city = f.read()
+    cases = {
+        "kernel": (KERNEL.format(n=args.turns * 50), ""),
+        "city_game": (city, "1\n5\n" * args.turns + "7\n"),
+    }
+    print(f"{'program':>10} {'level':>5} {'stack (s)':>10} {'functions (s)':>14} {'speedup':>8}")
+    for name, (source, stdin) in cases.items():
+        for level in (1, 2):
+            before = time_run(source, CompileOptions.for_level(level, subroutine_functions=False), stdin)
+            after = time_run(source, CompileOptions.for_level(level), stdin)
+            print(f"{name:>10} {'-O' + str(level):>5} {before:>10.4f} {after:>14.4f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Lexer throughput benchmark: character-at-a-time `Lexer` vs. `RegexLexer`.
+
+    python -m bench.lexer [--lines 20000] [--n 3]
+
+Inputs are the city_game sample repeated and a generated program (see
+bench.backend) of `--lines` lines; throughput is tokens per second, best of
+`--n` runs.
+"""
+import argparse
+import time
+
+from bench.backend import generated_program
+from src.lexer import Lexer, RegexLexer
+
+
+def best(fn, n: int) -> float:
+    t = float("inf")
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        t = min(t, time.perf_counter() - start)
+    return t
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--lines", type=int, default=20000, help="size of the generated program")
+    ap.add_argument("--n", type=int, default=3)
+    args = ap.parse_args()
+    with open("samples/city_game.bas", encoding="utf-8") as f:
+        city = f.read()
+    inputs = {"city_game x50": "\n".join([city] * 50), f"generated-{args.lines}": generated_program(args.lines)}
+    for name, source in inputs.items():
+        count = len(Lexer(source).tokenize())
+        print(f"{name}: {len(source) / 1e6:.2f} MB, {count} tokens")
+        times = {cls.__name__: best(lambda: cls(source).tokenize(), args.n) for cls in (Lexer, RegexLexer)}
+        for cls, t in times.items():
+            print(f"  {cls:>10} {t * 1e3:9.1f} ms {count / t / 1e6:7.2f} M tokens/s"
+                  f" {times['Lexer'] / t:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Variable-storage benchmark: `_vars` dict helpers vs. Python locals.
+
+    python -m bench.locals [--n 200000]
+"""
+import argparse
+import time
+
+from compiler import compile_source
+from src.options import CompileOptions
+
+KERNEL = """
+10 LET I = I + 1
+20 LET A = A + I * 2
+30 LET B = A - B / 2
+40 LET C = C + A - B
+50 IF I < {n} THEN GOTO 10
+60 END
+"""
+
+
+def time_run(source: str, options: CompileOptions) -> float:
+    code = compile(compile_source(source, options), "<basic>", "exec")
+    start = time.perf_counter()
+    exec(code, {"__name__": "__main__"})
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--n", type=int, default=200000)
+    args = ap.parse_args()
+    source = KERNEL.format(n=args.n)
+    print(f"{'dispatch':>8} {'_vars (s)':>10} {'locals (s)':>10} {'speedup':>8}")
+    for dispatch in ("chain", "table"):
+        slow = time_run(source, CompileOptions(dispatch=dispatch, fuse_blocks=True))
+        fast = time_run(source, CompileOptions(dispatch=dispatch, fuse_blocks=True, fast_locals=True))
+        print(f"{dispatch:>8} {slow:>10.4f} {fast:>10.4f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+FOR-loop benchmark: while-loop lowering vs. native `range()` loops.
+
+    python -m bench.loops [--n 600]
+
+Kernels are nested numeric loops; each runs with `_vars` storage and with
+fast locals.
+"""
+import argparse
+import time
+
+from compiler import compile_source
+from src.options import CompileOptions
+
+KERNELS = {
+    "matrix-sum": """
+FOR I = 1 TO {n}
+  FOR J = 1 TO {n}
+    LET S = S + I * J
+  NEXT J
+NEXT I
+""",
+    "triangle": """
+FOR I = {n} TO 1 STEP -1
+  FOR J = 1 TO I
+    FOR K = 1 TO 3
+      LET T = T + K
+    NEXT K
+  NEXT J
+NEXT I
+""",
+}
+
+
+def time_run(source: str, options: CompileOptions, repeat: int = 3) -> float:
+    """Best of `repeat` runs."""
+    code = compile(compile_source(source, options), "<basic>", "exec")
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        exec(code, {"__name__": "__main__"})
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--n", type=int, default=600)
+    args = ap.parse_args()
+    print(f"{'kernel':>10} {'storage':>7} {'while (s)':>10} {'range (s)':>10} {'speedup':>8}")
+    for name, template in KERNELS.items():
+        source = template.format(n=args.n)
+        for storage, fast_locals in (("_vars", False), ("locals", True)):
+            base = CompileOptions(fast_locals=fast_locals, specialize_types=True)
+            before = time_run(source, base)
+            after = time_run(source, CompileOptions(fast_locals=fast_locals, specialize_types=True,
+                                                    range_loops=True))
+            print(f"{name:>10} {storage:>7} {before:>10.4f} {after:>10.4f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Front end memory benchmark: bytes per token and per AST node.
+
+    python -m bench.memory [--lines 20000]
+
+Memory is what tracemalloc sees still allocated after `tokenize` (the token
+list) and after `Parser.parse` (the `Program`), for a generated program (see
+bench.backend), divided by the number of tokens or nodes. Token values and
+the lists holding tokens and nodes are included.
+"""
+import argparse
+import gc
+import tracemalloc
+from dataclasses import fields, is_dataclass
+
+from bench.backend import generated_program
+from src.lexer import tokenize
+from src.parser import Parser
+
+
+def allocated(fn, *args):
+    """(result of fn(*args), bytes it allocated and still holds)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = fn(*args)
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def nodes(obj):
+    """Yield every dataclass instance in the tree under `obj`."""
+    if is_dataclass(obj):
+        yield obj
+        for f in fields(obj):
+            yield from nodes(getattr(obj, f.name))
+    elif isinstance(obj, list):
+        for x in obj:
+            yield from nodes(x)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--lines", type=int, default=20000, help="size of the generated program")
+    args = ap.parse_args()
+    source = generated_program(args.lines)
+    tokens, size = allocated(tokenize, source)
+    print(f"generated-{args.lines}: {len(tokens):7} tokens {size / len(tokens):6.1f} bytes/token")
+    program, size = allocated(Parser(tokens).parse)
+    count = sum(1 for _ in nodes(program))
+    print(f"generated-{args.lines}: {count:7} nodes  {size / count:6.1f} bytes/node")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Parser throughput benchmark.
+
+    python -m bench.parser [--lines 20000] [--n 3]
+
+Inputs are the city_game sample repeated, a generated program (see
+bench.backend) and an expression-heavy program, both of `--lines` lines.
+Tokens are produced up front, so only `Parser.parse` is timed; throughput is
+tokens per second, best of `--n` runs.
+"""
+import argparse
+
+from bench.backend import generated_program
+from bench.lexer import best
+from src.lexer import tokenize
+from src.parser import Parser
+
+EXPRESSIONS = [
+    "LET X = (A + B * 2 - C / 3) * (D - 1) + E",
+    "PRINT A * A + B * B - 2 * A * B, (A - B) / (A + B + 1)",
+    "IF (A + 1) * 2 > B - C / 4 THEN LET A = A - ABS(B - C) * 3",
+]
+
+
+def expression_program(lines: int) -> str:
+    return "\n".join(f"{10 * (i + 1)} {EXPRESSIONS[i % len(EXPRESSIONS)]}" for i in range(lines)) + "\n"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--lines", type=int, default=20000, help="size of the generated programs")
+    ap.add_argument("--n", type=int, default=3)
+    args = ap.parse_args()
+    with open("samples/city_game.bas", encoding="utf-8") as f:
+        city = f.read()
+    inputs = {
+        "city_game x50": "\n".join([city] * 50),
+        f"generated-{args.lines}": generated_program(args.lines),
+        f"expressions-{args.lines}": expression_program(args.lines),
+    }
+    for name, source in inputs.items():
+        tokens = tokenize(source)
+        t = best(lambda: Parser(tokens).parse(), args.n)
+        print(f"{name:>18}: {len(tokens):7} tokens {t * 1e3:9.1f} ms {len(tokens) / t / 1e6:6.2f} M tokens/s")
+
+
+if __name__ == "__main__":
+    main()
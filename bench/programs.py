@@ -0,0 +1,215 @@
+"""
+Synthetic BASIC programs for benchmarks, generated from a small grammar.
+
+    python -m bench.programs SHAPE [--lines 200] [--seed 1]    # print one
+
+A program is a list of statements drawn from weighted productions; each
+shape in SHAPES weights them differently:
+
+    straight  assignments, PRINTs and IFs, no jumps
+    goto      forward GOTOs past statements and counted GOTO loops
+    loops     nested FOR loops
+    gosub     GOSUBs to subroutines after END, which may GOSUB further
+    input     a turn loop reading INPUT, like samples/city_game.bas
+
+Every program terminates and is deterministic for its seed: backward GOTOs
+and FOR loops have small constant trip counts, a subroutine only calls ones
+defined after it, and an INPUT-driven program comes with as many lines of
+input as it can read. Expressions never multiply values together, so
+variables grow at most by a constant per assignment.
+"""
+import argparse
+import random
+import re
+from dataclasses import dataclass
+from typing import Dict, List
+
+SHAPES: Dict[str, Dict[str, int]] = {
+    "straight": {"let": 6, "print": 1, "if": 2},
+    "goto": {"let": 3, "print": 1, "if": 1, "skip": 3, "loop": 2},
+    "loops": {"let": 3, "print": 1, "for": 3},
+    "gosub": {"let": 3, "print": 1, "if": 1, "gosub": 3},
+    "input": {"let": 3, "print": 1, "if": 3, "input": 2},
+}
+VARIABLES = "ABCDEFGH"
+RELOPS = ["<", "<=", ">", ">=", "=", "<>"]
+MAX_NESTING = 2  # loops inside loops
+TURNS = 20  # iterations of an "input" program's main loop
+
+
+@dataclass
+class Workload:
+    """A generated program and the standard input it reads."""
+    name: str
+    source: str
+    stdin: str = ""
+
+
+class _Generator:
+    def __init__(self, shape: str, lines: int, seed: int):
+        self.weights = SHAPES[shape]
+        self.budget = lines
+        self.rng = random.Random(seed)
+        self.lines: List[str] = []  # "@n" in a line is label n's line number
+        self.labels: Dict[int, int] = {}  # label -> index in self.lines
+        self.subroutines: List[List[str]] = []
+        self.reads = 0  # upper bound on the INPUTs the program executes
+        self.counters = 0
+
+    # --- expressions ---
+
+    def const(self) -> str:
+        return str(self.rng.choice([1, 2, 3, 5, 7, 10, 0.5, 2.5]))
+
+    def expr(self, depth: int = 0) -> str:
+        """Expressions whose magnitude is at most that of their operands plus a constant."""
+        rng = self.rng
+        r = rng.random() if depth < 3 else 0
+        if r < 0.35:
+            return rng.choice(VARIABLES) if rng.random() < 0.7 else self.const()
+        if r < 0.6:
+            return f"{self.expr(depth + 1)} {rng.choice('+-')} {self.const()}"
+        if r < 0.75:
+            return f"({self.expr(depth + 1)} + {self.expr(depth + 1)}) / 2"
+        if r < 0.85:
+            return f"ABS({self.expr(depth + 1)} - {self.expr(depth + 1)}) / 3"
+        if r < 0.95:
+            return f"{self.expr(depth + 1)} * 2 / {rng.choice([2, 4, 8])}"
+        return f"-{self.expr(depth + 1)}"
+
+    def condition(self) -> str:
+        return f"{self.expr(1)} {self.rng.choice(RELOPS)} {self.expr(1)}"
+
+    # --- statements ---
+
+    def emit(self, line: str) -> None:
+        self.lines.append(line)
+        self.budget -= 1
+
+    def label(self) -> int:
+        """A new label for the next line emitted."""
+        n = len(self.labels)
+        self.labels[n] = len(self.lines)
+        return n
+
+    def assignment(self) -> str:
+        return f"LET {self.rng.choice(VARIABLES)} = {self.expr()}"
+
+    def block(self, count: int, multiplier: int, nesting: int, jumps: bool = True) -> None:
+        """`count` statements; each runs `multiplier` times per run of the block.
+        Without `jumps`, nothing jumps (a FOR body cannot hold a jump target)."""
+        weights = {k: w for k, w in self.weights.items()
+                   if (jumps or k not in ("skip", "loop")) and (nesting < MAX_NESTING or k not in ("for", "loop"))}
+        productions, counts = list(weights), list(weights.values())
+        for _ in range(count):
+            if self.budget <= 0:
+                return
+            getattr(self, "_" + self.rng.choices(productions, counts)[0])(multiplier, nesting, jumps)
+
+    def _let(self, multiplier, nesting, jumps):
+        self.emit(self.assignment())
+
+    def _print(self, multiplier, nesting, jumps):
+        if self.rng.random() < 0.3:
+            self.emit(f'PRINT "{self.rng.choice(VARIABLES)} =", {self.rng.choice(VARIABLES)}')
+        else:
+            self.emit(f"PRINT {self.expr()}")
+
+    def _if(self, multiplier, nesting, jumps):
+        line = f"IF {self.condition()} THEN {self.assignment()}"
+        if self.rng.random() < 0.3:
+            line += f" ELSE {self.assignment()}"
+        self.emit(line)
+
+    def _input(self, multiplier, nesting, jumps):
+        self.emit(f"INPUT {self.rng.choice(VARIABLES)}")
+        self.reads += multiplier
+
+    def _skip(self, multiplier, nesting, jumps):
+        target = len(self.labels)
+        self.labels[target] = None  # placed below
+        self.emit(f"IF {self.condition()} THEN GOTO @{target}")
+        self.block(self.rng.randint(1, 3), multiplier, nesting, jumps)
+        self.labels[target] = len(self.lines)
+        self.emit(self.assignment())
+
+    def _loop(self, multiplier, nesting, jumps):
+        self.counters += 1
+        counter, trips = f"C{self.counters}", self.rng.randint(2, 4)
+        self.emit(f"LET {counter} = 0")
+        top = self.label()
+        self.emit(self.assignment())
+        self.block(self.rng.randint(1, 4), multiplier * trips, nesting + 1, jumps)
+        self.emit(f"LET {counter} = {counter} + 1")
+        self.emit(f"IF {counter} < {trips} THEN GOTO @{top}")
+
+    def _for(self, multiplier, nesting, jumps):
+        self.counters += 1
+        var, trips = f"I{self.counters}", self.rng.randint(2, 4)
+        step = " STEP 2" if self.rng.random() < 0.2 else ""
+        self.emit(f"FOR {var} = 1 TO {trips * (2 if step else 1)}{step}")
+        self.block(self.rng.randint(1, 4), multiplier * trips, nesting + 1, jumps=False)
+        self.emit(f"NEXT {var}")
+
+    def _gosub(self, multiplier, nesting, jumps):
+        self.emit(f"GOSUB @S{self.subroutine()}")
+
+    def subroutine(self) -> int:
+        """Index of a new subroutine, whose lines are emitted after END."""
+        index = len(self.subroutines)
+        body = [self.assignment() for _ in range(self.rng.randint(1, 4))]
+        self.subroutines.append(body)
+        self.budget -= len(body) + 1
+        if self.budget > 0 and self.rng.random() < 0.3:
+            body.append(f"GOSUB @S{self.subroutine()}")  # always a later one
+        return index
+
+    # --- programs ---
+
+    def program(self, input_loop: bool) -> str:
+        for v in VARIABLES:
+            self.emit(f"LET {v} = {self.const()}")
+        if input_loop:
+            self.emit("LET T = 0")
+            top = self.label()
+            self.emit("PRINT \"TURN\", T")
+            while self.budget > 2:
+                self.block(8, TURNS, 0)
+            self.emit("LET T = T + 1")
+            self.emit(f"IF T < {TURNS} THEN GOTO @{top}")
+        else:
+            while self.budget > 0:
+                self.block(8, 1, 0)
+        self.emit("END")
+        starts = []
+        for body in self.subroutines:
+            starts.append(len(self.lines))
+            self.lines.extend(body)
+            self.lines.append("RETURN")
+        numbers = {f"{n}": 10 * (i + 1) for n, i in self.labels.items()}
+        numbers.update({f"S{n}": 10 * (i + 1) for n, i in enumerate(starts)})
+        return "\n".join(
+            f"{10 * (i + 1)} " + re.sub(r"@(S?\d+)", lambda m: str(numbers[m.group(1)]), line)
+            for i, line in enumerate(self.lines)) + "\n"
+
+
+def generate(shape: str, lines: int = 200, seed: int = 1) -> Workload:
+    """A program of about `lines` lines in `shape` (a key of SHAPES)."""
+    g = _Generator(shape, lines, seed)
+    source = g.program(input_loop=shape == "input")
+    rng = random.Random(seed)
+    stdin = "".join(f"{rng.randint(0, 20)}\n" for _ in range(g.reads))
+    return Workload(f"{shape}-{lines}", source, stdin)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("shape", choices=sorted(SHAPES))
+    ap.add_argument("--lines", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    print(generate(args.shape, args.lines, args.seed).source, end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+run_many benchmark: one program over many stdin cases.
+
+    python -m bench.run_many [--cases 500] [-O 2] [--workers 1,2,4]
+
+The program is samples/city_game.bas and each case a shuffled variation of
+its usual input
+(random lines, then enough quits). "loop" runs the cases with run_source one after another,
+compiling every time; "compiled loop" compiles once and loops over run_code;
+each worker count then times run_many. "speedup" is against "loop".
+"""
+import argparse
+import random
+import time
+from io import StringIO
+
+from bench.batch import default_workers
+from bench.fusion import CITY_GAME_INPUT
+from compiler import compile_code, run_code, run_many, run_source
+from src.options import CompileOptions
+
+
+def make_cases(count: int) -> list:
+    lines = CITY_GAME_INPUT.splitlines()
+    choices, rng = lines[:-1], random.Random(1)
+    # Random choices, then the sample's last line (quit) until the game takes it.
+    return ["\n".join(rng.choices(choices, k=len(choices)) + lines[-1:] * 20) + "\n" for _ in range(count)]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--cases", type=int, default=500)
+    ap.add_argument("-O", dest="level", type=int, default=2)
+    ap.add_argument("--workers", default=None, help="comma-separated worker counts")
+    args = ap.parse_args()
+    options = CompileOptions.for_level(args.level)
+    counts = [int(n) for n in args.workers.split(",")] if args.workers else default_workers()
+    with open("samples/city_game.bas", encoding="utf-8") as f:
+        source = f.read()
+    cases = make_cases(args.cases)
+
+    def loop():
+        for stdin in cases:
+            run_source(source, StringIO(stdin), StringIO(), options)
+
+    def compiled_loop():
+        code = compile_code(source, options)
+        for stdin in cases:
+            run_code(code, StringIO(stdin), StringIO())
+
+    base = timed(loop)
+    print(f"{args.cases} cases of city_game.bas, -O{args.level}")
+    print(f"{'':>14} {'time':>9} {'speedup':>8}")
+    print(f"{'loop':>14} {base:8.2f}s {1:7.2f}x")
+    t = timed(compiled_loop)
+    print(f"{'compiled loop':>14} {t:8.2f}s {base / t:7.2f}x")
+    for workers in counts:
+        t = timed(lambda: run_many(source, cases, options, workers, timeout=10))
+        print(f"{f'{workers} workers':>14} {t:8.2f}s {base / t:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
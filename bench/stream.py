@@ -0,0 +1,63 @@
+"""
+Streaming front end benchmark: peak memory and time of `parse` given the
+whole source text vs. the open file.
+
+    python -m bench.stream [--lines 50000]
+
+The generated program (see bench.backend) is written to a temporary file.
+"text" reads it into a string and tokenizes it all before parsing; "stream"
+parses while `stream_tokens` reads it a chunk at a time. Peak memory is
+measured with tracemalloc, which slows both down, so the times come from a
+separate untraced run. The resulting `Program` is the same size either way
+and is included in both peaks.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from bench.backend import generated_program
+from src.parser import parse
+
+
+def parse_text(path: str):
+    with open(path, encoding="utf-8") as f:
+        return parse(f.read())
+
+
+def parse_stream(path: str):
+    with open(path, encoding="utf-8") as f:
+        return parse(f)
+
+
+def peak(fn, *args) -> int:
+    """Peak bytes allocated by fn(*args), the result included."""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--lines", type=int, default=50000, help="size of the generated program")
+    args = ap.parse_args()
+    fd, path = tempfile.mkstemp(suffix=".bas")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(generated_program(args.lines))
+        print(f"generated-{args.lines}: {os.path.getsize(path) / 1e6:.2f} MB")
+        for name, fn in (("text", parse_text), ("stream", parse_stream)):
+            start = time.perf_counter()
+            fn(path)
+            t = time.perf_counter() - start
+            print(f"  {name:>6} {t * 1e3:9.1f} ms {peak(fn, path) / 1e6:8.1f} MB peak")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
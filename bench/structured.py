@@ -0,0 +1,56 @@
+"""
+GOTO-loop benchmark: table dispatch with fused blocks vs. structured control flow.
+
+    python -m bench.structured [--n 200000]
+
+Kernels are loops written with IF ... THEN GOTO; each runs with `_vars`
+storage and with fast locals.
+"""
+import argparse
+
+from src.options import CompileOptions
+from .loops import time_run
+
+KERNELS = {
+    "count": """
+10 LET I = 0
+20 LET I = I + 1
+30 LET S = S + I
+40 IF I < {n} THEN GOTO 20
+""",
+    "nested": """
+10 LET I = 0
+20 LET J = 0
+30 LET J = J + 1
+40 LET S = S + J
+50 IF J < 100 THEN GOTO 30
+60 LET I = I + 1
+70 IF I < {n} / 100 THEN GOTO 20
+""",
+    "if-else": """
+10 LET I = I + 1
+20 IF I - I / 2 * 2 = 0 THEN GOTO 50
+30 LET A = A + 1
+40 GOTO 60
+50 LET B = B + 1
+60 IF I < {n} THEN GOTO 10
+""",
+}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--n", type=int, default=200000)
+    args = ap.parse_args()
+    print(f"{'kernel':>8} {'storage':>7} {'table (s)':>10} {'structured (s)':>15} {'speedup':>8}")
+    for name, template in KERNELS.items():
+        source = template.format(n=args.n)
+        for storage, fast_locals in (("_vars", False), ("locals", True)):
+            base = dict(dispatch="table", fuse_blocks=True, fast_locals=fast_locals)
+            before = time_run(source, CompileOptions(**base))
+            after = time_run(source, CompileOptions(**base, structured=True))
+            print(f"{name:>8} {storage:>7} {before:>10.4f} {after:>15.4f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
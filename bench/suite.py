@@ -0,0 +1,183 @@
+"""
+Benchmark suite: per-phase compile and run times on generated programs, with
+a regression gate against a stored baseline.
+
+    python -m bench.suite [--shapes ...] [--levels 0 1 2] [--lines 300] [--n 5]
+                          [--out results.json] [--baseline bench/baseline.json]
+                          [--threshold 0.2] [--min-time 0.001] [--retries 2]
+
+For every shape (see bench.programs) and -O level, the phases lex, parse,
+optimize, transpile, compile (Python's `compile()`) and execute are timed
+separately, each the best of `--n` runs. `--out` writes the results as JSON;
+`--baseline` compares them with a file written earlier by `--out` and exits
+with status 1 if any phase got slower by more than `--threshold` (0.2 is
+20%). Programs with a slower phase are timed again, up to `--retries` times,
+keeping the best times, so that one noisy run does not fail the gate. Phases
+faster than `--min-time` seconds in the baseline are only reported.
+
+Timings only compare on the same machine, so a baseline is recorded there
+first, from the commit being compared against:
+
+    python -m bench.suite --out bench/baseline.json     # on the base commit
+    python -m bench.suite --baseline bench/baseline.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import warnings
+from io import StringIO
+from typing import Dict, List, NamedTuple, Set
+
+from bench.programs import SHAPES, Workload, generate
+from compiler import run_code
+from src.codegen import transpile, transpile_ast
+from src.lexer import tokenize
+from src.optimize import optimize
+from src.options import CompileOptions, MAX_OPT_LEVEL
+from src.parser import Parser
+
+PHASES = ["lex", "parse", "optimize", "transpile", "compile", "execute"]
+FORMAT = 1  # version of the JSON layout
+
+
+def time_phases(workload: Workload, options: CompileOptions, n: int) -> Dict[str, float]:
+    """{phase: best seconds of `n` runs} for one program under `options`."""
+    best = dict.fromkeys(PHASES, float("inf"))
+    to_python = transpile_ast if options.backend == "ast" else transpile
+    for _ in range(n):
+        times = {}
+        start = time.perf_counter()
+        tokens = tokenize(workload.source)
+        times["lex"] = time.perf_counter()
+        program = Parser(tokens).parse()
+        times["parse"] = time.perf_counter()
+        program = optimize(program, options.opt_level)
+        times["optimize"] = time.perf_counter()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            python = to_python(program, options)
+        times["transpile"] = time.perf_counter()
+        code = compile(python, "<basic>", "exec")
+        times["compile"] = time.perf_counter()
+        run_code(code, StringIO(workload.stdin), StringIO())
+        times["execute"] = time.perf_counter()
+        for phase in PHASES:
+            best[phase] = min(best[phase], times[phase] - start)
+            start = times[phase]
+    return best
+
+
+def run_suite(shapes: List[str], levels: List[int], lines: int, seed: int, n: int) -> dict:
+    results = {}
+    for shape in shapes:
+        workload = generate(shape, lines, seed)
+        for level in levels:
+            results[_name(workload, level)] = time_phases(workload, CompileOptions.for_level(level), n)
+    return {
+        "format": FORMAT,
+        "meta": {"python": platform.python_version(), "machine": platform.machine(),
+                 "lines": lines, "seed": seed, "n": n},
+        "results": results,
+    }
+
+
+def _name(workload: Workload, level: int) -> str:
+    return f"{workload.name} -O{level}"
+
+
+def retime(current: dict, names: Set[str], seed: int, n: int) -> None:
+    """Time the programs `names` in `current` again, keeping each phase's best time."""
+    for shape in SHAPES:
+        workload = generate(shape, current["meta"]["lines"], seed)
+        for level in range(MAX_OPT_LEVEL + 1):
+            name = _name(workload, level)
+            if name in names:
+                times = time_phases(workload, CompileOptions.for_level(level), n)
+                best = current["results"][name]
+                for phase, t in times.items():
+                    best[phase] = min(best[phase], t)
+
+
+class Regression(NamedTuple):
+    name: str
+    phase: str
+    baseline: float
+    current: float
+
+    def __str__(self) -> str:
+        return (f"{self.name} {self.phase}: {self.baseline * 1e3:.2f} ms -> {self.current * 1e3:.2f} ms"
+                f" ({self.current / self.baseline - 1:+.0%})")
+
+
+def compare(baseline: dict, current: dict, threshold: float, min_time: float) -> List[Regression]:
+    """The phases in both runs that got slower by more than `threshold`."""
+    regressions = []
+    for name, phases in current["results"].items():
+        base = baseline["results"].get(name, {})
+        for phase, t in phases.items():
+            if phase in base and base[phase] >= min_time and t > base[phase] * (1 + threshold):
+                regressions.append(Regression(name, phase, base[phase], t))
+    return regressions
+
+
+def report(current: dict, baseline: dict = None) -> None:
+    print(f"{'program':>20} {'phase':>9} {'ms':>10}" + (f" {'baseline':>10} {'change':>7}" if baseline else ""))
+    for name, phases in current["results"].items():
+        base = baseline["results"].get(name, {}) if baseline else {}
+        for phase, t in phases.items():
+            line = f"{name:>20} {phase:>9} {t * 1e3:10.2f}"
+            if phase in base:
+                line += f" {base[phase] * 1e3:10.2f} {t / base[phase] - 1:+7.0%}"
+            print(line)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--shapes", nargs="+", choices=sorted(SHAPES), default=list(SHAPES))
+    ap.add_argument("--levels", nargs="+", type=int, choices=range(MAX_OPT_LEVEL + 1),
+                    default=list(range(MAX_OPT_LEVEL + 1)))
+    ap.add_argument("--lines", type=int, default=300, help="size of each generated program")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--n", type=int, default=5, help="runs per phase; the best counts")
+    ap.add_argument("--out", help="write the results to this JSON file")
+    ap.add_argument("--baseline", help="compare with this JSON file from an earlier --out")
+    ap.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown per phase (0.2 = 20%%)")
+    ap.add_argument("--min-time", type=float, default=0.001, help="don't gate phases faster than this (s)")
+    ap.add_argument("--retries", type=int, default=2, help="times to re-time a program with a slower phase")
+    args = ap.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("format") != FORMAT:
+            print(f"{args.baseline}: not a bench.suite results file of format {FORMAT}", file=sys.stderr)
+            return 2
+    current = run_suite(args.shapes, args.levels, args.lines, args.seed, args.n)
+    regressions = []
+    if baseline is not None:
+        for key in ("lines", "seed"):
+            if baseline["meta"].get(key) != current["meta"][key]:
+                print(f"warning: baseline was run with {key}={baseline['meta'].get(key)}", file=sys.stderr)
+        regressions = compare(baseline, current, args.threshold, args.min_time)
+        for _ in range(args.retries):
+            if not regressions:
+                break
+            retime(current, {r.name for r in regressions}, args.seed, args.n)
+            regressions = compare(baseline, current, args.threshold, args.min_time)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=1)
+    report(current, baseline)
+    if baseline is None:
+        return 0
+    for r in regressions:
+        print(f"REGRESSION {r}")
+    print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
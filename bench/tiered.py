@@ -0,0 +1,90 @@
+"""
+Tiered engine benchmark: whole runs of tiny and long-running programs.
+
+    python -m bench.tiered [-O 2] [--n 5] [--iterations 100000]
+
+Each program runs from its source text to its last line (parsing included)
+on three engines: "exec" transpiles and compiles everything first, as
+run_source always did; "tiered" interprets and compiles once the program is
+hot (src/tiered.py); "interp" only interprets, for reference. Times are the
+best of `--n` runs; "tier-ups" lists what the tiered engine compiled.
+"""
+import argparse
+import glob
+import os
+import time
+import warnings
+from io import StringIO
+
+from bench.fusion import CITY_GAME_INPUT
+from bench.programs import generate
+from compiler import run_source
+from src.interpreter import Interpreter
+from src.options import CompileOptions
+from src.parser import parse
+from src.tiered import TieredEngine
+
+
+def long_programs(iterations: int) -> dict:
+    """Programs that spend their time in one loop of `iterations` rounds."""
+    return {
+        "for-loop": (f"10 FOR I = 1 TO {iterations}\n20 LET S = S + I * 2\n30 NEXT I\n40 PRINT S\n", ""),
+        "nested-loop": (f"10 FOR I = 1 TO {iterations // 500}\n20 FOR J = 1 TO 500\n30 LET S = S + J\n"
+                        "40 NEXT J\n50 NEXT I\n60 PRINT S\n", ""),
+        "goto-loop": (f"10 LET I = I + 1\n20 LET S = S + I * 2\n30 IF I < {iterations} THEN GOTO 10\n"
+                      "40 PRINT S\n", ""),
+        "gosub-loop": (f"10 LET I = I + 1\n20 GOSUB 100\n30 IF I < {iterations // 2} THEN GOTO 10\n"
+                       "40 PRINT S\n50 END\n"
+                       "100 LET S = S + I\n110 IF S > 1000 THEN LET S = S - 1000\n120 RETURN\n", ""),
+    }
+
+
+def programs(iterations: int) -> dict:
+    """name -> (source, stdin): the samples, generated programs and long loops."""
+    found = {}
+    for path in sorted(glob.glob("samples/*.bas")):
+        with open(path, encoding="utf-8") as f:
+            stdin = CITY_GAME_INPUT if "city_game" in path else "5\n" * 20
+            found[os.path.basename(path)] = (f.read(), stdin)
+    for shape in ("goto", "input"):
+        workload = generate(shape, 200)
+        found[workload.name] = (workload.source, workload.stdin)
+    found.update(long_programs(iterations))
+    return found
+
+
+def best(fn, n: int) -> float:
+    t = float("inf")
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        t = min(t, time.perf_counter() - start)
+    return t
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-O", dest="level", type=int, default=2, help="-O level of exec and the hot tier")
+    ap.add_argument("--n", type=int, default=5)
+    ap.add_argument("--iterations", type=int, default=100000, help="rounds of the long loops")
+    args = ap.parse_args()
+    options = CompileOptions.for_level(args.level)
+    warnings.simplefilter("ignore")
+    print(f"{'program':>16} {'exec':>10} {'tiered':>10} {'interp':>10} {'speedup':>8}  tier-ups")
+    for name, (source, stdin) in programs(args.iterations).items():
+        events = []
+
+        def tiered():
+            engine = TieredEngine(parse(source), StringIO(stdin), StringIO(), options)
+            engine.run()
+            events[:] = engine.events
+
+        exec_time = best(lambda: run_source(source, StringIO(stdin), StringIO(), options), args.n)
+        tiered_time = best(tiered, args.n)
+        interp_time = best(lambda: Interpreter(parse(source), StringIO(stdin), StringIO()).run(), args.n)
+        print(f"{name:>16} {exec_time * 1e3:8.2f}ms {tiered_time * 1e3:8.2f}ms {interp_time * 1e3:8.2f}ms"
+              f" {exec_time / tiered_time:7.2f}x  {', '.join(kind for kind, _ in events) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
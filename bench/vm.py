@@ -0,0 +1,79 @@
+"""
+Bytecode VM benchmark: the stack VM against the transpiler backend.
+
+    python -m bench.vm [--n 5] [--lines 200] [--iterations 100000]
+
+Programs are the samples, one generated program per bench.programs shape
+(`--lines` lines) and the bench.tiered long loops. For each, "compile" is
+parse-to-runnable time (transpile + compile() at -O0 and -O2, against
+compiling to bytecode) and "run" the time to run what was compiled; times
+are the best of `--n` runs. "size" is the bytecode's serialised size next to
+the marshalled -O2 code object's. "ratio" is VM total time over -O2 total.
+"""
+import argparse
+import glob
+import marshal
+import os
+import time
+import warnings
+from io import StringIO
+
+from bench.fusion import CITY_GAME_INPUT
+from bench.programs import SHAPES, generate
+from bench.tiered import long_programs
+from compiler import compile_code, run_code
+from src.bytecode import compile_program, run_bytecode
+from src.optimize import optimize
+from src.options import CompileOptions
+from src.parser import parse
+
+
+def programs(lines: int, iterations: int) -> dict:
+    """name -> (source, stdin)."""
+    found = {}
+    for path in sorted(glob.glob("samples/*.bas")):
+        with open(path, encoding="utf-8") as f:
+            stdin = CITY_GAME_INPUT if "city_game" in path else "5\n" * 20
+            found[os.path.basename(path)] = (f.read(), stdin)
+    for shape in sorted(SHAPES):
+        workload = generate(shape, lines)
+        found[workload.name] = (workload.source, workload.stdin)
+    found.update(long_programs(iterations))
+    return found
+
+
+def best(fn, n: int) -> float:
+    t = float("inf")
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        t = min(t, time.perf_counter() - start)
+    return t
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--n", type=int, default=5)
+    ap.add_argument("--lines", type=int, default=200, help="lines of each generated program")
+    ap.add_argument("--iterations", type=int, default=100000, help="rounds of the long loops")
+    args = ap.parse_args()
+    o0, o2 = CompileOptions(), CompileOptions.for_level(2)
+    warnings.simplefilter("ignore")
+    print(f"{'program':>16} {'compile: -O0':>12} {'-O2':>8} {'vm':>8}   {'run: -O0':>9} {'-O2':>8} {'vm':>8}"
+          f"   {'size: -O2':>9} {'vm':>7} {'ratio':>6}")
+    for name, (source, stdin) in programs(args.lines, args.iterations).items():
+        code0, code2 = compile_code(source, o0), compile_code(source, o2)
+        bytecode = compile_program(optimize(parse(source), 0))
+        c0 = best(lambda: compile_code(source, o0), args.n)
+        c2 = best(lambda: compile_code(source, o2), args.n)
+        cv = best(lambda: compile_program(optimize(parse(source), 0)), args.n)
+        r0 = best(lambda: run_code(code0, StringIO(stdin), StringIO()), args.n)
+        r2 = best(lambda: run_code(code2, StringIO(stdin), StringIO()), args.n)
+        rv = best(lambda: run_bytecode(bytecode, StringIO(stdin), StringIO()), args.n)
+        print(f"{name:>16} {c0 * 1e3:10.2f}ms {c2 * 1e3:6.2f}ms {cv * 1e3:6.2f}ms"
+              f"   {r0 * 1e3:7.2f}ms {r2 * 1e3:6.2f}ms {rv * 1e3:6.2f}ms"
+              f"   {len(marshal.dumps(code2)):8}B {len(bytecode.to_bytes()):6}B {(cv + rv) / (c2 + r2):5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
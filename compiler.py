@@ -1,46 +1,217 @@
 """
 BASIC compiler: compile and run BASIC source.
 """
+import argparse
+import dataclasses
+import glob
+import json
+import marshal
+import os
+import pstats
+import signal
 import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
 from io import StringIO
+from pathlib import Path
+from types import CodeType
+from typing import Iterable, List, Optional, TextIO, Union
 
-from src.lexer import tokenize, LexerError
-from src.parser import parse, ParseError
-from src.codegen import transpile
+from src.lexer import tokenize, stream_tokens, LexerError
+from src.parser import Parser, parse, ParseError
+from src.codegen import Transpiler, transpile, transpile_ast, TranspileError
+from src.options import CompileOptions, MAX_OPT_LEVEL
+from src.optimize import optimize
+from src.cache import CompileCache, cache_key
+from src.stats import CompileStats, PHASES, bytecode_size, count_nodes
+from src.line_profile import LineProfile
+from src.runtime import io_builtins
+from src.tiered import run_tiered
+from src.closures import run_closures
+from src.bytecode import compile_program, disassemble, run_vm
+from src.artifact import Artifact, ArtifactError, SUFFIX, source_digest
+from src.analysis import program_variables
+from src.ast_nodes import Program
 
+ENGINES = ("exec", "tiered", "closure", "vm")
+EMITS = ("python", "artifact")
+# What the CLI calls each compile error.
+ERRORS = ((LexerError, "Lexer error"), (ParseError, "Parse error"), (TranspileError, "Compile error"))
 
-def compile_source(source: str) -> str:
-    """Compile BASIC source to Python code. Raises LexerError or ParseError on failure."""
-    program = parse(source)
-    return transpile(program)
 
+def _parse(source: Union[str, TextIO], stats: CompileStats = None) -> Program:
+    """Parse `source`, timing the "lex" and "parse" phases into `stats`."""
+    if stats is None:
+        return parse(source)
+    if isinstance(source, str):
+        with stats.phase("lex"):
+            tokens = tokenize(source)
+        stats.tokens = len(tokens)
+        with stats.phase("parse"):
+            return Parser(tokens).parse()
+    lexed = stats.times.get("lex", 0.0)
+    with stats.phase("parse"):
+        program = Parser(stats.lexing(stream_tokens(source))).parse()
+    stats.times["parse"] -= stats.times["lex"] - lexed  # lexing happened inside
+    return program
 
-def run_source(source: str, stdin: StringIO = None, stdout: StringIO = None) -> None:
-    """Compile and execute BASIC source. Uses provided stdin/stdout or sys.stdin/stdout."""
-    python_code = compile_source(source)
-    globs = {"__name__": "__main__"}
 
-    if stdin is not None:
-        def _input(prompt=""):
-            return stdin.readline().rstrip("\n")
-        globs["input"] = _input
-    else:
-        globs["input"] = input
+def _translate(source: Union[str, TextIO, Program], options: CompileOptions, backend: str = "text",
+               stats: CompileStats = None):
+    """Generated Python for `source`: text, or an ast.Module for the "ast" backend."""
+    to_python = transpile_ast if backend == "ast" else transpile
+    program = source if isinstance(source, Program) else _parse(source, stats)
+    if stats is None:
+        return to_python(optimize(program, options.opt_level), options)
+    stats.nodes = count_nodes(program)
+    with stats.phase("optimize"):
+        program = optimize(program, options.opt_level)
+    with stats.phase("transpile"):
+        transpiler = Transpiler(options)
+        python = transpiler.transpile_ast(program) if backend == "ast" else transpiler.transpile(program)
+    stats.blocks = transpiler.blocks
+    if backend != "ast":
+        stats.source_size = len(python)
+    return python
 
-    if stdout is not None:
-        def _print(*args, sep=" ", end="\n", file=None, **kwargs):
-            if file is not None:
-                print(*args, sep=sep, end=end, file=file, **kwargs)
-            else:
-                print(*args, sep=sep, end=end, file=stdout, **kwargs)
-        globs["print"] = _print
-    else:
-        globs["print"] = print
 
-    exec(python_code, globs)
+def compile_source(source: Union[str, TextIO], options: CompileOptions = None,
+                   stats: CompileStats = None) -> str:
+    """Compile BASIC source to Python code. Raises LexerError, ParseError or TranspileError on failure.
+
+    `source` may be a text file, which is then lexed and parsed as it is read.
+    A `stats` object is filled in with what each phase cost (see src/stats.py).
+    """
+    options = options or CompileOptions()
+    if stats is None:
+        return _translate(source, options)
+    with stats.tracing():
+        return _translate(source, options, stats=stats)
+
+
+def _compile(source: Union[str, TextIO, Program], options: CompileOptions = None,
+             stats: CompileStats = None) -> CodeType:
+    options = options or CompileOptions()
+    if stats is None:
+        return compile(_translate(source, options, options.backend), "<basic>", "exec")
+    with stats.tracing():
+        python = _translate(source, options, options.backend, stats)
+        with stats.phase("compile"):
+            code = compile(python, "<basic>", "exec")
+    stats.bytecode_size = bytecode_size(code)
+    return code
+
+
+def compile_code(source: Union[str, TextIO], options: CompileOptions = None,
+                 cache: CompileCache = None, stats: CompileStats = None) -> CodeType:
+    """Compile BASIC source to a Python code object, through `cache` if one is given.
+
+    `options.backend` picks how: from the generated source text, or from a
+    Python AST built directly.
+
+    Compile errors are raised as by compile_source and never cached; compile
+    warnings are only issued when the program is actually compiled. `stats`
+    is filled in as by compile_source, plus the "compile" phase.
+    """
+    if cache is None:
+        return _compile(source, options, stats)
+    if not isinstance(source, str):
+        source = source.read()  # the key covers the whole text
+    key = cache_key(source, options)
+    code = cache.get(key)
+    if stats is not None:
+        stats.cache_hit = code is not None
+    if code is None:
+        code = _compile(source, options, stats)
+        cache.put(key, code)
+    return code
+
+
+def run_source(source: Union[str, TextIO], stdin: StringIO = None, stdout: StringIO = None,
+               options: CompileOptions = None, cache: CompileCache = None,
+               stats: CompileStats = None, engine: str = "exec") -> dict:
+    """Compile and execute BASIC source. Uses provided stdin/stdout or sys.stdin/stdout.
+
+    With a `cache`, a program compiled before (same source, options and
+    compiler) is not compiled again. `stats` records the compilation (see
+    compile_code).
+
+    `engine` picks how the program runs: "exec" compiles it to Python first;
+    "tiered" interprets it and compiles it only once it runs long
+    (src/tiered.py; `options` are then those of the compiled tier);
+    "closure" turns the syntax tree into Python closures and calls them
+    (src/closures.py); "vm" compiles it to bytecode for a stack VM
+    (src/bytecode/). Only "exec" uses `cache` and `stats`.
+
+    Returns the program's variables (name -> value) as they were when it stopped.
+    """
+    if engine == "exec":
+        return run_code(compile_code(source, options, cache, stats), stdin, stdout)
+    if engine == "tiered":
+        return run_tiered(parse(source), stdin, stdout, options)
+    if engine == "closure":
+        return run_closures(parse(source), stdin, stdout, options)
+    if engine == "vm":
+        return run_vm(parse(source), stdin, stdout, options)
+    raise ValueError(f"Unknown engine: {engine!r}; expected one of {ENGINES}")
+
+
+def profile_source(source: Union[str, TextIO], stdin: StringIO = None, stdout: StringIO = None,
+                   options: CompileOptions = None, cache: CompileCache = None) -> LineProfile:
+    """Run BASIC source as run_source does, compiled with `profile_lines`, and
+    return how often each line ran and the time spent in it (src/line_profile.py).
+    """
+    options = dataclasses.replace(options or CompileOptions(), profile_lines=True)
+    return _profile(compile_code(source, options, cache), stdin, stdout)
+
+
+def _profile(code: CodeType, stdin: StringIO = None, stdout: StringIO = None) -> LineProfile:
+    return LineProfile.from_counters(_execute(code, stdin, stdout)["_line_profile"])
+
+
+def run_code(code: CodeType, stdin: StringIO = None, stdout: StringIO = None) -> dict:
+    """Execute a program compiled by compile_code; see run_source."""
+    return _execute(code, stdin, stdout)["_vars"]
+
+
+def _execute(code: CodeType, stdin: StringIO = None, stdout: StringIO = None) -> dict:
+    """Execute `code` and return its globals."""
+    globs = {"__name__": "__main__", **io_builtins(stdin, stdout)}
+    exec(code, globs)
+    return globs
+
 
+def build_artifact(source: Union[str, TextIO], options: CompileOptions = None,
+                   name: str = "<basic>", stats: CompileStats = None) -> Artifact:
+    """Compile BASIC source into an Artifact (src/artifact.py) for `compiler.py run`.
 
-def repl() -> None:
+    `name` is recorded as the source file name. Raises as compile_code does,
+    and fills in `stats` as it does.
+    """
+    if not isinstance(source, str):
+        source = source.read()
+    options = options or CompileOptions()
+    program = _parse(source, stats)
+    # The metadata first: optimising may rewrite the program.
+    lines = tuple((line.number, line.source_line) for line in program.lines)
+    variables = tuple(program_variables(program))
+    return Artifact(
+        code=_compile(program, options, stats),
+        source_name=name,
+        source_sha256=source_digest(source),
+        options=repr(options),
+        lines=lines,
+        variables=variables,
+    )
+
+
+def run_artifact(artifact: Artifact, stdin: StringIO = None, stdout: StringIO = None) -> dict:
+    """Run a built program as run_source runs its source; return its variables."""
+    return run_code(artifact.code, stdin, stdout)
+
+
+def repl(options: CompileOptions = None) -> None:
     """Interactive BASIC command line (REPL)."""
     lines = []
     print("BASIC (Python) - type RUN to execute, LIST to show, NEW to clear, BYE to quit")
@@ -72,34 +243,432 @@ def repl() -> None:
                 continue
             source = "\n".join(lines)
             try:
-                run_source(source)
+                run_source(source, options=options)
             except LexerError as e:
                 print(f"Lexer error: {e}", file=sys.stderr)
             except ParseError as e:
                 print(f"Parse error: {e}", file=sys.stderr)
+            except TranspileError as e:
+                print(f"Compile error: {e}", file=sys.stderr)
             continue
         lines.append(line)
 
 
-def main() -> int:
-    if len(sys.argv) < 2:
-        repl()
+@dataclasses.dataclass
+class FileResult:
+    """How compiling one file in a batch went (see compile_many)."""
+    path: str
+    error: Optional[str] = None  # e.g. "Parse error: ...", as the CLI reports it, else "<exception type>: ..."
+    warnings: List[str] = dataclasses.field(default_factory=list)
+    stats: CompileStats = dataclasses.field(default_factory=CompileStats)  # phase times
+    seconds: float = 0.0  # wall time in the worker, reading and writing included
+    output: Optional[str] = None  # the file written, if any
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def find_sources(patterns: Iterable[Union[str, Path]], suffix: str = ".bas") -> List[str]:
+    """The files named by `patterns`: files, directories (searched
+    recursively for names ending in `suffix`) and glob patterns (`**`
+    included), each listed once, in order.
+    """
+    found = {}
+    for pattern in patterns:
+        pattern = str(pattern)
+        if os.path.isdir(pattern):
+            paths = sorted(str(p) for p in Path(pattern).rglob("*" + suffix) if p.is_file())
+        elif glob.has_magic(pattern):
+            paths = sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+        else:
+            paths = [pattern]
+        found.update(dict.fromkeys(paths))
+    return list(found)
+
+
+def _output_path(path: str, emit: str, output_dir: Optional[str], root: str) -> str:
+    target = Path(path).with_suffix(".py" if emit == "python" else SUFFIX)
+    if output_dir is None:
+        return str(target)
+    return os.path.join(output_dir, os.path.relpath(target, root))
+
+
+def _compile_file(path: str, options: CompileOptions, emit: Optional[str] = None,
+                  output: Optional[str] = None) -> FileResult:
+    """compile_many's work for one file; runs in a worker process."""
+    result = FileResult(path)
+    start = time.perf_counter()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                source = f.read()
+            if emit == "artifact":
+                artifact = build_artifact(source, options, name=path, stats=result.stats)
+            else:
+                python = compile_source(source, options, result.stats)
+                with result.stats.phase("compile"):
+                    compile(python, path, "exec")
+            if output is not None:
+                os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+                if emit == "artifact":
+                    artifact.write(output)
+                else:
+                    with open(output, "w", encoding="utf-8") as f:
+                        f.write(python)
+                result.output = output
+        except FileNotFoundError:
+            result.error = "File not found"
+        except OSError as e:
+            result.error = f"I/O error: {e}"
+        except tuple(error for error, _ in ERRORS) as e:
+            result.error = next(f"{name}: {e}" for error, name in ERRORS if isinstance(e, error))
+        except Exception as e:  # e.g. a file that is not UTF-8, or a compiler bug
+            result.error = f"{type(e).__name__}: {e}"
+    result.warnings = [str(w.message) for w in caught]
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def compile_many(patterns: Iterable[Union[str, Path]], options: CompileOptions = None,
+                 workers: Optional[int] = None, emit: Optional[str] = None,
+                 output_dir: Optional[str] = None) -> List[FileResult]:
+    """Compile every .bas file `patterns` name (see find_sources) across
+    `workers` processes (default: one per CPU; 1 compiles in this process).
+
+    Returns one FileResult per file, in order; a file that fails to compile,
+    even by an exception the compiler should never raise, has its error
+    there rather than raised. `emit` also writes each compiled
+    file: "python" its generated Python (.py), "artifact" a .bbc artifact for
+    `compiler.py run`. Outputs go next to their sources, or under
+    `output_dir` with the sources' directory layout.
+    """
+    if emit is not None and emit not in EMITS:
+        raise ValueError(f"Unknown emit: {emit!r}; expected one of {EMITS}")
+    options = options or CompileOptions()
+    paths = find_sources(patterns)
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths]) if paths else "."
+    outputs = [_output_path(os.path.abspath(p) if output_dir else p, emit, output_dir, root)
+               if emit else None for p in paths]
+    workers = min(workers or os.cpu_count() or 1, max(len(paths), 1))
+    if workers == 1:
+        return [_compile_file(p, options, emit, out) for p, out in zip(paths, outputs)]
+    # Several files per task, so that small files do not cost a round trip each.
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(_compile_file, paths, [options] * len(paths), [emit] * len(paths),
+                             outputs, chunksize=chunksize))
+
+
+TIMEOUT_STATUS = 124  # what timeout(1) exits with
+
+
+@dataclasses.dataclass
+class CaseResult:
+    """One run of a program by run_many."""
+    stdout: str  # everything it printed, up to an error or the timeout
+    status: int = 0  # 0 ran to the end, 1 failed with `error`, TIMEOUT_STATUS timed out
+    error: Optional[str] = None  # e.g. "ZeroDivisionError: division by zero"
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 0
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _alarm(signum, frame):
+    raise _Timeout
+
+
+_worker_code: Optional[CodeType] = None  # the program a run_many worker runs
+
+
+def _load_program(code: bytes) -> None:
+    global _worker_code
+    _worker_code = marshal.loads(code)
+
+
+def _run_case(stdin: str, timeout: Optional[float] = None, code: Optional[CodeType] = None) -> CaseResult:
+    """Run `code` (by default the worker's program) on `stdin`, stopping it
+    after `timeout` seconds with SIGALRM."""
+    stdout = StringIO()
+    result = CaseResult("")
+    if timeout:
+        previous = signal.signal(signal.SIGALRM, _alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    start = time.perf_counter()
+    try:
+        try:
+            run_code(code or _worker_code, StringIO(stdin), stdout)
+        finally:
+            result.seconds = time.perf_counter() - start
+            if timeout:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except _Timeout:  # also one that fires just as the program ends
+        result.status, result.error = TIMEOUT_STATUS, f"timed out after {timeout:g} s"
+    except Exception as e:
+        result.status, result.error = 1, f"{type(e).__name__}: {e}"
+    finally:
+        if timeout:
+            signal.signal(signal.SIGALRM, previous)
+    result.stdout = stdout.getvalue()
+    return result
+
+
+def run_many(source: Union[str, TextIO], cases: Iterable[str], options: CompileOptions = None,
+             workers: Optional[int] = None, timeout: Optional[float] = None) -> List[CaseResult]:
+    """Compile BASIC source once and run it once per case, each case being
+    the text it reads as stdin, across `workers` processes (default: one
+    per CPU; 1 runs them in this process).
+
+    Returns a CaseResult per case, in order. A run that raises is reported
+    there rather than raised. A `timeout` (seconds) stops each run that takes
+    longer; it uses SIGALRM, so it needs a POSIX system and, with one worker,
+    the main thread. Compile errors are raised as by compile_code.
+    """
+    code = compile_code(source, options)
+    cases = list(cases)
+    workers = min(workers or os.cpu_count() or 1, max(len(cases), 1))
+    if workers == 1:
+        return [_run_case(stdin, timeout, code) for stdin in cases]
+    # Each worker unmarshals the program once, then runs cases in chunks.
+    chunksize = max(1, len(cases) // (workers * 4))
+    with ProcessPoolExecutor(workers, initializer=_load_program, initargs=(marshal.dumps(code),)) as pool:
+        return list(pool.map(_run_case, cases, [timeout] * len(cases), chunksize=chunksize))
+
+
+def print_stats(stats: CompileStats, file=None) -> None:
+    """Write `stats.report()` and any phase profiles (top functions by cumulative time)."""
+    file = file or sys.stderr
+    print(stats.report(), file=file)
+    for phase, profiler in stats.profiles.items():
+        print(f"--- cProfile of {phase}", file=file)
+        pstats.Stats(profiler, stream=file).sort_stats("cumulative").print_stats(15)
+
+
+def build_main(argv) -> int:
+    """`compiler.py build`: compile a program into an artifact file."""
+    ap = argparse.ArgumentParser(prog="compiler.py build",
+                                 description="Compile a BASIC program into a precompiled artifact.")
+    ap.add_argument("file", help="BASIC source file")
+    ap.add_argument("-o", dest="output", metavar="OUT",
+                    help=f"artifact to write (default: the source path with {SUFFIX})")
+    ap.add_argument("-O", dest="level", type=int, default=0, choices=range(MAX_OPT_LEVEL + 1),
+                    metavar="LEVEL", help=f"optimisation level 0..{MAX_OPT_LEVEL} (default 0)")
+    args = ap.parse_args(argv)
+    output = args.output or str(Path(args.file).with_suffix(SUFFIX))
+    try:
+        with open(args.file, "r", encoding="utf-8") as f:
+            artifact = build_artifact(f, CompileOptions.for_level(args.level), name=args.file)
+    except FileNotFoundError:
+        print(f"File not found: {args.file}", file=sys.stderr)
+        return 1
+    except LexerError as e:
+        print(f"Lexer error: {e}", file=sys.stderr)
+        return 1
+    except ParseError as e:
+        print(f"Parse error: {e}", file=sys.stderr)
+        return 1
+    except TranspileError as e:
+        print(f"Compile error: {e}", file=sys.stderr)
+        return 1
+    artifact.write(output)
+    return 0
+
+
+def batch_main(argv) -> int:
+    """`compiler.py batch`: compile many files in parallel and report on each."""
+    ap = argparse.ArgumentParser(prog="compiler.py batch",
+                                 description="Compile BASIC files in parallel, reporting errors, "
+                                             "warnings and compile time per file.")
+    ap.add_argument("paths", nargs="+", metavar="PATH",
+                    help="a .bas file, a directory (searched recursively) or a glob such as 'src/**/*.bas'")
+    ap.add_argument("-j", "--workers", type=int, metavar="N",
+                    help="worker processes (default: one per CPU)")
+    ap.add_argument("-O", dest="level", type=int, default=0, choices=range(MAX_OPT_LEVEL + 1),
+                    metavar="LEVEL", help=f"optimisation level 0..{MAX_OPT_LEVEL} (default 0)")
+    ap.add_argument("--emit", choices=EMITS,
+                    help="also write each file's generated Python (.py) or artifact (.bbc)")
+    ap.add_argument("--output-dir", metavar="DIR",
+                    help="with --emit, write under DIR instead of next to each source")
+    ap.add_argument("-q", "--quiet", action="store_true", help="report only files with errors or warnings")
+    args = ap.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        ap.error("--workers must be at least 1")
+    if args.output_dir and not args.emit:
+        ap.error("--output-dir needs --emit")
+    start = time.perf_counter()
+    results = compile_many(args.paths, CompileOptions.for_level(args.level), args.workers,
+                           args.emit, args.output_dir)
+    elapsed = time.perf_counter() - start
+    for result in results:
+        if result.ok and not (args.quiet and not result.warnings):
+            print(f"{result.path}: ok, {result.stats.total_time * 1e3:.2f} ms")
+        elif not result.ok:
+            print(f"{result.path}: {result.error}")
+        for warning in result.warnings:
+            print(f"{result.path}: warning: {warning}")
+    failed = sum(not result.ok for result in results)
+    compiling = sum(result.stats.total_time for result in results)
+    print(f"{len(results)} files, {failed} failed; {compiling:.2f} s compiling, {elapsed:.2f} s elapsed")
+    return 1 if failed or not results else 0
+
+
+def run_many_main(argv) -> int:
+    """`compiler.py run-many`: run programs over many input transcripts in parallel."""
+    ap = argparse.ArgumentParser(prog="compiler.py run-many",
+                                 description="Compile BASIC programs once each and run them on many "
+                                             "stdin cases in parallel, reporting status and time per case.")
+    ap.add_argument("programs", nargs="+", metavar="PROGRAM", help="BASIC source file")
+    ap.add_argument("-c", "--cases", action="append", required=True, metavar="PATH",
+                    help="a file holding one case's stdin, a directory of them or a glob; repeatable")
+    ap.add_argument("-j", "--workers", type=int, metavar="N", help="worker processes (default: one per CPU)")
+    ap.add_argument("-O", dest="level", type=int, default=0, choices=range(MAX_OPT_LEVEL + 1),
+                    metavar="LEVEL", help=f"optimisation level 0..{MAX_OPT_LEVEL} (default 0)")
+    ap.add_argument("--timeout", type=float, metavar="SECONDS", help="stop a case that runs longer")
+    ap.add_argument("--json", action="store_true",
+                    help="print every result, stdout included, as JSON instead of a report")
+    args = ap.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        ap.error("--workers must be at least 1")
+    paths = find_sources(args.cases, suffix="")
+    cases = []
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cases.append(f.read())
+        except FileNotFoundError:
+            print(f"File not found: {path}", file=sys.stderr)
+            return 1
+    options = CompileOptions.for_level(args.level)
+    report, failed = {}, 0
+    for program in args.programs:
+        try:
+            with open(program, "r", encoding="utf-8") as f:
+                results = run_many(f, cases, options, args.workers, args.timeout)
+        except FileNotFoundError:
+            print(f"File not found: {program}", file=sys.stderr)
+            return 1
+        except tuple(error for error, _ in ERRORS) as e:
+            print(next(f"{program}: {name}: {e}" for error, name in ERRORS if isinstance(e, error)),
+                  file=sys.stderr)
+            failed += len(cases)
+            continue
+        failed += sum(not result.ok for result in results)
+        report[program] = {path: dataclasses.asdict(result) for path, result in zip(paths, results)}
+        if not args.json:
+            for path, result in zip(paths, results):
+                outcome = "ok" if result.ok else f"exit {result.status}, {result.error}"
+                print(f"{program} < {path}: {outcome}, {result.seconds * 1e3:.2f} ms")
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{len(args.programs)} programs x {len(cases)} cases, {failed} failed")
+    return 1 if failed else 0
+
+
+def run_main(argv) -> int:
+    """`compiler.py run`: run an artifact written by `compiler.py build`."""
+    ap = argparse.ArgumentParser(prog="compiler.py run", description="Run a precompiled BASIC artifact.")
+    ap.add_argument("file", help=f"artifact ({SUFFIX}) written by `compiler.py build`")
+    args = ap.parse_args(argv)
+    try:
+        artifact = Artifact.read(args.file)
+    except FileNotFoundError:
+        print(f"File not found: {args.file}", file=sys.stderr)
+        return 1
+    except ArtifactError as e:
+        print(f"Artifact error: {e}", file=sys.stderr)
+        return 1
+    run_artifact(artifact)
+    return 0
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["build"]:
+        return build_main(argv[1:])
+    if argv[:1] == ["run"]:
+        return run_main(argv[1:])
+    if argv[:1] == ["batch"]:
+        return batch_main(argv[1:])
+    if argv[:1] == ["run-many"]:
+        return run_many_main(argv[1:])
+    ap = argparse.ArgumentParser(description="Compile and run a BASIC program (REPL if no file); "
+                                             "`build` and `run` subcommands handle precompiled artifacts, "
+                                             "`batch` compiles many files in parallel, "
+                                             "`run-many` runs programs on many inputs in parallel.")
+    ap.add_argument("file", nargs="?", help="BASIC source file")
+    ap.add_argument("-O", dest="level", type=int, default=0, choices=range(MAX_OPT_LEVEL + 1),
+                    metavar="LEVEL", help=f"optimisation level 0..{MAX_OPT_LEVEL} (default 0)")
+    ap.add_argument("--cache-dir", metavar="DIR",
+                    help="reuse compiled programs stored in DIR (created if missing)")
+    ap.add_argument("--stats", action="store_true",
+                    help="print the time each compile phase took and what it produced to stderr")
+    ap.add_argument("--trace-memory", action="store_true",
+                    help="with --stats, also the peak memory while compiling (slower)")
+    ap.add_argument("--profile-phase", action="append", choices=PHASES, default=[], metavar="PHASE",
+                    help=f"print a cProfile of compile phase PHASE ({', '.join(PHASES)}); repeatable")
+    ap.add_argument("--engine", choices=ENGINES, default="exec",
+                    help="exec: compile to Python, then run (default); tiered: interpret, "
+                         "compiling only a program that runs long; closure: run the syntax tree "
+                         "as pre-built Python closures; vm: run it as bytecode on a stack VM")
+    ap.add_argument("--disassemble", action="store_true",
+                    help="print the program's VM bytecode instead of running it")
+    ap.add_argument("--profile", action="store_true",
+                    help="print how often each BASIC line ran and the time spent in it to stderr")
+    ap.add_argument("--profile-format", choices=("text", "json"), default="text",
+                    help="format of the --profile report (default text)")
+    args = ap.parse_args(argv)
+    if args.engine != "exec" and (args.stats or args.trace_memory or args.profile_phase
+                                  or args.profile or args.cache_dir):
+        ap.error("--stats, --trace-memory, --profile-phase, --profile and --cache-dir need --engine exec")
+    options = CompileOptions.for_level(args.level, profile_lines=args.profile)
+    cache = CompileCache(directory=args.cache_dir) if args.cache_dir else None
+    stats = None
+    if args.stats or args.trace_memory or args.profile_phase:
+        stats = CompileStats(trace_memory=args.trace_memory, profile=args.profile_phase)
+    if args.file is None:
+        repl(options)
         return 0
-    path = sys.argv[1]
+    path = args.file
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            source = f.read()
+        f = open(path, "r", encoding="utf-8")
     except FileNotFoundError:
         print(f"File not found: {path}", file=sys.stderr)
         return 1
     try:
-        run_source(source)
+        with f:
+            if args.disassemble:
+                program = optimize(parse(f), options.opt_level)
+                print(disassemble(compile_program(program, options)), end="")
+                return 0
+            if args.engine != "exec":
+                run_source(f, options=options, engine=args.engine)
+                return 0
+            # Without a cache the file is lexed and parsed as it is read.
+            code = compile_code(f, options, cache, stats)
+        if stats is not None:
+            print_stats(stats)
+        if args.profile:
+            profile = _profile(code)
+            print(profile.to_json() if args.profile_format == "json" else profile.report(), file=sys.stderr)
+        else:
+            run_code(code)
     except LexerError as e:
         print(f"Lexer error: {e}", file=sys.stderr)
         return 1
     except ParseError as e:
         print(f"Parse error: {e}", file=sys.stderr)
         return 1
+    except TranspileError as e:
+        print(f"Compile error: {e}", file=sys.stderr)
+        return 1
     return 0
 
 
@@ -1,11 +1,21 @@
-from .lexer import Lexer, LexerError, tokenize
+__version__ = "0.2.0"
+
+from .lexer import Lexer, RegexLexer, LexerError, tokenize
 from .tokens import Token, TokenType
 from .ast_nodes import Program, Line
 from .parser import Parser, ParseError, parse
+from .options import CompileOptions
+from .cache import CompileCache, CacheStats, cache_key
+from .stats import CompileStats
+from .line_profile import LineProfile, LineStats
 
 __all__ = [
-    "Lexer", "LexerError", "tokenize",
+    "Lexer", "RegexLexer", "LexerError", "tokenize",
     "Token", "TokenType",
     "Program", "Line",
     "Parser", "ParseError", "parse",
+    "CompileOptions",
+    "CompileCache", "CacheStats", "cache_key",
+    "CompileStats",
+    "LineProfile", "LineStats",
 ]
@@ -0,0 +1,17 @@
+from .jumps import JumpTargets, build_line_index, find_jump_targets, literal_target, resolve_target
+from .variables import assigned_variables, program_variables
+from .types import VType, TypeInfo, infer_types
+from .cfg import (
+    ControlFlowGraph, build_cfg, drop_unreachable_statements, is_empty_line, is_terminal,
+    reachable_statements,
+)
+from .subroutines import Subroutine, find_subroutines
+
+__all__ = [
+    "JumpTargets", "build_line_index", "find_jump_targets", "literal_target", "resolve_target",
+    "assigned_variables", "program_variables",
+    "VType", "TypeInfo", "infer_types",
+    "ControlFlowGraph", "build_cfg", "drop_unreachable_statements", "is_empty_line", "is_terminal",
+    "reachable_statements",
+    "Subroutine", "find_subroutines",
+]
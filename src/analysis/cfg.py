@@ -0,0 +1,203 @@
+"""
+Control-flow graph over source lines.
+
+Node i is `program.lines[i]`; node n (= len(lines)) is the program exit.
+GOSUB is modelled like a call in an interprocedural CFG: the calling line gets
+an edge to the subroutine entry and a RETURN_SITE edge to the next line, and
+lines ending in RETURN have no successors (they are listed in `returns`).
+"""
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..ast_nodes import (
+    Program, Stmt, IfStmt, ForStmt, GotoStmt, GosubStmt, ReturnStmt, EndStmt, RemStmt,
+)
+from .jumps import build_line_index, resolve_target
+
+# Edge kinds
+FALL = "fall"                # falls through to the next line
+GOTO = "goto"
+GOSUB = "gosub"              # call edge to the subroutine entry
+RETURN_SITE = "return-site"  # where the GOSUB continues once the subroutine returns
+END = "end"                  # END statement, to the exit node
+COMPUTED = "computed"        # GOTO/GOSUB with a runtime target: may land on any line
+
+Edge = Tuple[int, str]
+
+
+@dataclass
+class ControlFlowGraph:
+    n: int  # number of lines; node n is the exit
+    edges: List[List[Edge]] = field(default_factory=list)  # per line: (successor, kind)
+    returns: Set[int] = field(default_factory=set)  # lines that may RETURN
+    computed: bool = False  # some jump target is only known at runtime
+
+    @property
+    def exit(self) -> int:
+        return self.n
+
+    def successors(self, i: int) -> Set[int]:
+        if i >= self.n:
+            return set()
+        return {dest for dest, _ in self.edges[i]}
+
+    def predecessors(self) -> Dict[int, Set[int]]:
+        """Map each node to the lines with an edge into it."""
+        preds: Dict[int, Set[int]] = {i: set() for i in range(self.n + 1)}
+        for i, out in enumerate(self.edges):
+            for dest, _ in out:
+                preds[dest].add(i)
+        return preds
+
+    def falls_through(self, i: int) -> bool:
+        """True if control can run off the end of line i into line i+1."""
+        return (i + 1, FALL) in self.edges[i]
+
+    def with_calls(self, entries: Set[int]) -> "ControlFlowGraph":
+        """Copy in which a GOSUB to one of `entries` returns like a function call:
+        the calling line falls through to the next instead of having a RETURN_SITE edge."""
+        edges: List[List[Edge]] = []
+        for i, out in enumerate(self.edges):
+            calls = {dest for dest, kind in out if kind == GOSUB}
+            out = list(out)
+            if calls & entries:
+                if not calls - entries:
+                    out = [edge for edge in out if edge[1] != RETURN_SITE]
+                if (i + 1, FALL) not in out:
+                    out.append((i + 1, FALL))
+            edges.append(out)
+        return ControlFlowGraph(self.n, edges, set(self.returns), self.computed)
+
+    def reachable(self, start: int = 0) -> Set[int]:
+        """Nodes reachable from `start` (the exit node included if it is reached)."""
+        seen: Set[int] = set()
+        stack = [start] if self.n else []
+        while stack:
+            i = stack.pop()
+            if i in seen:
+                continue
+            seen.add(i)
+            stack.extend(self.successors(i) - seen)
+        return seen
+
+    def to_dot(self, program: Optional[Program] = None) -> str:
+        """Graphviz rendering; nodes are labelled with BASIC line numbers when `program` is given."""
+        def label(i: int) -> str:
+            if i == self.n:
+                return "exit"
+            number = program.lines[i].number if program is not None else None
+            return str(number) if number is not None else f"#{i}"
+
+        out = ["digraph cfg {"]
+        for i, edges in enumerate(self.edges):
+            for dest, kind in edges:
+                style = "" if kind in (FALL, GOTO) else f' [label="{kind}"]'
+                out.append(f'  "{label(i)}" -> "{label(dest)}"{style};')
+        out.append("}")
+        return "\n".join(out)
+
+
+def is_terminal(s: Stmt) -> bool:
+    """True if executing `s` never continues with the next statement of its line."""
+    if isinstance(s, (GotoStmt, GosubStmt, ReturnStmt, EndStmt)):
+        return True
+    if isinstance(s, IfStmt):
+        return s.else_stmt is not None and is_terminal(s.then_stmt) and is_terminal(s.else_stmt)
+    return False
+
+
+def reachable_statements(stmts: List[Stmt]) -> List[Stmt]:
+    """`stmts` up to and including the first terminal one: the rest never run
+    and have no edges in the CFG. FOR bodies and IF branches are cut too."""
+    kept = []
+    for s in stmts:
+        kept.append(_cut(s))
+        if is_terminal(s):
+            break
+    return kept
+
+
+def _cut(s: Stmt) -> Stmt:
+    """`s` with reachable_statements applied inside it (a copy only if anything changes)."""
+    if isinstance(s, ForStmt):
+        body = reachable_statements(s.body)
+        return s if _same(body, s.body) else replace(s, body=body)
+    if isinstance(s, IfStmt):
+        then_stmt = _cut(s.then_stmt)
+        else_stmt = s.else_stmt if s.else_stmt is None else _cut(s.else_stmt)
+        if then_stmt is not s.then_stmt or else_stmt is not s.else_stmt:
+            return replace(s, then_stmt=then_stmt, else_stmt=else_stmt)
+    return s
+
+
+def _same(a: List[Stmt], b: List[Stmt]) -> bool:
+    return len(a) == len(b) and all(x is y for x, y in zip(a, b))
+
+
+def drop_unreachable_statements(program: Program) -> Program:
+    """`program` with each line's statements cut by reachable_statements. Line
+    indices do not change; lines and statements that needed no cut are reused."""
+    lines = []
+    for line in program.lines:
+        stmts = reachable_statements(line.statements)
+        lines.append(line if _same(stmts, line.statements) else replace(line, statements=stmts))
+    return Program(lines)
+
+
+def is_empty_line(stmts: List[Stmt]) -> bool:
+    """True for a line that does nothing when run (no statements, or only REMs)."""
+    return all(isinstance(s, RemStmt) for s in stmts)
+
+
+class _EdgeCollector:
+    def __init__(self, i: int, n: int, line_index: Dict[int, int], cfg: ControlFlowGraph):
+        self.i, self.n, self.line_index, self.cfg = i, n, line_index, cfg
+        self.edges: List[Edge] = []
+
+    def add(self, dest: int, kind: str) -> None:
+        if (dest, kind) not in self.edges:
+            self.edges.append((dest, kind))
+
+    def jump(self, s: Stmt) -> None:
+        dest = resolve_target(s.target, self.line_index, self.i + 1)
+        if dest is None:
+            self.cfg.computed = True
+            for j in sorted(set(self.line_index.values()) | {self.i + 1}):
+                self.add(j, COMPUTED)
+        else:
+            self.add(dest, GOSUB if isinstance(s, GosubStmt) else GOTO)
+        if isinstance(s, GosubStmt):
+            self.add(self.i + 1, RETURN_SITE)
+
+    def stmts(self, stmts: Iterable[Stmt]) -> bool:
+        """Collect edges of a statement sequence; return False if control never gets past it."""
+        for s in stmts:
+            if isinstance(s, (GotoStmt, GosubStmt)):
+                self.jump(s)
+            elif isinstance(s, ReturnStmt):
+                self.cfg.returns.add(self.i)
+            elif isinstance(s, EndStmt):
+                self.add(self.n, END)
+            elif isinstance(s, IfStmt):
+                self.stmts([s.then_stmt])
+                if s.else_stmt is not None:
+                    self.stmts([s.else_stmt])
+            elif isinstance(s, ForStmt):
+                self.stmts(s.body)
+            if is_terminal(s):
+                return False
+        return True
+
+
+def build_cfg(program: Program, line_index: Optional[Dict[int, int]] = None) -> ControlFlowGraph:
+    """Build the line-level control-flow graph of `program`."""
+    if line_index is None:
+        line_index = build_line_index(program)
+    n = len(program.lines)
+    cfg = ControlFlowGraph(n=n)
+    for i, line in enumerate(program.lines):
+        collector = _EdgeCollector(i, n, line_index, cfg)
+        if collector.stmts(line.statements):
+            collector.add(i + 1, FALL)
+        cfg.edges.append(collector.edges)
+    return cfg
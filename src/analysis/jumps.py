@@ -0,0 +1,71 @@
+"""
+Jump-target analysis: which lines can be entered other than by falling through.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set, Union
+
+from ..ast_nodes import Program, Expr, NumberExpr, GotoStmt, GosubStmt, iter_stmts
+
+
+@dataclass
+class JumpTargets:
+    # Line indices (positions in program.lines) entered by a jump or a RETURN;
+    # len(lines) stands for "past the end".
+    targets: Set[int] = field(default_factory=set)
+    # True if some GOTO/GOSUB target is not a literal, so any line may be entered.
+    computed: bool = False
+
+
+def build_line_index(program: Program) -> Dict[int, int]:
+    """Map line number -> line index. Unnumbered lines are addressable by their index."""
+    index: Dict[int, int] = {}
+    for i, line in enumerate(program.lines):
+        if line.number is not None:
+            index[line.number] = i
+        else:
+            index[i] = i  # implicit line number = block index
+    return index
+
+
+def literal_target(target: Expr) -> Optional[Union[int, float]]:
+    """Line number named by a literal GOTO/GOSUB target, or None if it is computed."""
+    if not isinstance(target, NumberExpr):
+        return None
+    value = target.value
+    if isinstance(value, float) and value == int(value):
+        value = int(value)
+    return value
+
+
+def resolve_target(target: Expr, line_index: Dict[int, int], fallthrough: int) -> Optional[int]:
+    """Line index a GOTO/GOSUB to `target` lands on, or None if it is computed at runtime.
+
+    Mirrors `_line_index.get(_num(target), fallthrough)`: a literal that names
+    no line falls through to the next line.
+    """
+    number = literal_target(target)
+    if number is None:
+        return None
+    return line_index.get(number, fallthrough)
+
+
+def find_jump_targets(program: Program, line_index: Optional[Dict[int, int]] = None) -> JumpTargets:
+    """Collect the lines that must start a dispatch block.
+
+    Line 0 (program entry), every resolved GOTO/GOSUB target and the line after
+    each GOSUB (its return point) are targets.
+    """
+    if line_index is None:
+        line_index = build_line_index(program)
+    result = JumpTargets(targets={0})
+    for i, line in enumerate(program.lines):
+        for s in iter_stmts(line.statements):
+            if isinstance(s, GosubStmt):
+                result.targets.add(i + 1)
+            if isinstance(s, (GotoStmt, GosubStmt)):
+                dest = resolve_target(s.target, line_index, i + 1)
+                if dest is None:
+                    result.computed = True
+                else:
+                    result.targets.add(dest)
+    return result
@@ -0,0 +1,119 @@
+"""
+Subroutine analysis: GOSUB targets that behave like functions.
+
+A subroutine is the set of lines its entry reaches without following calls
+(FALL, GOTO and RETURN_SITE edges). It can be compiled as a function when
+
+  - its lines are contiguous and line 0 is not among them,
+  - no reachable line outside it falls or jumps into it, and no GOSUB targets
+    any of its lines but the entry (single entry, no shared code),
+  - every GOSUB to it is the last thing its line does, so the caller simply
+    continues with the next line after the call,
+  - everything it calls is such a subroutine too, and it is not recursive.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..ast_nodes import Program, Stmt, IfStmt, ForStmt, GosubStmt
+from .cfg import ControlFlowGraph, FALL, GOTO, GOSUB, RETURN_SITE, build_cfg
+from .jumps import build_line_index, resolve_target
+
+
+@dataclass
+class Subroutine:
+    entry: int  # line index GOSUB lands on
+    lines: List[int] = field(default_factory=list)  # its line indices, in order
+    calls: Set[int] = field(default_factory=set)  # entries of the subroutines it GOSUBs
+
+
+def _gosubs(stmts: List[Stmt], tail: bool = True) -> Iterable[Tuple[GosubStmt, bool]]:
+    """Yield each GOSUB in `stmts` with whether it is the last thing its line does."""
+    for k, s in enumerate(stmts):
+        last = tail and k == len(stmts) - 1
+        if isinstance(s, GosubStmt):
+            yield s, last
+        elif isinstance(s, IfStmt):
+            yield from _gosubs([s.then_stmt], last)
+            if s.else_stmt is not None:
+                yield from _gosubs([s.else_stmt], last)
+        elif isinstance(s, ForStmt):
+            yield from _gosubs(s.body, False)
+
+
+def _body(cfg: ControlFlowGraph, entry: int) -> Set[int]:
+    body: Set[int] = set()
+    stack = [entry]
+    while stack:
+        i = stack.pop()
+        if i in body or i >= cfg.n:
+            continue
+        body.add(i)
+        stack.extend(dest for dest, kind in cfg.edges[i] if kind in (FALL, GOTO, RETURN_SITE))
+    return body
+
+
+def find_subroutines(program: Program, cfg: Optional[ControlFlowGraph] = None,
+                     line_index: Optional[Dict[int, int]] = None,
+                     exclude: Iterable[int] = ()) -> Dict[int, Subroutine]:
+    """Map entry line -> Subroutine for every GOSUB target that can be a function.
+
+    Entries in `exclude` are treated as ordinary GOSUB targets, and so are
+    the subroutines calling them.
+    """
+    if line_index is None:
+        line_index = build_line_index(program)
+    if cfg is None:
+        cfg = build_cfg(program, line_index)
+    if cfg.computed:
+        return {}
+    live = cfg.reachable()
+    rejected = set(exclude)
+    entries: Set[int] = set()
+    for i in live - {cfg.n}:
+        for s, tail in _gosubs(program.lines[i].statements):
+            dest = resolve_target(s.target, line_index, i + 1)
+            entries.add(dest)
+            if not tail:
+                rejected.add(dest)
+    # dest -> [(source, kind)], counting only edges that can run
+    preds: Dict[int, List[Tuple[int, str]]] = {}
+    for i in live - {cfg.n}:
+        for dest, kind in cfg.edges[i]:
+            preds.setdefault(dest, []).append((i, kind))
+
+    subs: Dict[int, Subroutine] = {}
+    for entry in sorted(entries - rejected - {cfg.n}):
+        body = _body(cfg, entry)
+        lines = sorted(body)
+        if 0 in body or lines != list(range(entry, lines[-1] + 1)):
+            continue
+        if any(
+            (kind == GOSUB and dest != entry) or (kind != GOSUB and src not in body)
+            for dest in lines for src, kind in preds.get(dest, ())
+        ):
+            continue
+        calls = {dest for i in lines for dest, kind in cfg.edges[i] if kind == GOSUB}
+        subs[entry] = Subroutine(entry, lines, calls)
+
+    # Drop subroutines calling ordinary ones or themselves, until none is left.
+    while True:
+        bad = {e for e, sub in subs.items() if not sub.calls <= subs.keys() or _recursive(subs, e)}
+        if not bad:
+            return subs
+        for e in bad:
+            del subs[e]
+
+
+def _recursive(subs: Dict[int, Subroutine], entry: int) -> bool:
+    """True if `entry` can reach itself through calls."""
+    seen: Set[int] = set()
+    stack = list(subs[entry].calls)
+    while stack:
+        e = stack.pop()
+        if e == entry:
+            return True
+        if e in seen or e not in subs:
+            continue
+        seen.add(e)
+        stack.extend(subs[e].calls)
+    return False
@@ -0,0 +1,147 @@
+"""
+Type inference: which kinds of runtime value each variable and expression can hold.
+
+Flow-insensitive: a variable's type is the union of everything ever assigned
+to it, plus INT for the implicit initial 0. Expressions that can only raise
+(e.g. "A" - 1) contribute no type, since they never produce a value.
+"""
+from enum import Flag
+from typing import Dict, Iterable, List, Tuple
+
+from ..ast_nodes import (
+    Program, Stmt, Expr,
+    LetStmt, InputStmt, ForStmt,
+    NumberExpr, StringExpr, VarExpr, BinaryOpExpr, UnaryOpExpr, BuiltinCallExpr,
+    iter_stmts,
+)
+
+
+class VType(Flag):
+    NONE = 0
+    INT = 1
+    FLOAT = 2
+    STR = 4
+    BOOL = 8  # result of a comparison; prints as True/False
+    NUM = INT | FLOAT
+    ANY = INT | FLOAT | STR | BOOL
+
+
+_COMPARISONS = ("<", "<=", ">", ">=", "=", "<>")
+
+
+def _parts(t: VType) -> List[VType]:
+    return [p for p in (VType.INT, VType.FLOAT, VType.STR, VType.BOOL) if p & t]
+
+
+def _binary(op: str, lt: VType, rt: VType) -> VType:
+    """Result type of `left op right` under Python semantics."""
+    if op in _COMPARISONS:
+        return VType.BOOL if lt and rt else VType.NONE
+    result = VType.NONE
+    for a in _parts(lt):
+        for b in _parts(rt):
+            if a == VType.STR or b == VType.STR:
+                if op == "+" and a == b:
+                    result |= VType.STR
+                elif op == "*" and (a | b) in (VType.STR | VType.INT, VType.STR | VType.BOOL):
+                    result |= VType.STR
+            elif op == "/" or a == VType.FLOAT or b == VType.FLOAT:
+                result |= VType.FLOAT
+            else:
+                result |= VType.INT
+    return result
+
+
+def normalized(t: VType) -> VType:
+    """Type of `_num(x)` for x of type t: integral floats become ints."""
+    return t | VType.INT if t & VType.FLOAT else t
+
+
+class TypeInfo:
+    """Inferred types for one program: `variables` plus per-expression lookup via `of`."""
+
+    def __init__(self, variables: Dict[str, VType]):
+        self.variables = variables
+        # id(expr) -> (expr, type); holding expr keeps its id from being reused
+        self._memo: Dict[int, Tuple[Expr, VType]] = {}
+
+    def var(self, name: str) -> VType:
+        return self.variables.get(name, VType.INT)
+
+    def of(self, e: Expr) -> VType:
+        hit = self._memo.get(id(e))
+        if hit is not None and hit[0] is e:
+            return hit[1]
+        t = self._infer(e)
+        self._memo[id(e)] = (e, t)
+        return t
+
+    def _infer(self, e: Expr) -> VType:
+        if isinstance(e, NumberExpr):
+            return VType.FLOAT if isinstance(e.value, float) else VType.INT
+        if isinstance(e, StringExpr):
+            return VType.STR
+        if isinstance(e, VarExpr):
+            return self.var(e.name)
+        if isinstance(e, UnaryOpExpr):
+            t = self.of(e.operand)
+            return (t & VType.NUM) | (VType.INT if t & VType.BOOL else VType.NONE)
+        if isinstance(e, BinaryOpExpr):
+            return _binary(e.op, self.of(e.left), self.of(e.right))
+        if isinstance(e, BuiltinCallExpr):
+            if e.name == "RND" and len(e.args) == 1:
+                return VType.INT
+            if e.name == "ABS" and len(e.args) == 1:
+                t = self.of(e.args[0])
+                return (t & VType.NUM) | (VType.INT if t & VType.BOOL else VType.NONE)
+            return VType.ANY
+        raise ValueError(f"Unknown expr: {type(e)}")
+
+    def is_integral(self, e: Expr) -> bool:
+        """True if `e` never evaluates to a float, so `_num(e)` is the identity."""
+        return not (self.of(e) & VType.FLOAT)
+
+
+def _for_var_type(info: TypeInfo, s: ForStmt) -> VType:
+    """Values a FOR variable takes: _num(start), then repeatedly + _num(step)."""
+    step = normalized(info.of(s.step)) if s.step is not None else VType.INT
+    t = normalized(info.of(s.start))
+    while True:
+        grown = t | _binary("+", t, step)
+        if grown == t:
+            return t
+        t = grown
+
+
+def _assignments(stmts: Iterable[Stmt]):
+    for s in stmts:
+        if isinstance(s, LetStmt):
+            yield s.name, s
+        elif isinstance(s, InputStmt):
+            for v in s.variables:
+                yield v, s
+        elif isinstance(s, ForStmt):
+            yield s.var, s
+
+
+def infer_types(program: Program) -> TypeInfo:
+    """Infer variable types to a fixpoint, then return them with an expression typer."""
+    assignments = [
+        pair for line in program.lines for pair in _assignments(iter_stmts(line.statements))
+    ]
+    variables: Dict[str, VType] = {name: VType.INT for name, _ in assignments}
+    while True:
+        info = TypeInfo(dict(variables))
+        changed = False
+        for name, s in assignments:
+            if isinstance(s, LetStmt):
+                t = info.of(s.value)
+            elif isinstance(s, InputStmt):
+                t = VType.NUM
+            else:
+                t = _for_var_type(info, s)
+            if t & ~variables[name]:
+                variables[name] |= t
+                changed = True
+        if not changed:
+            return info
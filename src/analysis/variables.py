@@ -0,0 +1,41 @@
+"""
+Variable analysis: which BASIC variables a program reads and assigns.
+"""
+from typing import List, Set
+
+from ..ast_nodes import (
+    Program, Stmt, LetStmt, InputStmt, ForStmt, VarExpr,
+    iter_stmts, iter_exprs, stmt_exprs,
+)
+
+
+def assigned_variables(stmts: List[Stmt]) -> Set[str]:
+    """Names written by LET, INPUT or a FOR loop anywhere in `stmts`."""
+    names: Set[str] = set()
+    for s in iter_stmts(stmts):
+        if isinstance(s, LetStmt):
+            names.add(s.name)
+        elif isinstance(s, InputStmt):
+            names.update(s.variables)
+        elif isinstance(s, ForStmt):
+            names.add(s.var)
+    return names
+
+
+def program_variables(program: Program) -> List[str]:
+    """Every variable the program reads or assigns, in order of first appearance."""
+    seen = {}
+    for line in program.lines:
+        for s in iter_stmts(line.statements):
+            if isinstance(s, LetStmt):
+                seen.setdefault(s.name)
+            elif isinstance(s, InputStmt):
+                for v in s.variables:
+                    seen.setdefault(v)
+            elif isinstance(s, ForStmt):
+                seen.setdefault(s.var)
+            for e in stmt_exprs(s):
+                for sub in iter_exprs(e):
+                    if isinstance(sub, VarExpr):
+                        seen.setdefault(sub.name)
+    return list(seen)
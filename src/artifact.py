@@ -0,0 +1,106 @@
+"""
+Precompiled program files (`.bbc`): `compiler.py build` writes them and
+`compiler.py run` executes them without lexing, parsing or transpiling.
+
+An artifact holds the program's Python code object and some metadata: the
+compiler version, options and Python that built it, the source file name
+and its sha256, the BASIC line numbers with their lines in the source
+file, and the program's variables. On disk it is
+
+    MAGIC                 8 bytes
+    format version        2 bytes, big-endian
+    sha256 of the rest   32 bytes
+    metadata length       4 bytes, big-endian
+    metadata              marshalled tuple of plain values
+    code                  marshalled code object
+
+A code object only runs on the Python version that made it, so loading
+checks the Python magic number in the metadata before it unmarshals the
+code. Every failed check raises ArtifactError and means the program has to
+be rebuilt.
+"""
+import hashlib
+import importlib.util
+import marshal
+import os
+import struct
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from types import CodeType
+from typing import Optional, Tuple, Union
+
+from . import __version__
+
+MAGIC = b"BASICBBC"
+VERSION = 1
+SUFFIX = ".bbc"
+
+_HEADER = struct.Struct(">8sH32s")
+_LENGTH = struct.Struct(">I")
+
+
+class ArtifactError(ValueError):
+    """A file that is not an artifact this compiler and Python can run."""
+
+
+@dataclass(frozen=True)
+class Artifact:
+    code: CodeType
+    source_name: str
+    source_sha256: str
+    options: str  # repr of the CompileOptions it was compiled with
+    lines: Tuple[Tuple[Optional[int], Optional[int]], ...]  # (BASIC number, source line) per line
+    variables: Tuple[str, ...]
+    compiler: str = __version__
+    python: bytes = importlib.util.MAGIC_NUMBER
+
+    def to_bytes(self) -> bytes:
+        metadata = marshal.dumps((self.compiler, self.python, self.source_name, self.source_sha256,
+                                  self.options, self.lines, self.variables))
+        payload = _LENGTH.pack(len(metadata)) + metadata + marshal.dumps(self.code)
+        return _HEADER.pack(MAGIC, VERSION, hashlib.sha256(payload).digest()) + payload
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Artifact":
+        if len(data) < _HEADER.size or not data.startswith(MAGIC):
+            raise ArtifactError("not a BASIC artifact (bad magic number)")
+        _, version, checksum = _HEADER.unpack_from(data)
+        if version != VERSION:
+            raise ArtifactError(f"artifact format version {version}, expected {VERSION}; rebuild it")
+        payload = data[_HEADER.size:]
+        if hashlib.sha256(payload).digest() != checksum:
+            raise ArtifactError("artifact checksum mismatch: the file is corrupt; rebuild it")
+        try:
+            (length,) = _LENGTH.unpack_from(payload)
+            metadata = marshal.loads(payload[_LENGTH.size:_LENGTH.size + length])
+            compiler, python, source_name, source_sha256, options, lines, variables = metadata
+        except (EOFError, ValueError, TypeError, struct.error) as e:
+            raise ArtifactError(f"corrupt artifact metadata: {e}") from None
+        if python != importlib.util.MAGIC_NUMBER:
+            raise ArtifactError(f"artifact built by another Python (magic {python.hex()}, this is "
+                                f"{importlib.util.MAGIC_NUMBER.hex()}); rebuild it")
+        code = marshal.loads(payload[_LENGTH.size + length:])
+        return cls(code, source_name, source_sha256, options, lines, variables, compiler, python)
+
+    def write(self, path: Union[str, Path]) -> None:
+        """Write the artifact to `path` atomically."""
+        path = Path(path)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.to_bytes())
+            os.chmod(tmp, 0o644)  # mkstemp's files are private
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def read(cls, path: Union[str, Path]) -> "Artifact":
+        return cls.from_bytes(Path(path).read_bytes())
+
+
+def source_digest(source: str) -> str:
+    """The sha256 an artifact records for BASIC source text."""
+    return hashlib.sha256(source.encode("utf-8", "surrogatepass")).hexdigest()
@@ -1,5 +1,8 @@
 """
 Abstract Syntax Tree nodes for BASIC.
+
+Nodes are slotted dataclasses (no per-instance `__dict__`); the optimisation
+passes rewrite their fields in place, so they are not frozen.
 """
 from abc import ABC
 from dataclasses import dataclass, field
@@ -9,38 +12,38 @@ from typing import List, Optional, Union
 # --- Expression nodes ---
 
 class Expr(ABC):
-    pass
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(slots=True)
 class NumberExpr(Expr):
     value: Union[int, float]
 
 
-@dataclass
+@dataclass(slots=True)
 class StringExpr(Expr):
     value: str
 
 
-@dataclass
+@dataclass(slots=True)
 class VarExpr(Expr):
     name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOpExpr(Expr):
     op: str  # '+', '-', '*', '/', '<', '<=', '>', '>=', '=', '<>'
     left: Expr
     right: Expr
 
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOpExpr(Expr):
     op: str  # '-', '+'
     operand: Expr
 
 
-@dataclass
+@dataclass(slots=True)
 class BuiltinCallExpr(Expr):
     name: str
     args: List[Expr]
@@ -49,26 +52,26 @@ class BuiltinCallExpr(Expr):
 # --- Statement nodes ---
 
 class Stmt(ABC):
-    pass
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(slots=True)
 class PrintStmt(Stmt):
     items: List[Expr]  # string or expression for each PRINT item
 
 
-@dataclass
+@dataclass(slots=True)
 class LetStmt(Stmt):
     name: str
     value: Expr
 
 
-@dataclass
+@dataclass(slots=True)
 class InputStmt(Stmt):
     variables: List[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class IfStmt(Stmt):
     left: Expr
     relop: str
@@ -77,22 +80,22 @@ class IfStmt(Stmt):
     else_stmt: Optional[Stmt] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class GotoStmt(Stmt):
     target: Expr  # line number expression
 
 
-@dataclass
+@dataclass(slots=True)
 class GosubStmt(Stmt):
     target: Expr
 
 
-@dataclass
+@dataclass(slots=True)
 class ReturnStmt(Stmt):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class ForStmt(Stmt):
     var: str
     start: Expr
@@ -101,29 +104,74 @@ class ForStmt(Stmt):
     body: List[Stmt] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class NextStmt(Stmt):
     var: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class EndStmt(Stmt):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class RemStmt(Stmt):
     text: str
 
 
 # --- Program ---
 
-@dataclass
+@dataclass(slots=True)
 class Line:
     number: Optional[int]
     statements: List[Stmt]
+    source_line: Optional[int] = field(default=None, compare=False)  # 1-based, in the source text
 
 
-@dataclass
+@dataclass(slots=True)
 class Program:
     lines: List[Line]
+
+
+# --- Traversal ---
+
+def iter_exprs(e: Expr):
+    """Yield `e` and every sub-expression of it."""
+    stack = [e]
+    while stack:
+        e = stack.pop()
+        yield e
+        if isinstance(e, BinaryOpExpr):
+            stack.append(e.right)
+            stack.append(e.left)
+        elif isinstance(e, UnaryOpExpr):
+            stack.append(e.operand)
+        elif isinstance(e, BuiltinCallExpr):
+            stack.extend(reversed(e.args))
+
+
+def stmt_exprs(s: Stmt) -> List[Expr]:
+    """The expressions appearing directly in `s` (not in nested statements)."""
+    if isinstance(s, PrintStmt):
+        return list(s.items)
+    if isinstance(s, LetStmt):
+        return [s.value]
+    if isinstance(s, IfStmt):
+        return [s.left, s.right]
+    if isinstance(s, (GotoStmt, GosubStmt)):
+        return [s.target]
+    if isinstance(s, ForStmt):
+        return [s.start, s.end] + ([s.step] if s.step is not None else [])
+    return []
+
+
+def iter_stmts(stmts: List[Stmt]):
+    """Yield every statement in `stmts`, descending into IF branches and FOR bodies."""
+    for s in stmts:
+        yield s
+        if isinstance(s, IfStmt):
+            yield from iter_stmts([s.then_stmt])
+            if s.else_stmt is not None:
+                yield from iter_stmts([s.else_stmt])
+        elif isinstance(s, ForStmt):
+            yield from iter_stmts(s.body)
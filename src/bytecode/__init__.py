@@ -0,0 +1,19 @@
+"""
+A compact bytecode for BASIC programs and the stack VM that runs it.
+
+    bytecode = compile_program(parse(source))
+    run_bytecode(bytecode, stdin, stdout)   # as run_source(..., engine="vm")
+    print(disassemble(bytecode))
+    Bytecode.from_bytes(bytecode.to_bytes()) == bytecode
+"""
+from .format import Bytecode, BytecodeError
+from .compiler import BytecodeCompiler, compile_program
+from .vm import line_addresses, run_bytecode, run_vm
+from .disasm import disassemble
+
+__all__ = [
+    "Bytecode", "BytecodeError",
+    "BytecodeCompiler", "compile_program",
+    "line_addresses", "run_bytecode", "run_vm",
+    "disassemble",
+]
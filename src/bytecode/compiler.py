@@ -0,0 +1,222 @@
+"""
+Compile a Program to VM bytecode.
+
+Each line's code starts at the address the line-number table records, so
+a jump to a line is a jump to that address. Literal GOTO/GOSUB targets are
+resolved at compile time (a line that does not exist falls through, after
+an UndefinedLineWarning, as when transpiling); a computed target is looked
+up when it runs, by JUMP_LINE.
+
+A FOR loop keeps its counter, limit and step in three hidden slots and
+compiles to
+
+        <start> NUM STORE c   <limit> NUM STORE c+1   <step> NUM STORE c+2
+    top:
+        FOR_TEST c   JUMP done
+        LOAD c   STORE <var>
+        <body>
+        FOR_STEP c   JUMP top
+    done:
+
+so a GOTO out of the body leaves the loop, as in the interpreter
+(src/interpreter.py).
+"""
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from ..analysis import build_line_index, program_variables
+from ..ast_nodes import (
+    Program, Stmt, Expr,
+    PrintStmt, LetStmt, InputStmt, IfStmt, GotoStmt, GosubStmt, ReturnStmt,
+    ForStmt, NextStmt, EndStmt, RemStmt,
+    NumberExpr, StringExpr, VarExpr, BinaryOpExpr, UnaryOpExpr, BuiltinCallExpr,
+)
+from ..options import CompileOptions
+from ..runtime import link_jumps, num
+from . import opcodes as op
+from .format import Bytecode
+
+
+class BytecodeCompiler:
+    """Compiles programs to `Bytecode`. Of the options only `strict_jumps` applies."""
+
+    def __init__(self, options: Optional[CompileOptions] = None) -> None:
+        self.options = options or CompileOptions()
+
+    def compile(self, program: Program) -> Bytecode:
+        self._code = array("i")
+        self._consts: List = []
+        self._const_index: Dict[Tuple, int] = {}
+        variables = program_variables(program)
+        self._names = list(variables)
+        self._slots = {name: i for i, name in enumerate(variables)}
+        self._targets = link_jumps(program, build_line_index(program), self.options.strict_jumps)
+        self._fixups: List[Tuple[int, int]] = []  # (operand word, line index it jumps to)
+        starts: List[int] = []
+        for i, line in enumerate(program.lines):
+            self._at = i
+            starts.append(self._label())
+            for s in line.statements:
+                self._stmt(s)
+        starts.append(self._label())
+        self._emit(op.HALT)
+        for address, line in self._fixups:
+            self._code[address] = starts[line]
+        return Bytecode(self._code, tuple(self._consts), tuple(self._names), len(variables),
+                        tuple(line.number for line in program.lines), tuple(starts))
+
+    # --- emission ---
+
+    def _emit(self, opcode: int, arg: int = 0) -> int:
+        """Append an instruction; return the index of its operand word."""
+        self._code.append(opcode)
+        self._code.append(arg)
+        return len(self._code) - 1
+
+    def _emit_to_line(self, opcode: int, line: int) -> None:
+        """An instruction whose operand is the address of line index `line`."""
+        self._fixups.append((self._emit(opcode), line))
+
+    def _label(self) -> int:
+        """The address of the next instruction."""
+        return len(self._code) // 2
+
+    def _patch(self, operand: int, address: Optional[int] = None) -> None:
+        self._code[operand] = self._label() if address is None else address
+
+    def _const(self, value) -> int:
+        # Keyed by type too: 1, 1.0 and True are equal but print differently.
+        key = (type(value), value)
+        index = self._const_index.get(key)
+        if index is None:
+            index = self._const_index[key] = len(self._consts)
+            self._consts.append(value)
+        return index
+
+    def _hidden_slots(self, name: str, count: int) -> int:
+        base = len(self._names)
+        self._names.extend(f"{name}#{k}" for k in range(count))
+        return base
+
+    # --- expressions ---
+
+    def _expr(self, e: Expr) -> None:
+        if isinstance(e, (NumberExpr, StringExpr)):
+            self._emit(op.CONST, self._const(e.value))
+        elif isinstance(e, VarExpr):
+            self._emit(op.LOAD, self._slots[e.name])
+        elif isinstance(e, BinaryOpExpr):
+            self._binary(e.op, e.left, e.right)
+        elif isinstance(e, UnaryOpExpr):
+            self._expr(e.operand)
+            self._emit(op.UNARY[e.op])
+        elif isinstance(e, BuiltinCallExpr):
+            for a in e.args:
+                self._expr(a)
+            self._emit(op.CALL, self._const((e.name, len(e.args))))
+        else:
+            raise ValueError(f"Unknown expr: {type(e)}")
+
+    def _binary(self, operator: str, left: Expr, right: Expr) -> None:
+        self._expr(left)
+        if isinstance(right, (NumberExpr, StringExpr)):
+            self._emit(op.BINARY[operator] + op.BINARY_CONST_OFFSET, self._const(right.value))
+        else:
+            self._expr(right)
+            self._emit(op.BINARY[operator])
+
+    def _num_expr(self, e: Expr) -> None:
+        """`e`, then NUM (folded for a literal)."""
+        if isinstance(e, NumberExpr):
+            self._emit(op.CONST, self._const(num(e.value)))
+        else:
+            self._expr(e)
+            self._emit(op.NUM)
+
+    # --- statements ---
+
+    def _stmt(self, s: Stmt) -> None:
+        if isinstance(s, PrintStmt):
+            for item in s.items:
+                self._expr(item)
+                self._emit(op.PRINT)
+            self._emit(op.NEWLINE)
+        elif isinstance(s, LetStmt):
+            self._expr(s.value)
+            self._emit(op.STORE, self._slots[s.name])
+        elif isinstance(s, InputStmt):
+            for v in s.variables:
+                self._emit(op.INPUT, self._slots[v])
+        elif isinstance(s, IfStmt):
+            self._if(s)
+        elif isinstance(s, GotoStmt):
+            self._jump(s)
+        elif isinstance(s, GosubStmt):
+            target = self._targets.get(id(s))
+            if target is None:
+                self._expr(s.target)
+            self._emit_to_line(op.GOSUB, self._at + 1)
+            self._jump(s, evaluated=True)
+        elif isinstance(s, ReturnStmt):
+            self._emit(op.RETURN)
+        elif isinstance(s, EndStmt):
+            self._emit(op.HALT)
+        elif isinstance(s, ForStmt):
+            self._for(s)
+        elif isinstance(s, (NextStmt, RemStmt)):
+            pass
+        else:
+            raise ValueError(f"Unknown statement: {type(s)}")
+
+    def _jump(self, s, evaluated: bool = False) -> None:
+        """GOTO/GOSUB `s`'s target; `evaluated`: a computed one is on the stack already."""
+        target = self._targets.get(id(s))
+        if target is not None:
+            self._emit_to_line(op.JUMP, target)
+            return
+        if not evaluated:
+            self._expr(s.target)
+        self._emit(op.JUMP_LINE, self._at + 1)
+
+    def _if(self, s: IfStmt) -> None:
+        self._binary(s.relop, s.left, s.right)
+        target = self._targets.get(id(s.then_stmt))
+        if isinstance(s.then_stmt, GotoStmt) and target is not None:
+            # IF c THEN GOTO n: one conditional jump.
+            self._emit_to_line(op.JUMP_IF_TRUE, target)
+            if s.else_stmt is not None:
+                self._stmt(s.else_stmt)
+            return
+        skip = self._emit(op.JUMP_IF_FALSE)
+        self._stmt(s.then_stmt)
+        if s.else_stmt is None:
+            self._patch(skip)
+            return
+        done = self._emit(op.JUMP)
+        self._patch(skip)
+        self._stmt(s.else_stmt)
+        self._patch(done)
+
+    def _for(self, s: ForStmt) -> None:
+        counter = self._hidden_slots(s.var, 3)
+        self._num_expr(s.start)
+        self._emit(op.STORE, counter)
+        self._num_expr(s.end)
+        self._emit(op.STORE, counter + 1)
+        self._num_expr(s.step if s.step is not None else NumberExpr(1))
+        self._emit(op.STORE, counter + 2)
+        top = self._label()
+        self._emit(op.FOR_TEST, counter)
+        done = self._emit(op.JUMP)
+        self._emit(op.LOAD, counter)
+        self._emit(op.STORE, self._slots[s.var])
+        for b in s.body:
+            self._stmt(b)
+        self._emit(op.FOR_STEP, counter)
+        self._emit(op.JUMP, top)
+        self._patch(done)
+
+
+def compile_program(program: Program, options: Optional[CompileOptions] = None) -> Bytecode:
+    """Compile `program` to VM bytecode."""
+    return BytecodeCompiler(options).compile(program)
@@ -0,0 +1,41 @@
+"""
+Bytecode listings, in the manner of `dis`:
+
+    line 10:
+         0  LOAD              0  (I)
+         1  ADD_CONST         0  (1)
+         2  STORE             0  (I)
+    line 20:
+         3  LOAD              0  (I)
+        ...
+
+Jump operands are addresses; `>>` marks the addresses jumps land on.
+"""
+from typing import List
+
+from . import opcodes as op
+from .format import Bytecode
+
+
+def disassemble(bytecode: Bytecode) -> str:
+    """A listing of `bytecode`, one instruction per line under its BASIC line."""
+    code = bytecode.code
+    targets = {code[k + 1] for k in range(0, len(code), 2) if code[k] in op.JUMPS}
+    starts = {}
+    for i, address in enumerate(bytecode.starts[:-1]):
+        number = bytecode.numbers[i]
+        starts.setdefault(address, []).append(f"line {number}" if number is not None else f"line #{i + 1}")
+    out: List[str] = []
+    for pc in range(len(code) // 2):
+        for label in starts.get(pc, ()):
+            out.append(f"{label}:")
+        opcode, arg = code[2 * pc], code[2 * pc + 1]
+        text = f"{'>>' if pc in targets else '  '} {pc:5}  {op.NAMES[opcode]:<14}"
+        if opcode in op.SLOTS:
+            text += f" {arg:4}  ({bytecode.names[arg]})"
+        elif opcode in op.CONSTS:
+            text += f" {arg:4}  ({bytecode.consts[arg]!r})"
+        elif opcode in op.JUMPS or opcode == op.JUMP_LINE:
+            text += f" {arg:4}"
+        out.append(text.rstrip())
+    return "\n".join(out) + "\n"
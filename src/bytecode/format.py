@@ -0,0 +1,67 @@
+"""
+The compiled form the VM runs, and its serialised bytes.
+
+`Bytecode` holds:
+
+  code       array('i') of (opcode, operand) word pairs, one per instruction
+             (see opcodes.py)
+  consts     the constant pool: numbers, strings and (name, argc) call sites
+  names      one name per variable slot: the program's variables, then the
+             hidden counter/limit/step slots of each FOR loop
+  variables  how many leading slots are program variables
+  numbers    the line-number table: each line's BASIC number (None if
+             unnumbered), with `starts` the address of its first instruction;
+             `starts` has one more entry, the address of the final HALT
+
+`to_bytes()` writes MAGIC, a format version, then the fields marshalled as
+plain tuples of ints, floats and strings, with the code words little-endian,
+so the result does not depend on the Python version or the machine that
+wrote it. `from_bytes()` rejects anything else with a BytecodeError.
+"""
+import marshal
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+MAGIC = b"BASICVM\0"
+VERSION = 1
+
+
+class BytecodeError(ValueError):
+    """Data that is not bytecode this version of the VM can run."""
+
+
+@dataclass(frozen=True)
+class Bytecode:
+    code: array
+    consts: Tuple
+    names: Tuple[str, ...]
+    variables: int
+    numbers: Tuple[Optional[int], ...]
+    starts: Tuple[int, ...]
+
+    def to_bytes(self) -> bytes:
+        code = array("i", self.code)
+        if sys.byteorder == "big":
+            code.byteswap()
+        fields = (code.tobytes(), self.consts, self.names, self.variables, self.numbers, self.starts)
+        return MAGIC + bytes([VERSION]) + marshal.dumps(fields)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Bytecode":
+        if not data.startswith(MAGIC):
+            raise BytecodeError("not BASIC bytecode (bad magic number)")
+        version = data[len(MAGIC):len(MAGIC) + 1]
+        if version != bytes([VERSION]):
+            raise BytecodeError(f"bytecode format version {version[0] if version else None}, "
+                                f"expected {VERSION}")
+        try:
+            raw, consts, names, variables, numbers, starts = marshal.loads(data[len(MAGIC) + 1:])
+            code = array("i")
+            code.frombytes(raw)
+        except (EOFError, ValueError, TypeError) as e:
+            raise BytecodeError(f"corrupt bytecode: {e}") from None
+        if sys.byteorder == "big":
+            code.byteswap()
+        return cls(code, consts, names, variables, numbers, starts)
@@ -0,0 +1,77 @@
+"""
+Opcodes of the BASIC VM.
+
+Every instruction is two words, the opcode and one operand (0 where the
+opcode takes none). An instruction's address is its index: words 2a and
+2a+1 of the code array. Jump operands are addresses.
+
+The VM tests opcodes in this order, so the ones a loop runs most come first.
+"""
+from typing import Dict, List
+
+# --- operands: slots, constants, stack ---
+LOAD = 0            # push slots[arg]
+CONST = 1           # push consts[arg]
+STORE = 2           # slots[arg] = pop()
+# --- arithmetic and comparison: pop right, pop left, push left <op> right ---
+ADD = 3
+SUB = 4
+MUL = 5
+DIV = 6
+EQ = 7
+NE = 8
+LT = 9
+LE = 10
+GT = 11
+GE = 12
+# --- the same with consts[arg] as the right operand: replace top with top <op> consts[arg] ---
+ADD_CONST = 13
+SUB_CONST = 14
+MUL_CONST = 15
+DIV_CONST = 16
+EQ_CONST = 17
+NE_CONST = 18
+LT_CONST = 19
+LE_CONST = 20
+GT_CONST = 21
+GE_CONST = 22
+# --- control ---
+JUMP = 23           # pc = arg
+JUMP_IF_FALSE = 24  # if not pop(): pc = arg
+JUMP_IF_TRUE = 25   # if pop(): pc = arg
+FOR_TEST = 26       # slots arg..arg+2 hold counter, limit, step: if the loop runs on, skip the next instruction
+FOR_STEP = 27       # slots[arg] += slots[arg + 2]
+GOSUB = 28          # push return address arg on the GOSUB stack
+RETURN = 29         # pc = pop from the GOSUB stack
+JUMP_LINE = 30      # pc = the address of the line numbered num(pop()), else of line index arg
+# --- everything else ---
+PRINT = 31          # write(str(pop()))
+NEWLINE = 32        # write("\n")
+INPUT = 33          # slots[arg] = a number read from one line of input
+NEG = 34            # push -pop()
+POS = 35            # push +pop()
+NUM = 36            # push num(pop())
+CALL = 37           # consts[arg] is (name, argc): pop argc values, push the builtin's result
+HALT = 38           # stop
+
+NAMES: List[str] = [
+    "LOAD", "CONST", "STORE",
+    "ADD", "SUB", "MUL", "DIV", "EQ", "NE", "LT", "LE", "GT", "GE",
+    "ADD_CONST", "SUB_CONST", "MUL_CONST", "DIV_CONST", "EQ_CONST", "NE_CONST",
+    "LT_CONST", "LE_CONST", "GT_CONST", "GE_CONST",
+    "JUMP", "JUMP_IF_FALSE", "JUMP_IF_TRUE", "FOR_TEST", "FOR_STEP", "GOSUB", "RETURN", "JUMP_LINE",
+    "PRINT", "NEWLINE", "INPUT", "NEG", "POS", "NUM", "CALL", "HALT",
+]
+
+# BASIC operator -> opcode; the _CONST form is BINARY_CONST_OFFSET further on.
+BINARY: Dict[str, int] = {
+    "+": ADD, "-": SUB, "*": MUL, "/": DIV,
+    "=": EQ, "<>": NE, "<": LT, "<=": LE, ">": GT, ">=": GE,
+}
+BINARY_CONST_OFFSET = ADD_CONST - ADD
+UNARY: Dict[str, int] = {"-": NEG, "+": POS}
+
+# Opcodes whose operand is an address, a slot or a constant (for the disassembler).
+JUMPS = frozenset({JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, GOSUB})
+SLOTS = frozenset({LOAD, STORE, INPUT, FOR_TEST, FOR_STEP})
+CONSTS = frozenset({CONST, CALL} | set(range(ADD_CONST, GE_CONST + 1)))
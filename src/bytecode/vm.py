@@ -0,0 +1,132 @@
+"""
+The VM: one loop that fetches an (opcode, operand) pair and dispatches on it.
+
+Variables live in a list of slots, the operand stack is a Python list, and
+GOSUB return addresses have a stack of their own. Opcodes are tested by
+number, mostly in the order opcodes.py lists them (the names are in the
+comments; the arithmetic is ordered by how often programs use it), since a
+chain of integer compares on locals is the fastest dispatch plain Python has.
+
+Behaviour is the interpreter's (see src/interpreter.py), with the variables
+reported as with `fast_locals`: every variable the program names, 0 if it
+never ran an assignment to it.
+"""
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from ..ast_nodes import Program
+from ..optimize import optimize
+from ..options import CompileOptions
+from ..runtime import builtin, io_builtins, num, num_input, writer
+from .compiler import compile_program
+from .opcodes import BINARY_CONST_OFFSET
+from .format import Bytecode
+
+
+def line_addresses(bytecode: Bytecode) -> Dict[int, int]:
+    """BASIC line number -> code address, with unnumbered lines addressable by
+    their index (as analysis.build_line_index)."""
+    addresses: Dict[int, int] = {}
+    for i, number in enumerate(bytecode.numbers):
+        addresses[number if number is not None else i] = bytecode.starts[i]
+    return addresses
+
+
+def run_bytecode(bytecode: Bytecode, stdin: TextIO = None, stdout: TextIO = None) -> Dict[str, Any]:
+    """Run `bytecode` with `stdin`/`stdout` as run_source does; return its variables."""
+    words = bytecode.code
+    # One (opcode, operand) tuple per instruction: a single index and unpack to fetch.
+    code: List[Tuple[int, int]] = list(zip(words[::2], words[1::2]))
+    consts = bytecode.consts
+    starts = bytecode.starts
+    lines = line_addresses(bytecode)
+    slots: List[Any] = [0] * len(bytecode.names)
+    stack: List[Any] = []
+    push, pop = stack.append, stack.pop
+    returns: List[int] = []
+    read = io_builtins(stdin, stdout)["input"]
+    write = writer(stdout)
+    const_offset = BINARY_CONST_OFFSET
+    pc = 0
+    while True:
+        opcode, arg = code[pc]
+        pc += 1
+        if opcode == 0:  # LOAD
+            push(slots[arg])
+        elif opcode == 1:  # CONST
+            push(consts[arg])
+        elif opcode == 2:  # STORE
+            slots[arg] = pop()
+        elif opcode <= 22:
+            if opcode <= 12:
+                right = pop()
+            else:  # the _CONST form
+                right = consts[arg]
+                opcode -= const_offset
+            if opcode == 3:  # ADD
+                stack[-1] = stack[-1] + right
+            elif opcode == 4:  # SUB
+                stack[-1] = stack[-1] - right
+            elif opcode == 9:  # LT
+                stack[-1] = stack[-1] < right
+            elif opcode == 5:  # MUL
+                stack[-1] = stack[-1] * right
+            elif opcode == 7:  # EQ
+                stack[-1] = stack[-1] == right
+            elif opcode == 11:  # GT
+                stack[-1] = stack[-1] > right
+            elif opcode == 6:  # DIV
+                stack[-1] = stack[-1] / right
+            elif opcode == 8:  # NE
+                stack[-1] = stack[-1] != right
+            elif opcode == 10:  # LE
+                stack[-1] = stack[-1] <= right
+            else:  # GE
+                stack[-1] = stack[-1] >= right
+        elif opcode == 23:  # JUMP
+            pc = arg
+        elif opcode == 24:  # JUMP_IF_FALSE
+            if not pop():
+                pc = arg
+        elif opcode == 25:  # JUMP_IF_TRUE
+            if pop():
+                pc = arg
+        elif opcode == 26:  # FOR_TEST
+            i, limit, step = slots[arg], slots[arg + 1], slots[arg + 2]
+            if (step > 0 and i <= limit) or (step < 0 and i >= limit):
+                pc += 1
+        elif opcode == 27:  # FOR_STEP
+            slots[arg] = slots[arg] + slots[arg + 2]
+        elif opcode == 28:  # GOSUB
+            returns.append(arg)
+        elif opcode == 29:  # RETURN
+            pc = returns.pop()
+        elif opcode == 30:  # JUMP_LINE
+            pc = lines.get(num(pop()), starts[arg])
+        elif opcode == 31:  # PRINT
+            write(str(pop()))
+        elif opcode == 32:  # NEWLINE
+            write("\n")
+        elif opcode == 33:  # INPUT
+            slots[arg] = num_input(read)
+        elif opcode == 34:  # NEG
+            stack[-1] = -stack[-1]
+        elif opcode == 35:  # POS
+            stack[-1] = +stack[-1]
+        elif opcode == 36:  # NUM
+            stack[-1] = num(stack[-1])
+        elif opcode == 37:  # CALL
+            name, argc = consts[arg]
+            args = stack[len(stack) - argc:]
+            del stack[len(stack) - argc:]
+            push(builtin(name, args))
+        else:  # HALT
+            break
+    return dict(zip(bytecode.names[:bytecode.variables], slots))
+
+
+def run_vm(program: Program, stdin: TextIO = None, stdout: TextIO = None,
+           options: Optional[CompileOptions] = None) -> Dict[str, Any]:
+    """Optimise `program` at `options.opt_level`, compile it to bytecode and
+    run it; return its variables."""
+    options = options or CompileOptions()
+    return run_bytecode(compile_program(optimize(program, options.opt_level), options), stdin, stdout)
@@ -0,0 +1,179 @@
+"""
+Content-addressed cache of compiled programs.
+
+An entry maps a key to the Python code object `run_source` executes. The key
+is a sha256 over everything the code depends on:
+
+  - the BASIC source text
+  - `repr(CompileOptions)`
+  - the compiler: `__version__` plus a fingerprint of the files that turn
+    source into a code object (the `src/` package and the `compiler.py`
+    driver, which runs the passes and picks the backend), so a release or a
+    local edit to either invalidates old entries
+  - the running interpreter's bytecode magic number, since code objects are
+    only valid for the Python that produced them
+
+Stale entries are never hit, only left behind: they drop out of the in-memory
+LRU as new programs arrive, and on disk `clear()` (or deleting the directory)
+removes them. The on-disk layout is one marshal file per key, written
+atomically, so several processes can share a directory.
+"""
+import hashlib
+import importlib.util
+import marshal
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from types import CodeType
+from typing import List, Optional
+
+from . import __version__
+from .options import CompileOptions
+
+SUFFIX = ".bcode"
+
+_fingerprint: Optional[str] = None
+
+
+def compiler_files() -> List[Path]:
+    """The source files a compiled program depends on: the `src/` package and,
+    when it is there, the `compiler.py` driver beside it."""
+    root = Path(__file__).resolve().parent
+    files = sorted(root.rglob("*.py"))
+    driver = root.parent / "compiler.py"
+    if driver.is_file():
+        files.append(driver)
+    return files
+
+
+def compiler_fingerprint() -> str:
+    """sha256 over `__version__` and compiler_files() (computed once)."""
+    global _fingerprint
+    if _fingerprint is None:
+        h = hashlib.sha256(__version__.encode())
+        base = Path(__file__).resolve().parent.parent
+        for path in compiler_files():
+            h.update(str(path.relative_to(base)).encode())
+            h.update(path.read_bytes())
+        _fingerprint = h.hexdigest()
+    return _fingerprint
+
+
+def cache_key(source: str, options: Optional[CompileOptions] = None) -> str:
+    """Hex key of the compiled form of `source` under `options` (see module docstring)."""
+    h = hashlib.sha256()
+    for part in (compiler_fingerprint(), importlib.util.MAGIC_NUMBER.hex(),
+                 repr(options or CompileOptions()), source):
+        h.update(part.encode("utf-8", "surrogatepass"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0  # found in memory
+    disk_hits: int = 0  # found on disk (and then kept in memory)
+    misses: int = 0  # found nowhere
+    evictions: int = 0  # dropped from memory to stay within maxsize
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.disk_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.hits + self.disk_hits) / self.lookups if self.lookups else 0.0
+
+
+class CompileCache:
+    """Bounded LRU of compiled programs, optionally backed by a directory.
+
+    Thread-safe. `maxsize` bounds the in-memory entries; the directory is
+    not bounded.
+    """
+
+    def __init__(self, maxsize: int = 128, directory: Optional[str] = None):
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1, got {maxsize}")
+        self.maxsize = maxsize
+        self.directory = Path(directory) if directory is not None else None
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, CodeType]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CodeType]:
+        with self._lock:
+            code = self._entries.get(key)
+            if code is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return code
+        code = self._load(key)
+        with self._lock:
+            if code is None:
+                self.stats.misses += 1
+            else:
+                self.stats.disk_hits += 1
+        if code is not None:
+            self._remember(key, code)
+        return code
+
+    def put(self, key: str, code: CodeType) -> None:
+        self._remember(key, code)
+        self._store(key, code)
+
+    def clear(self) -> None:
+        """Drop every entry, in memory and on disk. Statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+        if self.directory is not None:
+            for path in self.directory.glob("*" + SUFFIX):
+                path.unlink(missing_ok=True)
+
+    def _remember(self, key: str, code: CodeType) -> None:
+        with self._lock:
+            self._entries[key] = code
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def _path(self, key: str) -> Path:
+        return self.directory / (key + SUFFIX)
+
+    def _load(self, key: str) -> Optional[CodeType]:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            code = marshal.loads(data)
+        except (EOFError, ValueError, TypeError):
+            code = None
+        if not isinstance(code, CodeType):
+            path.unlink(missing_ok=True)  # truncated or foreign file: recompile
+            return None
+        return code
+
+    def _store(self, key: str, code: CodeType) -> None:
+        if self.directory is None:
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(marshal.dumps(code))
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
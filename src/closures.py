@@ -0,0 +1,438 @@
+"""
+Closure compilation: each AST node becomes a pre-bound Python closure, once.
+
+The interpreter (src/interpreter.py) looks at every node again each time it
+runs: a type dispatch, attribute loads, a table lookup for the operator.
+Here that work is done once, before the first line runs, and what is left
+for run time is a call per node.
+
+- An operation with variables or constants as operands is one closure, not
+  three: `X + 1` becomes `lambda: op(get(l, 0), r)` with `op` operator.add,
+  `get` the variable table's, `l` "X" and `r` 1 bound. A small factory for
+  each pair of operand kinds (and for a LET or an IF around the operation)
+  makes them; see _VALUES.
+- The lines from one jump target (or the line after a jump) up to the next
+  run as one block closure, which returns the line index to go on at. The
+  run loop calls one block per jump instead of one line per line. A program
+  with computed GOTO/GOSUB targets can jump to any line, so there each line
+  is a block.
+
+Building the closures is a walk over the tree, with no Python to generate
+and no `exec` or `compile()`: a program starts several times sooner than
+transpiled code and runs within a small factor of it (bench.closures has
+both), and the engine runs where `exec` is not allowed. Behaviour is the
+interpreter's (see src/interpreter.py).
+
+Of the compile options only `strict_jumps` (and `opt_level`, through
+run_closures) applies; the others shape generated Python.
+"""
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from .analysis import build_line_index
+from .ast_nodes import (
+    Program, Stmt, Expr,
+    PrintStmt, LetStmt, InputStmt, IfStmt, GotoStmt, GosubStmt, ReturnStmt,
+    ForStmt, NextStmt, EndStmt, RemStmt,
+    NumberExpr, StringExpr, VarExpr, BinaryOpExpr, UnaryOpExpr, BuiltinCallExpr,
+    iter_stmts,
+)
+from .optimize import optimize
+from .options import CompileOptions
+from .runtime import BINARY_OPS, BUILTINS, builtin, io_builtins, link_jumps, num, num_input, writer
+
+Closure = Callable[[], Any]
+
+# (left, right) operand kind -> maker of a closure for `left op right`, with
+# `op` from BINARY_OPS. A variable operand is read by name, a constant is
+# bound as it is, an expression is a closure called for its value.
+_VALUES: Dict[Tuple[str, str], Callable[..., Closure]] = {
+    ("var", "var"): lambda op, get, l, r: lambda: op(get(l, 0), get(r, 0)),
+    ("var", "const"): lambda op, get, l, r: lambda: op(get(l, 0), r),
+    ("var", "expr"): lambda op, get, l, r: lambda: op(get(l, 0), r()),
+    ("const", "var"): lambda op, get, l, r: lambda: op(l, get(r, 0)),
+    ("const", "const"): lambda op, get, l, r: lambda: op(l, r),
+    ("const", "expr"): lambda op, get, l, r: lambda: op(l, r()),
+    ("expr", "var"): lambda op, get, l, r: lambda: op(l(), get(r, 0)),
+    ("expr", "const"): lambda op, get, l, r: lambda: op(l(), r),
+    ("expr", "expr"): lambda op, get, l, r: lambda: op(l(), r()),
+}
+
+
+# The same for the statements most loops are made of, `LET name = left op
+# right`, `IF left op right THEN then ELSE otherwise` and `IF left op right
+# THEN GOTO target`, when an operand is a variable. Other operands go
+# through a _VALUES closure.
+def _let_var_var(op, get, l, r, variables, name):
+    def run():
+        variables[name] = op(get(l, 0), get(r, 0))
+    return run
+
+
+def _let_var_const(op, get, l, r, variables, name):
+    def run():
+        variables[name] = op(get(l, 0), r)
+    return run
+
+
+def _let_const_var(op, get, l, r, variables, name):
+    def run():
+        variables[name] = op(l, get(r, 0))
+    return run
+
+
+def _let_var_expr(op, get, l, r, variables, name):
+    def run():
+        variables[name] = op(get(l, 0), r())
+    return run
+
+
+def _let_expr_var(op, get, l, r, variables, name):
+    def run():
+        variables[name] = op(l(), get(r, 0))
+    return run
+
+
+_LETS: Dict[Tuple[str, str], Callable[..., Closure]] = {
+    ("var", "var"): _let_var_var, ("var", "const"): _let_var_const, ("const", "var"): _let_const_var,
+    ("var", "expr"): _let_var_expr, ("expr", "var"): _let_expr_var,
+}
+_IFS: Dict[Tuple[str, str], Callable[..., Closure]] = {
+    ("var", "var"): lambda op, get, l, r, then, otherwise:
+        lambda: then() if op(get(l, 0), get(r, 0)) else otherwise(),
+    ("var", "const"): lambda op, get, l, r, then, otherwise:
+        lambda: then() if op(get(l, 0), r) else otherwise(),
+    ("const", "var"): lambda op, get, l, r, then, otherwise:
+        lambda: then() if op(l, get(r, 0)) else otherwise(),
+}
+_IF_GOTOS: Dict[Tuple[str, str], Callable[..., Closure]] = {
+    ("var", "var"): lambda op, get, l, r, target: lambda: target if op(get(l, 0), get(r, 0)) else None,
+    ("var", "const"): lambda op, get, l, r, target: lambda: target if op(get(l, 0), r) else None,
+    ("const", "var"): lambda op, get, l, r, target: lambda: target if op(l, get(r, 0)) else None,
+}
+
+_JUMPS = (GotoStmt, GosubStmt, ReturnStmt, EndStmt)
+
+
+def _kind(e: Expr) -> str:
+    """Operand kind of `e` in the shape tables: "var", "const" or "expr"."""
+    if isinstance(e, (NumberExpr, StringExpr)):
+        return "const"
+    if isinstance(e, VarExpr):
+        return "var"
+    return "expr"
+
+
+def _constant(value) -> Closure:
+    return lambda: value
+
+
+def _sequence(stmts: List[Closure], jumps: bool) -> Closure:
+    """One closure running `stmts` in order; if `jumps`, it stops at the
+    first that returns a line index, and returns it."""
+    if len(stmts) == 1:
+        return stmts[0]
+    if not jumps:
+        if len(stmts) == 2:
+            a, b = stmts
+
+            def run():
+                a()
+                b()
+            return run
+
+        def run():
+            for s in stmts:
+                s()
+        return run
+
+    def run():
+        for s in stmts:
+            target = s()
+            if target is not None:
+                return target
+    return run
+
+
+def _block(straight: List[Closure], last: Optional[Closure], after: int) -> Closure:
+    """Closure running `straight`, then `last` if any; it returns the line
+    index `last` returned, else `after`."""
+    if last is None:
+        if not straight:
+            return _constant(after)
+        if len(straight) == 1:
+            only = straight[0]
+
+            def run():
+                only()
+                return after
+            return run
+
+        def run():
+            for s in straight:
+                s()
+            return after
+        return run
+    if not straight:
+        def run():
+            target = last()
+            return after if target is None else target
+        return run
+
+    def run():
+        for s in straight:
+            s()
+        target = last()
+        return after if target is None else target
+    return run
+
+
+def _can_jump(stmts: List[Stmt]) -> bool:
+    return any(isinstance(s, _JUMPS) for s in iter_stmts(stmts))
+
+
+class ClosureProgram:
+    """`program` compiled to closures that run it with `stdin`/`stdout` as
+    run_source does. Build it once, `run()` it once: the closures are bound
+    to its variables and I/O.
+    """
+
+    def __init__(self, program: Program, stdin: TextIO = None, stdout: TextIO = None,
+                 options: Optional[CompileOptions] = None) -> None:
+        self.options = options or CompileOptions()
+        self.vars: Dict[str, Any] = {}
+        self.stack: List[int] = []  # GOSUB return points, as line indices
+        self._get = self.vars.get
+        self._read = io_builtins(stdin, stdout)["input"]
+        self._write = writer(stdout)
+        self._line_index = build_line_index(program)
+        self._targets = link_jumps(program, self._line_index, self.options.strict_jumps)
+        self._stop = len(program.lines)  # the line index END jumps to
+        self._statements = {
+            PrintStmt: self._print, LetStmt: self._let, InputStmt: self._input, IfStmt: self._if,
+            GotoStmt: self._goto, GosubStmt: self._gosub, ReturnStmt: self._return,
+            ForStmt: self._for, NextStmt: self._nothing, EndStmt: self._end, RemStmt: self._nothing,
+        }
+        # line index -> the block starting there (None inside a block)
+        self.blocks: List[Optional[Closure]] = self._blocks(program)
+
+    def run(self) -> Dict[str, Any]:
+        """Run the program from its first line; return its variables."""
+        blocks = self.blocks
+        n = len(blocks)
+        pc = 0
+        while pc < n:
+            pc = blocks[pc]()
+        return self.vars
+
+    def _blocks(self, program: Program) -> List[Optional[Closure]]:
+        n = len(program.lines)
+        closures: List[List[Closure]] = []
+        jumps: List[bool] = []
+        for i, line in enumerate(program.lines):
+            self._at = i
+            closures.append([self.stmt(s) for s in line.statements if not isinstance(s, (NextStmt, RemStmt))])
+            jumps.append(_can_jump(line.statements))
+        computed = any(
+            isinstance(s, (GotoStmt, GosubStmt)) and id(s) not in self._targets
+            for line in program.lines for s in iter_stmts(line.statements))
+        if computed:
+            starts = set(range(n))
+        else:
+            # A block ends at the first line that can jump.
+            starts = {0} | set(self._targets.values()) | {i + 1 for i in range(n) if jumps[i]}
+        starts = sorted(start for start in starts if start < n)
+        blocks: List[Optional[Closure]] = [None] * n
+        for a, b in zip(starts, starts[1:] + [n]):
+            last = _sequence(closures[b - 1], True) if jumps[b - 1] else None
+            straight = [c for i in range(a, b - 1 if last else b) for c in closures[i]]
+            blocks[a] = _block(straight, last, b)
+        return blocks
+
+    # --- expressions ---
+
+    def expr(self, e: Expr) -> Closure:
+        t = type(e)
+        if t is NumberExpr or t is StringExpr:
+            return _constant(e.value)
+        if t is VarExpr:
+            get, name = self._get, e.name
+            return lambda: get(name, 0)
+        if t is BinaryOpExpr:
+            return self._operation(_VALUES, e.op, e.left, e.right)
+        if t is UnaryOpExpr:
+            operand = self.expr(e.operand)
+            if e.op == "-":
+                return lambda: -operand()
+            return lambda: +operand()
+        if t is BuiltinCallExpr:
+            args = [self.expr(a) for a in e.args]
+            function = BUILTINS.get(e.name)
+            if function is not None and len(args) == 1:
+                arg = args[0]
+                return lambda: function(arg())
+            name = e.name
+            return lambda: builtin(name, [a() for a in args])
+        raise ValueError(f"Unknown expr: {t}")
+
+    def _operand(self, e: Expr) -> Any:
+        """What a shape binds for operand `e`, of kind _kind(e)."""
+        if isinstance(e, (NumberExpr, StringExpr)):
+            return e.value
+        if isinstance(e, VarExpr):
+            return e.name
+        return self.expr(e)
+
+    def _operation(self, shapes: Dict[Tuple[str, str], Callable[..., Closure]],
+                   op: str, left: Expr, right: Expr, *bound) -> Optional[Closure]:
+        """The closure `shapes` makes for `left op right` and `bound`, or None
+        if it has no shape for those operand kinds."""
+        make = shapes.get((_kind(left), _kind(right)))
+        if make is None:
+            return None
+        return make(BINARY_OPS[op], self._get, self._operand(left), self._operand(right), *bound)
+
+    # --- statements ---
+
+    def stmt(self, s: Stmt) -> Closure:
+        """`s` as a closure returning None to go on, or the line index to continue at."""
+        return self._statements[type(s)](s)
+
+    def _print(self, s: PrintStmt) -> Closure:
+        write = self._write
+        items = [self.expr(item) for item in s.items]
+        if len(items) == 1:
+            item = items[0]
+
+            def run():
+                write(str(item()))
+                write("\n")
+            return run
+
+        def run():
+            for item in items:
+                write(str(item()))
+            write("\n")
+        return run
+
+    def _let(self, s: LetStmt) -> Closure:
+        variables, name = self.vars, s.name
+        e = s.value
+        if isinstance(e, BinaryOpExpr):
+            let = self._operation(_LETS, e.op, e.left, e.right, variables, name)
+            if let is not None:
+                return let
+        value = self.expr(e)
+
+        def run():
+            variables[name] = value()
+        return run
+
+    def _input(self, s: InputStmt) -> Closure:
+        variables, read, names = self.vars, self._read, s.variables
+
+        def run():
+            for name in names:
+                variables[name] = num_input(read)
+        return run
+
+    def _if(self, s: IfStmt) -> Closure:
+        if s.else_stmt is None and isinstance(s.then_stmt, GotoStmt) and id(s.then_stmt) in self._targets:
+            target = self._targets[id(s.then_stmt)]
+            closure = self._operation(_IF_GOTOS, s.relop, s.left, s.right, target)
+            if closure is not None:
+                return closure
+            condition = self._operation(_VALUES, s.relop, s.left, s.right)
+            return lambda: target if condition() else None
+        then = self.stmt(s.then_stmt)
+        otherwise = self.stmt(s.else_stmt) if s.else_stmt is not None else _constant(None)
+        closure = self._operation(_IFS, s.relop, s.left, s.right, then, otherwise)
+        if closure is not None:
+            return closure
+        condition = self._operation(_VALUES, s.relop, s.left, s.right)
+        return lambda: then() if condition() else otherwise()
+
+    def _jump(self, s) -> Closure:
+        """Closure returning the line index GOTO/GOSUB `s` lands on."""
+        target = self._targets.get(id(s))
+        if target is not None:
+            return _constant(target)
+        line_index, number, after = self._line_index, self.expr(s.target), self._at + 1
+        return lambda: line_index.get(num(number()), after)
+
+    def _goto(self, s: GotoStmt) -> Closure:
+        return self._jump(s)
+
+    def _gosub(self, s: GosubStmt) -> Closure:
+        target, push, after = self._jump(s), self.stack.append, self._at + 1
+
+        def run():
+            line = target()
+            push(after)
+            return line
+        return run
+
+    def _return(self, s: ReturnStmt) -> Closure:
+        return self.stack.pop
+
+    def _end(self, s: EndStmt) -> Closure:
+        return _constant(self._stop)
+
+    def _nothing(self, s: Stmt) -> Closure:
+        return _constant(None)
+
+    def _for(self, s: ForStmt) -> Closure:
+        variables, name = self.vars, s.var
+        start, end = self.expr(s.start), self.expr(s.end)
+        jumps = _can_jump(s.body)
+        body = [self.stmt(b) for b in s.body if not isinstance(b, (NextStmt, RemStmt))]
+        body = _sequence(body, jumps) if body else _constant(None)
+        if s.step is None or isinstance(s.step, NumberExpr):
+            # A known step fixes the loop test; a zero step never runs the body.
+            step = num(s.step.value) if s.step is not None else 1
+            if step == 0:
+                def run():
+                    num(start())
+                    num(end())
+                return run
+            if not jumps:
+                if step > 0:
+                    def run():
+                        i = num(start())
+                        last = num(end())
+                        while i <= last:
+                            variables[name] = i
+                            body()
+                            i = i + step
+                else:
+                    def run():
+                        i = num(start())
+                        last = num(end())
+                        while i >= last:
+                            variables[name] = i
+                            body()
+                            i = i + step
+                return run
+            step_closure = _constant(step)
+        else:
+            step_closure = self.expr(s.step)
+
+        def run():
+            i = num(start())
+            last = num(end())
+            step = num(step_closure())
+            while (step > 0 and i <= last) or (step < 0 and i >= last):
+                variables[name] = i
+                target = body()
+                if target is not None:
+                    return target
+                i = i + step
+        return run
+
+
+def run_closures(program: Program, stdin: TextIO = None, stdout: TextIO = None,
+                 options: Optional[CompileOptions] = None) -> Dict[str, Any]:
+    """Optimise `program` at `options.opt_level`, compile it to closures and
+    run it; return its variables."""
+    options = options or CompileOptions()
+    program = optimize(program, options.opt_level)
+    return ClosureProgram(program, stdin, stdout, options).run()
@@ -1,3 +1,7 @@
-from .transpiler import Transpiler, transpile
+from .transpiler import (
+    Transpiler, TranspileError, UndefinedLineWarning, transpile, transpile_ast, undefined_target,
+)
 
-__all__ = ["Transpiler", "transpile"]
+__all__ = [
+    "Transpiler", "TranspileError", "UndefinedLineWarning", "transpile", "transpile_ast", "undefined_target",
+]
@@ -0,0 +1,334 @@
+"""
+Output backends for the transpiler.
+
+`Transpiler` decides what code to generate; an emitter builds it. Both
+emitters have the same interface: expression methods return an opaque value
+(source text or an `ast.expr`) to be passed back in, statement methods append
+to the current suite, and compound statements are context managers:
+
+    with out.if_(test):
+        out.return_(out.const(1))
+
+`TextEmitter` produces readable Python source (2-space indent, one BASIC
+statement per line). `AstEmitter` builds an `ast.Module` directly, with each
+node's `lineno` set to the BASIC source line it comes from, so `compile()`
+needs no parsing and tracebacks point into the BASIC program.
+"""
+import ast
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+
+class TextEmitter:
+    """Python source text, one line per statement."""
+
+    def __init__(self) -> None:
+        self._lines: List[str] = []
+        self._indent = 0
+
+    def result(self) -> str:
+        return "\n".join(self._lines)
+
+    def at(self, lineno: int) -> None:
+        """Source line of the code emitted next (not recorded in text)."""
+
+    # --- expressions ---
+
+    def const(self, value: Any) -> str:
+        return repr(value)
+
+    def name_const(self, name: str) -> str:
+        """A BASIC variable or builtin name as a string constant."""
+        return f'"{name}"'
+
+    def name(self, id: str) -> str:
+        return id
+
+    def call(self, func: str, args: Sequence[str] = (), keywords: Optional[dict] = None) -> str:
+        items = list(args)
+        if keywords:
+            items += [f"{k}={v}" for k, v in keywords.items()]
+        return f"{func}({', '.join(items)})"
+
+    def method(self, obj: str, attr: str, args: Sequence[str] = ()) -> str:
+        return f"{obj}.{attr}({', '.join(args)})"
+
+    def binop(self, left: str, op: str, right: str, paren: bool = True) -> str:
+        """Arithmetic or comparison; `paren` only affects the text."""
+        return f"({left} {op} {right})" if paren else f"{left} {op} {right}"
+
+    def unary(self, op: str, operand: str) -> str:
+        return f"({op}{operand})"
+
+    def boolop(self, op: str, values: Sequence[str], paren: bool = False) -> str:
+        text = f" {op} ".join(values)
+        return f"({text})" if paren else text
+
+    def not_(self, operand: str) -> str:
+        return f"not {operand}"
+
+    def list_(self, items: Iterable[str]) -> str:
+        return "[" + ", ".join(items) + "]"
+
+    def dict_(self, pairs: Iterable[Tuple[str, str]]) -> str:
+        return "{" + ", ".join(f"{k}: {v}" for k, v in pairs) + "}"
+
+    def dict_const(self, value: dict) -> str:
+        """A dict of constants."""
+        return repr(value)
+
+    # --- statements ---
+
+    def _emit(self, s: str) -> None:
+        self._lines.append("  " * self._indent + s)
+
+    def source(self, text: str) -> None:
+        """Fixed top-level code, given as source."""
+        self._lines.extend(text.split("\n"))
+
+    def blank(self) -> None:
+        self._lines.append("")
+
+    def comment(self, text: str) -> None:
+        self._emit(f"# {text}")
+
+    def assign(self, targets: Sequence[str], value: str) -> None:
+        self._emit(" = ".join(targets) + " = " + value)
+
+    def expr(self, value: str) -> None:
+        self._emit(value)
+
+    def exprs(self, values: Sequence[str]) -> None:
+        """Several expression statements (kept on one line)."""
+        self._emit("; ".join(values))
+
+    def return_(self, value: Optional[str] = None) -> None:
+        self._emit("return" if value is None else f"return {value}")
+
+    def continue_(self) -> None:
+        self._emit("continue")
+
+    def break_(self) -> None:
+        self._emit("break")
+
+    def pass_(self, comment: Optional[str] = None) -> None:
+        self._emit("pass" if comment is None else f"pass  # {comment}")
+
+    def raise_(self, name: str) -> None:
+        self._emit(f"raise {name}")
+
+    def nonlocal_(self, names: Sequence[str]) -> None:
+        self._emit("nonlocal " + ", ".join(names))
+
+    def mark(self) -> int:
+        return len(self._lines)
+
+    def empty_since(self, mark: int) -> bool:
+        """True if nothing but comments was emitted since `mark`."""
+        return all(line.lstrip().startswith("#") for line in self._lines[mark:])
+
+    # --- compound statements ---
+
+    def _open(self, header: str) -> "TextEmitter":
+        self._emit(header)
+        self._indent += 1
+        return self
+
+    def if_(self, test: str) -> "TextEmitter":
+        return self._open(f"if {test}:")
+
+    def else_(self) -> "TextEmitter":
+        return self._open("else:")
+
+    def while_(self, test: str) -> "TextEmitter":
+        return self._open(f"while {test}:")
+
+    def for_(self, target: str, iter: str) -> "TextEmitter":
+        return self._open(f"for {target} in {iter}:")
+
+    def def_(self, name: str) -> "TextEmitter":
+        return self._open(f"def {name}():")
+
+    def try_(self) -> "TextEmitter":
+        return self._open("try:")
+
+    def except_(self, name: str) -> "TextEmitter":
+        return self._open(f"except {name}:")
+
+    def finally_(self) -> "TextEmitter":
+        return self._open("finally:")
+
+    def __enter__(self) -> "TextEmitter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._indent -= 1
+
+
+_LOAD, _STORE = ast.Load(), ast.Store()
+# Operator nodes carry no position, so one instance of each serves every tree.
+_BINOPS = {"+": ast.Add(), "-": ast.Sub(), "*": ast.Mult(), "/": ast.Div()}
+_CMPOPS = {"==": ast.Eq(), "!=": ast.NotEq(), "<": ast.Lt(), "<=": ast.LtE(), ">": ast.Gt(), ">=": ast.GtE()}
+_UNARY = {"-": ast.USub(), "+": ast.UAdd(), "not": ast.Not()}
+_BOOLOPS = {"and": ast.And(), "or": ast.Or()}
+
+
+@lru_cache(maxsize=None)
+def _parsed(text: str) -> List[ast.stmt]:
+    # Shared between modules: compile() never modifies the tree it is given.
+    return ast.parse(text).body
+
+
+class AstEmitter:
+    """An `ast.Module`, built node by node."""
+
+    def __init__(self) -> None:
+        self._body: List[ast.stmt] = []
+        self._suites: List[List[ast.stmt]] = [self._body]
+        self.at(1)
+
+    def result(self) -> ast.Module:
+        return ast.Module(body=self._body, type_ignores=[])
+
+    def at(self, lineno: int) -> None:
+        # End positions are optional; leaving them out halves the keyword arguments.
+        self._loc = {"lineno": lineno, "col_offset": 0}
+
+    # --- expressions ---
+
+    def const(self, value: Any) -> ast.expr:
+        return ast.Constant(value, **self._loc)
+
+    name_const = const
+
+    def name(self, id: str) -> ast.expr:
+        return ast.Name(id, _LOAD, **self._loc)
+
+    def call(self, func: str, args: Sequence[ast.expr] = (),
+             keywords: Optional[dict] = None) -> ast.expr:
+        kws = [ast.keyword(k, v, **self._loc) for k, v in keywords.items()] if keywords else []
+        return ast.Call(ast.Name(func, _LOAD, **self._loc), list(args), kws, **self._loc)
+
+    def method(self, obj: ast.expr, attr: str, args: Sequence[ast.expr] = ()) -> ast.expr:
+        return ast.Call(ast.Attribute(obj, attr, _LOAD, **self._loc), list(args), [], **self._loc)
+
+    def binop(self, left: ast.expr, op: str, right: ast.expr, paren: bool = True) -> ast.expr:
+        if op in _CMPOPS:
+            return ast.Compare(left, [_CMPOPS[op]], [right], **self._loc)
+        return ast.BinOp(left, _BINOPS[op], right, **self._loc)
+
+    def unary(self, op: str, operand: ast.expr) -> ast.expr:
+        return ast.UnaryOp(_UNARY[op], operand, **self._loc)
+
+    def boolop(self, op: str, values: Sequence[ast.expr], paren: bool = False) -> ast.expr:
+        return ast.BoolOp(_BOOLOPS[op], list(values), **self._loc)
+
+    def not_(self, operand: ast.expr) -> ast.expr:
+        return ast.UnaryOp(_UNARY["not"], operand, **self._loc)
+
+    def list_(self, items: Iterable[ast.expr]) -> ast.expr:
+        return ast.List(list(items), _LOAD, **self._loc)
+
+    def dict_(self, pairs: Iterable[Tuple[ast.expr, ast.expr]]) -> ast.expr:
+        pairs = list(pairs)
+        return ast.Dict([k for k, _ in pairs], [v for _, v in pairs], **self._loc)
+
+    def dict_const(self, value: dict) -> ast.expr:
+        # `dict(zip(keys, values))`: two tuple constants instead of a node per item.
+        pairs = [ast.Constant(tuple(value), **self._loc), ast.Constant(tuple(value.values()), **self._loc)]
+        return self.call("dict", [self.call("zip", pairs)])
+
+    # --- statements ---
+
+    def source(self, text: str) -> None:
+        self._suites[-1].extend(_parsed(text))
+
+    def blank(self) -> None:
+        pass
+
+    def comment(self, text: str) -> None:
+        pass
+
+    def assign(self, targets: Sequence[str], value: ast.expr) -> None:
+        names = [ast.Name(t, _STORE, **self._loc) for t in targets]
+        self._suites[-1].append(ast.Assign(names, value, **self._loc))
+
+    def expr(self, value: ast.expr) -> None:
+        self._suites[-1].append(ast.Expr(value, **self._loc))
+
+    def exprs(self, values: Sequence[ast.expr]) -> None:
+        for value in values:
+            self.expr(value)
+
+    def return_(self, value: Optional[ast.expr] = None) -> None:
+        self._suites[-1].append(ast.Return(value, **self._loc))
+
+    def continue_(self) -> None:
+        self._suites[-1].append(ast.Continue(**self._loc))
+
+    def break_(self) -> None:
+        self._suites[-1].append(ast.Break(**self._loc))
+
+    def pass_(self, comment: Optional[str] = None) -> None:
+        self._suites[-1].append(ast.Pass(**self._loc))
+
+    def raise_(self, name: str) -> None:
+        self._suites[-1].append(ast.Raise(self.name(name), None, **self._loc))
+
+    def nonlocal_(self, names: Sequence[str]) -> None:
+        self._suites[-1].append(ast.Nonlocal(list(names), **self._loc))
+
+    def mark(self) -> int:
+        return len(self._suites[-1])
+
+    def empty_since(self, mark: int) -> bool:
+        return len(self._suites[-1]) == mark
+
+    # --- compound statements ---
+
+    def _open(self, node: ast.stmt, body: List[ast.stmt]) -> "AstEmitter":
+        self._suites[-1].append(node)
+        self._suites.append(body)
+        return self
+
+    def if_(self, test: ast.expr) -> "AstEmitter":
+        node = ast.If(test, [], [], **self._loc)
+        return self._open(node, node.body)
+
+    def else_(self) -> "AstEmitter":
+        self._suites.append(self._suites[-1][-1].orelse)
+        return self
+
+    def while_(self, test: ast.expr) -> "AstEmitter":
+        node = ast.While(test, [], [], **self._loc)
+        return self._open(node, node.body)
+
+    def for_(self, target: str, iter: ast.expr) -> "AstEmitter":
+        node = ast.For(ast.Name(target, _STORE, **self._loc), iter, [], [], **self._loc)
+        return self._open(node, node.body)
+
+    def def_(self, name: str) -> "AstEmitter":
+        args = ast.arguments(posonlyargs=[], args=[], vararg=None, kwonlyargs=[],
+                             kw_defaults=[], kwarg=None, defaults=[])
+        node = ast.FunctionDef(name, args, [], [], None, **self._loc)
+        return self._open(node, node.body)
+
+    def try_(self) -> "AstEmitter":
+        node = ast.Try([], [], [], [], **self._loc)
+        return self._open(node, node.body)
+
+    def except_(self, name: str) -> "AstEmitter":
+        handler = ast.ExceptHandler(self.name(name), None, [], **self._loc)
+        self._suites[-1][-1].handlers.append(handler)
+        self._suites.append(handler.body)
+        return self
+
+    def finally_(self) -> "AstEmitter":
+        self._suites.append(self._suites[-1][-1].finalbody)
+        return self
+
+    def __enter__(self) -> "AstEmitter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._suites.pop()
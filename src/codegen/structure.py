@@ -0,0 +1,257 @@
+"""
+Structured control-flow recovery for table dispatch (`CompileOptions.structured`).
+
+A block ("segment") runs from one dispatch entry to the next. Entries are the
+program start, GOSUB targets and GOSUB return sites (and the lines a
+resumable module is asked to be entered at), plus the target of every GOTO
+that cannot be written as structured Python. Inside a segment these
+shapes are recognised, in source order:
+
+  loop      line h that later lines of the range GOTO back to:
+            `while True:` with the back jumps as `continue`
+  skip      a line ending `IF c THEN GOTO k`, k further on in the range:
+            `if not c:` around the skipped lines
+  if/else   a skip whose skipped lines end with `GOTO j`, j beyond k:
+            `if c:` k..j `else:` the skipped lines
+
+A GOTO to the innermost loop's header or follow line becomes `continue` or
+`break`; any other GOTO leaves through the dispatcher (`return <block>`) and
+makes its target an entry. Since a new entry splits a segment, and so may
+change the shapes found in it, entries are added until emitting every segment
+asks for no new one. Each segment is then single-entry, and every line the
+structured code skips is unreachable.
+
+With `subroutine_functions`, the subroutines found by
+analysis.find_subroutines become Python functions `_sub_<entry>()`, whose
+bodies are emitted the same way. A GOSUB to one is a plain call, RETURN is
+`return` and END raises `_End`. There is no dispatcher to fall back on
+inside a function, so a subroutine with a GOTO that fits no shape stays
+an ordinary GOSUB target, and so do its callers.
+"""
+import warnings
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..analysis import assigned_variables, literal_target, resolve_target, find_subroutines
+from ..analysis.cfg import GOTO, GOSUB, RETURN_SITE
+from ..ast_nodes import Stmt, IfStmt, GotoStmt
+from .emit import TextEmitter
+
+Loop = Tuple[int, int]  # (header line, follow line)
+
+
+class StructuredEmitMixin:
+    """Segment emission for `Transpiler`; see the module docstring."""
+
+    def _goto_sources(self) -> Dict[int, List[int]]:
+        """Map target line -> sorted kept lines with a literal GOTO to it outside FOR bodies."""
+        sources: Dict[int, List[int]] = {}
+
+        def visit(i: int, stmts: List[Stmt]) -> None:
+            for s in stmts:
+                if isinstance(s, GotoStmt):
+                    dest = resolve_target(s.target, self._source_index, i + 1)
+                    if dest is not None:
+                        sources.setdefault(self._entry[dest], []).append(i)
+                elif isinstance(s, IfStmt):
+                    visit(i, [s.then_stmt] + ([s.else_stmt] if s.else_stmt else []))
+
+        for i in self._kept:
+            visit(i, self._program_lines[i].statements)
+        return sources
+
+    def _entry_lines(self, gotos: bool) -> Set[int]:
+        """Kept lines outside subroutine functions that the program start, a
+        GOSUB, a RETURN or (if `gotos`) a GOTO enters."""
+        starts: Set[int] = {self._entry[0]} | self._resume
+        for i in self._kept:
+            if i in self._sub_lines:
+                continue
+            for dest, kind in self._cfg.edges[i]:
+                if kind == RETURN_SITE or (kind == GOSUB and dest not in self._subs) or (
+                        gotos and kind == GOTO):
+                    starts.add(self._entry[dest])
+        starts.discard(len(self._program_lines))
+        return starts
+
+    def _choose_subroutines(self, program) -> None:
+        """Set _subs to the subroutines whose bodies need no dispatcher, and
+        _cfg to the graph in which calls to them return to the next line."""
+        cfg = self._cfg
+        failed: Set[int] = set()
+        while True:
+            self._subs = find_subroutines(program, cfg, self._source_index, exclude=failed)
+            self._cfg = cfg.with_calls(set(self._subs))
+            out, self._out = self._out, TextEmitter()
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                for entry in list(self._subs):
+                    self._sub_failed = False
+                    self._emit_subroutine(entry)
+                    if self._sub_failed:
+                        failed.add(entry)
+            self._out = out
+            self._loop_count = 0
+            if not failed & self._subs.keys():
+                return
+
+    def _emit_subroutine(self, entry: int) -> None:
+        sub = self._subs[entry]
+        out = self._out
+        with out.def_(f"_sub_{entry}"):
+            if self.options.fast_locals:
+                written = assigned_variables(
+                    [s for line in sub.lines for s in self._program_lines[line].statements])
+                if written:
+                    out.nonlocal_([self._local(v) for v in sorted(written)])
+            self._sub, constructs, self._constructs = entry, self._constructs, []
+            mark = out.mark()
+            if self._emit_range(self._entry[entry], sub.lines[-1] + 1):
+                out.raise_("_End")  # ran off the end of the program
+            if out.empty_since(mark):
+                out.pass_()
+            self._sub, self._constructs = None, constructs
+        out.blank()
+
+    def _structure(self) -> List[int]:
+        """Grow the entry set to a fixpoint; return the segment start lines."""
+        starts = self._entry_lines(gotos=False)
+        while True:
+            self._index_blocks(sorted(starts))
+            # Dry run: only the entries it asks for are kept.
+            self._required = set()
+            out, self._out = self._out, TextEmitter()
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                for b in range(len(self._blocks)):
+                    self._emit_segment(b)
+            self._out = out
+            self._loop_count = 0
+            new = self._required - starts
+            if not new:
+                return sorted(starts)
+            starts |= new
+
+    def _single_segment(self) -> bool:
+        """True if the program is one segment that never needs the dispatcher:
+        no GOTO fell back to it and no GOSUB pushes a return point."""
+        return len(self._blocks) == 1 and not self._required and not any(
+            kind == RETURN_SITE for i in self._kept for _, kind in self._cfg.edges[i])
+
+    def _emit_goto(self, dest: int) -> None:
+        """Jump to kept line `dest`: `continue`/`break` if it is structured, else dispatch."""
+        loop = self._constructs[-1] if self._constructs else None
+        if loop is not None and dest == loop[0]:
+            self._out.continue_()
+        elif loop is not None and dest == loop[1]:
+            self._out.break_()
+        elif self._sub is not None:
+            if dest < len(self._program_lines):
+                self._sub_failed = True
+            self._out.raise_("_End")
+        else:
+            if dest < len(self._program_lines):
+                self._required.add(dest)
+            self._emit_jump(self._out.const(self._block_of.get(dest, -1)))
+
+    def _emit_segment(self, b: int) -> None:
+        start = self._blocks[b][0]
+        end = self._blocks[b + 1][0] if b + 1 < len(self._blocks) else len(self._program_lines)
+        k = bisect_left(self._sub_starts, start)
+        if k < len(self._sub_starts):
+            end = min(end, self._sub_starts[k])  # subroutine functions are emitted apart
+        if self._emit_range(start, end):
+            self._emit_jump(self._out.const(b + 1))
+
+    def _emit_suite(self, a: int, b: int, **kwargs) -> bool:
+        """`_emit_range` as the body of a compound statement, with `pass` if it
+        emits no statement."""
+        mark = self._out.mark()
+        falls = self._emit_range(a, b, **kwargs)
+        if self._out.empty_since(mark):
+            self._out.pass_()
+        return falls
+
+    def _literal_goto(self, s: Optional[Stmt]) -> Optional[int]:
+        """Kept line an unconditional literal GOTO to an existing line lands on."""
+        if not isinstance(s, GotoStmt):
+            return None
+        number = literal_target(s.target)
+        if number not in self._source_index:
+            return None
+        return self._entry[self._source_index[number]]
+
+    def _loop_end(self, i: int, b: int) -> Optional[int]:
+        """Last line in [i, b) that GOTOs back to i, or None if i heads no loop."""
+        sources = self._sources.get(i, ())
+        k = bisect_left(sources, b)
+        if k and sources[k - 1] >= i:
+            return sources[k - 1]
+        return None
+
+    def _loop_follow(self, i: int, last: int, b: int) -> int:
+        """Line a loop over [i, last] exits to: the next line if `last` falls through,
+        else the one target beyond the loop (within the range) its GOTOs leave for."""
+        after = self._entry[last + 1]
+        if self._cfg.falls_through(last):
+            return after
+        exits = {
+            dest for dest, sources in self._sources.items() if after <= dest <= b
+            for j in sources if i <= j <= last
+        }
+        return exits.pop() if len(exits) == 1 else after
+
+    def _emit_range(self, a: int, b: int, tail: Optional[int] = None, loop_head: bool = True) -> bool:
+        """Emit the kept lines in [a, b), entered at a; return True if control can
+        run off the end (into b).
+
+        `tail`: a final `GOTO tail` is left out (the caller continues there).
+        `loop_head`: if False, line a is not considered as a loop header (it
+        already is the header of the loop being emitted).
+        """
+        falls = True
+        i = a
+        while i < b:
+            last = self._loop_end(i, b) if (loop_head or i != a) else None
+            if last is not None:
+                follow = self._loop_follow(i, last, b)
+                self._constructs.append((i, follow))
+                with self._out.while_(self._out.const(True)):
+                    if self._emit_suite(i, self._entry[last + 1], loop_head=False):
+                        self._out.break_()
+                self._constructs.pop()
+                i, falls = follow, True
+                continue
+            self._at(i)
+            stmts = self._program_lines[i].statements
+            final = stmts[-1] if stmts else None
+            skip = None
+            if isinstance(final, IfStmt) and final.else_stmt is None:
+                skip = self._literal_goto(final.then_stmt)
+                if skip is not None and not i < skip <= b:
+                    skip = None
+            if skip is not None:
+                for s in stmts[:-1]:
+                    self._stmt(s)
+                cond = self._condition(final)
+                body = self._kept[bisect_left(self._kept, i + 1):bisect_left(self._kept, skip)]
+                join = self._literal_goto(self._program_lines[body[-1]].statements[-1]) if (
+                    body and self._program_lines[body[-1]].statements) else None
+                if join is not None and skip < join <= b:
+                    with self._out.if_(cond):
+                        self._emit_suite(skip, join)
+                    with self._out.else_():
+                        self._emit_suite(self._entry[i + 1], skip, tail=join)
+                    i = join
+                else:
+                    with self._out.if_(self._out.not_(cond)):
+                        self._emit_suite(self._entry[i + 1], skip)
+                    i = skip
+                falls = True
+                continue
+            tail_goto = tail is not None and self._entry[i + 1] >= b and self._literal_goto(final) == tail
+            for s in stmts[:-1] if tail_goto else stmts:
+                self._stmt(s)
+            falls = tail_goto or self._cfg.falls_through(i)
+            i = self._entry[i + 1]
+        return falls
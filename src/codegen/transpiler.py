@@ -1,8 +1,18 @@
 """
-Transpiles BASIC AST to Python source code for execution.
+Transpiles BASIC AST to Python source code (or a Python AST) for execution.
 """
-from typing import List, Dict, Any
+import ast
+import warnings
+from typing import List, Dict, Any, Iterable, Optional
 
+from ..options import CompileOptions
+from ..analysis import (
+    build_line_index, find_jump_targets, literal_target, assigned_variables, program_variables,
+    TypeInfo, VType, infer_types, build_cfg, drop_unreachable_statements, is_empty_line, resolve_target,
+    Subroutine,
+)
+from .emit import TextEmitter, AstEmitter
+from .structure import StructuredEmitMixin
 from ..ast_nodes import (
     Program, Line, Stmt, Expr,
     PrintStmt, LetStmt, InputStmt, IfStmt, GotoStmt, GosubStmt, ReturnStmt,
@@ -11,172 +21,577 @@ from ..ast_nodes import (
 )
 
 
-class Transpiler:
-    def __init__(self) -> None:
-        self._indent = 0
-        self._lines: List[str] = []
+def _const_int(e: Expr) -> Optional[int]:
+    """Value of an int literal, optionally negated; None for anything else."""
+    sign = 1
+    while isinstance(e, UnaryOpExpr):
+        sign = -sign if e.op == "-" else sign
+        e = e.operand
+    if isinstance(e, NumberExpr) and type(e.value) is int:
+        return sign * e.value
+    return None
+
+
+class TranspileError(Exception):
+    pass
+
+
+class UndefinedLineWarning(UserWarning):
+    """A literal GOTO/GOSUB names a line that does not exist; it falls through."""
+
+
+def undefined_target(kind: str, number: Any, line: Line, index: int, strict: bool = False) -> None:
+    """Report that the `kind` ("GOTO"/"GOSUB") in `line`, at line index `index`,
+    names line `number`, which does not exist: an UndefinedLineWarning, or a
+    TranspileError if `strict`. Every engine reports it the same way."""
+    where = f"line {line.number}" if line.number is not None else f"statement line {index + 1}"
+    message = f"{kind} to undefined line {number} in {where}"
+    if strict:
+        raise TranspileError(message)
+    warnings.warn(message, UndefinedLineWarning)
+
+
+class Transpiler(StructuredEmitMixin):
+    """BASIC AST -> Python.
+
+    resumable: the generated module continues a run instead of starting one.
+    Before running it the caller sets `_vars` to the variables so far,
+    `_entry_pc` to the block to start at and `_entry_stack` to the GOSUB
+    return points (block indices); `entries` maps line indices to blocks.
+
+    resume_at: line indices that must be block starts, so that a resumable
+    module can be entered there (lines in subroutine functions never are).
+
+    types: the types to compile with instead of those inferred from the
+    program transpiled. A piece of a program (see TieredEngine) needs the
+    whole program's, as its own would take the variables it does not set
+    for ints.
+    """
+    def __init__(self, options: Optional[CompileOptions] = None, resumable: bool = False,
+                 resume_at: Iterable[int] = (), types: Optional[TypeInfo] = None) -> None:
+        self.options = options or CompileOptions()
+        self.resumable = resumable
+        self.resume_at = set(resume_at)
+        self.types = types
+        self._out = TextEmitter()  # where the code goes: TextEmitter or AstEmitter
+        self._line = 0  # index of the source line being emitted
         self._line_index: Dict[int, int] = {}  # line number -> block index
-        self._blocks: List[tuple] = []  # (line_no, statements)
+        self._source_index: Dict[int, int] = {}  # line number -> line index
+        self._program_lines: List[Line] = []
+        self._blocks: List[List[int]] = []  # line indices making up each block
+        self._block_of: Dict[int, int] = {}  # line index -> block it starts
+        self._fused = False
+        self._cfg = None  # control-flow graph, when eliminate_dead_code or structured is set
+        self._entry: List[int] = []  # line index -> first kept line at or after it
+        self._kept: List[int] = []  # line indices that are emitted, in order
+        self._structured = False  # structured is set and every jump target is literal
+        self._sources: Dict[int, List[int]] = {}  # structured: line -> lines GOTO-ing it
+        self._constructs: List[Optional[tuple]] = []  # structured: enclosing loops, None for FOR
+        self._required: set = set()  # structured: lines a dispatcher jump needs as entries
+        self._subs: Dict[int, Subroutine] = {}  # entry line -> subroutine emitted as a function
+        self._sub_lines: set = set()  # lines inside those functions
+        self._sub_starts: List[int] = []  # their entry lines, sorted
+        self._sub: Optional[int] = None  # entry of the subroutine being emitted
+        self._sub_failed = False  # its body needed the dispatcher
+        self._variables: List[str] = []  # every BASIC variable, when fast_locals is set
+        self._types: Optional[TypeInfo] = None  # set when types are needed
+        self._loop_count = 0  # FOR loops emitted so far, for unique temporaries
+
+    def _at(self, i: int) -> None:
+        """Emit the code that follows for line index i."""
+        self._line = i
+        line = self._program_lines[i]
+        self._out.at(line.source_line or i + 1)
+        if self.options.profile_lines:
+            key = line.number if line.number is not None else line.source_line or i + 1
+            self._out.expr(self._out.call("_line", [self._out.const(key)]))
+
+    def _emit_jump(self, target) -> None:
+        """Leave the current block and continue at block index `target`."""
+        if self.options.dispatch == "table":
+            self._out.return_(target)
+        else:
+            self._out.assign(["_pc"], target)
+            self._out.continue_()
+
+    def _next_pc(self):
+        """Block index of the line after the current one (GOSUB return point)."""
+        return self._out.const(self._block_of[self._line + 1])
+
+    def _jump_target(self, kind: str, target: Expr):
+        """Block index a GOTO/GOSUB lands on: a constant for literal targets."""
+        number = literal_target(target)
+        if number is None:
+            return self._out.method(self._out.name("_line_index"), "get",
+                                    [self._num(target), self._next_pc()])
+        # With fused blocks both possible landing lines are guaranteed block starts.
+        return self._out.const(self._block_of[self._jump_line(kind, number)])
+
+    def _jump_line(self, kind: str, number: Any) -> int:
+        """Line index a literal jump lands on: a missing line falls through to the
+        next one, as the runtime lookup does."""
+        if number not in self._source_index:
+            undefined_target(kind, number, self._program_lines[self._line], self._line,
+                             self.options.strict_jumps)
+        return self._source_index.get(number, self._line + 1)
+
+    @staticmethod
+    def _local(name: str) -> str:
+        """Python local for BASIC variable `name`.
 
-    def _emit(self, s: str = "") -> None:
-        if s:
-            self._lines.append("  " * self._indent + s)
+        Non-ASCII names are spelled out as code points: Python would NFKC-normalise
+        them and could merge names BASIC keeps apart.
+        """
+        if name.isascii():
+            return name
+        return "_u" + "_".join(f"{ord(c):x}" for c in name)
+
+    def _var(self, name: str):
+        if self.options.fast_locals:
+            return self._out.name(self._local(name))
+        return self._out.call("_v", [self._out.name_const(name)])
+
+    def _assign(self, name: str, value) -> None:
+        if self.options.fast_locals:
+            self._out.assign([self._local(name)], value)
         else:
-            self._lines.append("")
+            self._out.expr(self._out.call("_set", [self._out.name_const(name), value]))
+
+    def _num(self, e: Expr):
+        """`_num(e)`, or just `e` when types prove it is never a float."""
+        if self.options.specialize_types and self._types.is_integral(e):
+            return self._expr(e)
+        return self._out.call("_num", [self._expr(e)])
 
-    def _expr(self, e: Expr) -> str:
-        if isinstance(e, NumberExpr):
-            return repr(e.value)
-        if isinstance(e, StringExpr):
-            return repr(e.value)
+    def _expr(self, e: Expr):
+        out = self._out
+        if isinstance(e, (NumberExpr, StringExpr)):
+            return out.const(e.value)
         if isinstance(e, VarExpr):
-            return f'_v("{e.name}")'
+            return self._var(e.name)
         if isinstance(e, UnaryOpExpr):
-            return f"({e.op}{self._expr(e.operand)})"
+            return out.unary(e.op, self._expr(e.operand))
         if isinstance(e, BinaryOpExpr):
-            if e.op in ("<", "<=", ">", ">=", "=", "<>", "+", "-", "*", "/"):
-                right = self._expr(e.right)
-                if e.op == "=":
-                    op = "=="
-                elif e.op == "<>":
-                    op = "!="
-                else:
-                    op = e.op
-                return f"({self._expr(e.left)} {op} {right})"
-            return f"({self._expr(e.left)} {e.op} {self._expr(e.right)})"
+            op = "==" if e.op == "=" else "!=" if e.op == "<>" else e.op
+            return out.binop(self._expr(e.left), op, self._expr(e.right))
         if isinstance(e, BuiltinCallExpr):
             if e.name == "RND" and len(e.args) == 1:
-                return f"(int({self._expr(e.args[0])}) and __import__('random').randrange(0, {self._expr(e.args[0])}) or 0)"
+                randrange = out.method(out.call("__import__", [out.const("random")]), "randrange",
+                                       [out.const(0), self._expr(e.args[0])])
+                nonzero = out.boolop("and", [out.call("int", [self._expr(e.args[0])]), randrange])
+                return out.boolop("or", [nonzero, out.const(0)], paren=True)
             if e.name == "ABS" and len(e.args) == 1:
-                return f"abs({self._expr(e.args[0])})"
-            return f'_builtin("{e.name}", [{", ".join(self._expr(a) for a in e.args)}])'
+                return out.call("abs", [self._expr(e.args[0])])
+            return out.call("_builtin", [out.name_const(e.name), out.list_(self._expr(a) for a in e.args)])
         raise ValueError(f"Unknown expr: {type(e)}")
 
     def _stmt(self, s: Stmt, need_break: bool = True) -> None:
         """Emit code for one statement. If need_break, we're in a block and may break out after."""
+        out = self._out
         if isinstance(s, PrintStmt):
-            parts = []
-            for item in s.items:
-                if isinstance(item, StringExpr):
-                    parts.append(f"print({repr(item.value)}, end='')")
-                else:
-                    parts.append(f"print({self._expr(item)}, end='')")
-            self._emit("; ".join(parts) + "; print()")
+            no_newline = {"end": out.const("")}
+            out.exprs([out.call("print", [self._expr(item)], no_newline) for item in s.items]
+                      + [out.call("print")])
             return
         if isinstance(s, LetStmt):
-            self._emit(f'_set("{s.name}", {self._expr(s.value)})')
+            self._assign(s.name, self._expr(s.value))
             return
         if isinstance(s, InputStmt):
             for v in s.variables:
-                self._emit(f'_set("{v}", _num_input())')
+                self._assign(v, out.call("_num_input"))
             return
         if isinstance(s, IfStmt):
-            op = "==" if s.relop == "=" else "!=" if s.relop == "<>" else s.relop
-            cond = f"({self._expr(s.left)} {op} {self._expr(s.right)})"
-            self._emit(f"if {cond}:")
-            self._indent += 1
-            self._stmt(s.then_stmt, need_break=False)
-            self._indent -= 1
+            with out.if_(self._condition(s)):
+                self._stmt(s.then_stmt, need_break=False)
             if s.else_stmt:
-                self._emit("else:")
-                self._indent += 1
-                self._stmt(s.else_stmt, need_break=False)
-                self._indent -= 1
+                with out.else_():
+                    self._stmt(s.else_stmt, need_break=False)
             return
         if isinstance(s, GotoStmt):
-            self._emit("_pc = _line_index.get(_num(" + self._expr(s.target) + "), _pc + 1)")
-            self._emit("continue")
+            if self._structured or self._sub is not None:
+                self._emit_goto(self._entry[self._jump_line("GOTO", literal_target(s.target))])
+            else:
+                self._emit_jump(self._jump_target("GOTO", s.target))
             return
         if isinstance(s, GosubStmt):
-            self._emit("_gosub_stack.append(_pc + 1)")
-            self._emit("_pc = _line_index.get(_num(" + self._expr(s.target) + "), _pc + 1)")
-            self._emit("continue")
+            dest = resolve_target(s.target, self._source_index, self._line + 1)
+            if dest in self._subs:
+                out.expr(out.call(f"_sub_{dest}"))
+                return
+            out.expr(out.method(out.name("_gosub_stack"), "append", [self._next_pc()]))
+            self._emit_jump(self._jump_target("GOSUB", s.target))
             return
         if isinstance(s, ReturnStmt):
-            self._emit("_pc = _gosub_stack.pop()")
-            self._emit("continue")
+            if self._sub is not None:
+                out.return_()
+                return
+            self._emit_jump(out.method(out.name("_gosub_stack"), "pop"))
             return
         if isinstance(s, ForStmt):
-            step_val = self._expr(s.step) if s.step else "1"
-            self._emit(f"__start = _num({self._expr(s.start)})")
-            self._emit(f"__end = _num({self._expr(s.end)})")
-            self._emit(f"__step = _num({step_val})")
-            self._emit(f"__i = __start")
-            self._emit("while (__step > 0 and __i <= __end) or (__step < 0 and __i >= __end):")
-            self._indent += 1
-            self._emit(f'_set("{s.var}", __i)')
-            for b in s.body:
-                self._stmt(b, need_break=False)
-            self._emit("__i = __i + __step")
-            self._indent -= 1
+            self._emit_for(s)
             return
         if isinstance(s, NextStmt):
-            self._emit("pass  # NEXT")
+            out.pass_("NEXT")
             return
         if isinstance(s, EndStmt):
-            self._emit("_pc = _blocks")
-            self._emit("continue")
+            if self._sub is not None:
+                out.raise_("_End")
+                return
+            self._emit_jump(out.name("_blocks"))
             return
         if isinstance(s, RemStmt):
-            self._emit(f"# REM {s.text}")
+            # Nested in IF/FOR a bare comment would leave the block without a body.
+            if need_break:
+                out.comment(f"REM {s.text}")
+            else:
+                out.pass_(f"REM {s.text}")
             return
         raise ValueError(f"Unknown stmt: {type(s)}")
 
-    def _flatten_and_index(self, program: Program) -> None:
-        """Build _blocks and _line_index from program."""
-        for line in program.lines:
-            line_no = line.number
-            idx = len(self._blocks)
-            if line_no is not None:
-                self._line_index[line_no] = idx
+    def _condition(self, s: IfStmt):
+        op = "==" if s.relop == "=" else "!=" if s.relop == "<>" else s.relop
+        return self._out.binop(self._expr(s.left), op, self._expr(s.right))
+
+    def _emit_for(self, s: ForStmt) -> None:
+        """FOR ... NEXT as a `range()` loop when provably equivalent, else a while loop.
+
+        Each loop gets its own `_forN_*` temporaries so nested loops don't clobber
+        each other. `range()` needs int start/end, a nonzero constant int step,
+        and a body that never assigns the loop variable.
+        """
+        out = self._out
+        self._loop_count += 1
+        tmp = f"_for{self._loop_count}"
+        step = _const_int(s.step) if s.step is not None else 1
+        if (self.options.range_loops and step
+                and self._types.of(s.start) == VType.INT and self._types.of(s.end) == VType.INT
+                and s.var not in assigned_variables(s.body)):
+            bound = _const_int(s.end)
+            if bound is not None:
+                stop = out.const(bound + (1 if step > 0 else -1))
             else:
-                self._line_index[idx] = idx  # implicit line number = block index
-            self._blocks.append((line_no, line.statements))
+                stop = out.binop(self._expr(s.end), "+" if step > 0 else "-", out.const(1), paren=False)
+            args = [self._expr(s.start), stop] + ([out.const(step)] if step != 1 else [])
+            target = self._local(s.var) if self.options.fast_locals else f"{tmp}_i"
+            with out.for_(target, out.call("range", args)):
+                if not self.options.fast_locals:
+                    self._assign(s.var, out.name(target))
+                self._emit_for_body(s.body)
+                if not s.body:
+                    out.pass_()
+            return
+        i, end = out.name(f"{tmp}_i"), out.name(f"{tmp}_end")
+        out.assign([f"{tmp}_i"], self._num(s.start))
+        out.assign([f"{tmp}_end"], self._num(s.end))
+        if step is None:
+            out.assign([f"{tmp}_step"], self._num(s.step))
+            step_code = out.name(f"{tmp}_step")
+            zero = out.const(0)
+            cond = out.boolop("or", [
+                out.boolop("and", [out.binop(step_code, ">", zero, paren=False),
+                                   out.binop(i, "<=", end, paren=False)], paren=True),
+                out.boolop("and", [out.binop(step_code, "<", zero, paren=False),
+                                   out.binop(i, ">=", end, paren=False)], paren=True),
+            ])
+        elif step:
+            cond = out.binop(i, "<=" if step > 0 else ">=", end, paren=False)
+            step_code = out.const(step)
+        else:
+            cond = out.const(False)  # STEP 0: neither direction applies, the body never runs
+            step_code = out.const(0)
+        with out.while_(cond):
+            self._assign(s.var, i)
+            self._emit_for_body(s.body)
+            out.assign([f"{tmp}_i"], out.binop(i, "+", step_code, paren=False))
 
-    def transpile(self, program: Program) -> str:
-        self._lines = []
-        self._line_index = {}
-        self._blocks = []
-        self._flatten_and_index(program)
+    def _emit_for_body(self, body: List[Stmt]) -> None:
+        # `continue`/`break` would act on the Python loop, so no GOTO inside is structured.
+        self._constructs.append(None)
+        for b in body:
+            self._stmt(b, need_break=False)
+        self._constructs.pop()
+
+    def _flatten_and_index(self, program: Program) -> None:
+        """Build _blocks and _line_index from program.
+
+        Each line is its own block unless fuse_blocks is set, in which case a
+        block runs from one jump target to the next. Any computed GOTO/GOSUB
+        target disables fusion, since then every line may be entered.
+
+        With eliminate_dead_code, lines the control-flow graph cannot reach and
+        lines that do nothing (only REMs) are left out; a jump to a dropped
+        line lands on the next line that is kept.
+
+        With structured (and no computed jump), blocks are the segments chosen
+        by `_structure`, which supersedes fusion.
+
+        With subroutine_functions, the lines of subroutines compiled as
+        functions belong to no block, and unreachable lines (the only ones
+        that could jump into such a function) are left out.
+        """
+        self._program_lines = program.lines
+        n = len(program.lines)
+        self._source_index = build_line_index(program)
+        self._cfg = None
+        keep = list(range(n))
+        if self.options.eliminate_dead_code or self.options.structured or self.options.subroutine_functions:
+            self._cfg = build_cfg(program, self._source_index)
+        if self.options.eliminate_dead_code:
+            live = self._cfg.reachable()
+            keep = [i for i in keep if i in live and not is_empty_line(program.lines[i].statements)]
+        elif self.options.subroutine_functions:
+            live = self._cfg.reachable()
+            keep = [i for i in keep if i in live]
+        # entry[j]: the first kept line at or after line j (n = past the end)
+        entry = [n] * (n + 1)
+        kept = set(keep)
+        for j in range(n - 1, -1, -1):
+            entry[j] = j if j in kept else entry[j + 1]
+        self._entry, self._kept = entry, keep
+        self._resume = {entry[j] for j in self.resume_at if j < n} - {n}
+        self._subs = {}
+        self._structured = self.options.structured and not self._cfg.computed
+        if self._structured or (self.options.subroutine_functions and not self._cfg.computed):
+            self._sources = self._goto_sources()
+        if self.options.subroutine_functions and not self._cfg.computed:
+            self._choose_subroutines(program)
+        self._sub_lines = {i for sub in self._subs.values() for i in sub.lines}
+        self._sub_starts = sorted(self._subs)
+        self._resume -= self._sub_lines
+        if self._structured:
+            self._index_blocks(self._structure())
+            return
+        starts = [i for i in keep if i not in self._sub_lines]
+        if self.options.fuse_blocks and self._subs:
+            starts = sorted(self._entry_lines(gotos=True))
+            self._fused = True
+        elif self.options.fuse_blocks:
+            jumps = find_jump_targets(program, self._source_index)
+            if not jumps.computed:
+                starts = sorted({entry[t] for t in jumps.targets} - {n} | self._resume)
+                self._fused = True
+        self._index_blocks(starts)
 
-        # Emit Python preamble: variables, line index, blocks as list of (line_no, list of stmt executors)
-        self._lines.append("def _v(name):")
-        self._lines.append("  return _vars.get(name, 0)")
-        self._lines.append("")
-        self._lines.append("def _set(name, value):")
-        self._lines.append("  _vars[name] = value")
-        self._lines.append("")
-        self._lines.append("def _num(x):")
-        self._lines.append("  return int(x) if isinstance(x, float) and x == int(x) else x")
-        self._lines.append("")
-        self._lines.append("def _num_input():")
-        self._lines.append("  s = input().strip()")
-        self._lines.append("  return int(s) if '.' not in s else float(s)")
-        self._lines.append("")
-        self._lines.append("_vars = {}")
-        self._lines.append("_line_index = " + repr(self._line_index))
-        self._lines.append("_gosub_stack = []")
-        self._lines.append("_pc = 0")
-        self._lines.append("")
-        blocks = self._blocks
-        self._lines.append("_blocks = " + str(len(blocks)))
-        self._lines.append("")
-        self._lines.append("while _pc < _blocks:")
-
-        self._indent = 1
-        for i, (line_no, stmts) in enumerate(blocks):
-            self._emit(f"if _pc == {i}:")
-            self._indent += 1
-            for s in stmts:
+    def _index_blocks(self, starts: List[int]) -> None:
+        """Set _blocks, _block_of and _line_index for blocks beginning at kept lines `starts`."""
+        n = len(self._program_lines)
+        entry = self._entry
+        start_block = {start: b for b, start in enumerate(starts)}
+        start_block[n] = len(starts)
+        self._block_of = {j: start_block[entry[j]] for j in range(n + 1) if entry[j] in start_block}
+        self._blocks = [[] for _ in starts]
+        b = -1
+        for line in self._kept:
+            if line in self._sub_lines:
+                continue
+            if line in start_block:
+                b = start_block[line]
+            self._blocks[b].append(line)
+        self._line_index = {
+            key: self._block_of[i] for key, i in self._source_index.items() if i in self._block_of
+        }
+
+    def _emit_preamble(self) -> None:
+        # Emit Python preamble: runtime helpers, variables, line index, gosub stack
+        out = self._out
+        if not self.options.fast_locals:
+            out.source(_VARS_HELPERS)
+        out.source(_NUM_HELPERS)
+        if self._subs:
+            out.source(_END_EXCEPTION)
+        if self.options.dispatch == "table":
+            out.source(_DISPATCH_HELPER)
+        if self.options.profile_lines:
+            out.source(_PROFILE_HELPER)
+        if not self.resumable:
+            out.assign(["_vars"], out.dict_(()))
+        out.assign(["_line_index"], out.dict_const(self._line_index))
+        out.assign(["_blocks"], out.const(len(self._blocks)))
+        out.blank()
+
+    def _emit_block_body(self, i: int) -> None:
+        """Emit the statements of block i followed by the jump to block i+1."""
+        if self._structured:
+            self._emit_segment(i)
+            return
+        for line in self._blocks[i]:
+            self._at(line)
+            for s in self._program_lines[line].statements:
                 self._stmt(s)
-            self._emit("_pc = " + str(i + 1))
-            self._emit("continue")
-            self._indent -= 1
-        self._indent = 0
+        if self._cfg is None or self._cfg.falls_through(self._blocks[i][-1]):
+            self._emit_jump(self._out.const(i + 1))
+
+    def _emit_chain_dispatch(self) -> None:
+        """One `if _pc == i:` test per block: O(blocks) per dispatch."""
+        out = self._out
+        pc = out.name("_pc")
+        with out.while_(out.binop(pc, "<", out.name("_blocks"), paren=False)):
+            for i in range(len(self._blocks)):
+                with out.if_(out.binop(pc, "==", out.const(i), paren=False)):
+                    self._emit_block_body(i)
+            if not self._blocks:
+                out.pass_()  # dead-code elimination left nothing to run
+
+    def _emit_table_dispatch(self) -> None:
+        """Each block is a function returning the next block index; dispatch indexes a list."""
+        out = self._out
+        for i in range(len(self._blocks)):
+            with out.def_(f"_block_{i}"):
+                if self.options.fast_locals:
+                    written = assigned_variables(
+                        [s for line in self._blocks[i] for s in self._program_lines[line].statements])
+                    if written:
+                        out.nonlocal_([self._local(v) for v in sorted(written)])
+                self._emit_block_body(i)
+            out.blank()
+        out.assign(["_table"], out.list_(out.name(f"_block_{i}") for i in range(len(self._blocks))))
+        out.assign(["_pc"], out.call("_dispatch", [out.name("_table"), out.name("_pc")]))
+
+    def _emit_dispatch(self) -> None:
+        out = self._out
+        out.assign(["_gosub_stack"], out.name("_entry_stack") if self.resumable else out.list_(()))
+        if not self._subs:
+            self._emit_run()
+            return
+        for entry in self._sub_starts:
+            self._emit_subroutine(entry)
+        with out.try_():
+            self._emit_run()
+        with out.except_("_End"):
+            out.pass_()
+
+    def _emit_run(self) -> None:
+        if self.options.fast_locals and self._structured and self._single_segment() and not self.resumable:
+            # Fully structured: the one segment runs inline in `_main`, and
+            # leaving it (`return 1`) leaves the program.
+            self._emit_segment(0)
+            return
+        self._out.assign(["_pc"], self._out.name("_entry_pc") if self.resumable else self._out.const(0))
+        if self.options.dispatch == "table":
+            self._emit_table_dispatch()
+        else:
+            self._emit_chain_dispatch()
+
+    def _emit_main_function(self) -> None:
+        """Run the program inside `_main()` so BASIC variables are Python locals.
+
+        Every variable starts at 0 (the BASIC default), or when resumable at
+        its value in `_vars`; `_vars` receives a snapshot of them when the
+        program stops, however it stops.
+        """
+        out = self._out
+        with out.def_("_main"):
+            if self.resumable:
+                for v in self._variables:
+                    out.assign([self._local(v)], out.method(out.name("_vars"), "get",
+                                                            [out.const(v), out.const(0)]))
+            elif self._variables:
+                out.assign([self._local(v) for v in self._variables], out.const(0))
+            with out.try_():
+                self._emit_dispatch()
+            with out.finally_():
+                snapshot = out.dict_((out.const(v), out.name(self._local(v))) for v in self._variables)
+                out.expr(out.method(out.name("_vars"), "update", [snapshot]))
+        out.blank()
+        out.expr(out.call("_main"))
+
+    def _generate(self, program: Program, out):
+        # Statements after a GOTO/GOSUB/RETURN/END never run, and the CFG that
+        # places blocks has no edges for them: jumps there would land nowhere.
+        program = drop_unreachable_statements(program)
+        self._out = out
+        self._fused = False
+        self._constructs = []
+        self._required = set()
+        self._sub = None
+        self._variables = program_variables(program) if self.options.fast_locals else []
+        self._loop_count = 0
+        self._types = None
+        if self.options.specialize_types or self.options.range_loops:
+            self._types = self.types if self.types is not None else infer_types(program)
+        self._flatten_and_index(program)
+
+        self._emit_preamble()
+        if self.options.fast_locals:
+            self._emit_main_function()
+        else:
+            self._emit_dispatch()
+        if self.options.profile_lines:
+            out.expr(out.call("_line", [out.const(None)]))  # charge the last line run
+        return out.result()
+
+    def transpile(self, program: Program) -> str:
+        return self._generate(program, TextEmitter())
+
+    def transpile_ast(self, program: Program) -> ast.Module:
+        """Like `transpile`, as an `ast.Module` whose line numbers are BASIC source lines."""
+        return self._generate(program, AstEmitter())
 
-        return "\n".join(self._lines)
+    @property
+    def blocks(self) -> int:
+        """Number of dispatch blocks in the program last transpiled."""
+        return len(self._blocks)
 
+    @property
+    def entries(self) -> Dict[int, int]:
+        """Line index -> block index, for the lines the program last transpiled
+        can be entered at (line count -> block count: the program has ended)."""
+        return dict(self._block_of)
 
-def transpile(program: Program) -> str:
+
+_VARS_HELPERS = """def _v(name):
+  return _vars.get(name, 0)
+
+def _set(name, value):
+  _vars[name] = value
+"""
+
+_NUM_HELPERS = """def _num(x):
+  return int(x) if isinstance(x, float) and x == int(x) else x
+
+def _num_input():
+  s = input().strip()
+  return int(s) if '.' not in s else float(s)
+"""
+
+_END_EXCEPTION = """class _End(Exception):
+  pass  # END inside a subroutine function
+"""
+
+_DISPATCH_HELPER = """def _dispatch(table, pc):
+  n = len(table)
+  while pc < n:
+    pc = table[pc]()
+  return pc
+"""
+
+_PROFILE_HELPER = """from time import perf_counter as _clock
+
+_line_profile = {}  # line -> [times run, seconds spent in it]
+_line_last = [None, 0.0]  # entry of the line running, when it started
+
+def _line(n):
+  now = _clock()
+  last = _line_last[0]
+  if last is not None:
+    last[1] += now - _line_last[1]
+  if n is None:
+    _line_last[0] = None
+    return
+  entry = _line_profile.get(n)
+  if entry is None:
+    entry = _line_profile[n] = [0, 0.0]
+  entry[0] += 1
+  _line_last[0] = entry
+  _line_last[1] = _clock()  # leave this function's own time out
+"""
+
+
+def transpile(program: Program, options: Optional[CompileOptions] = None) -> str:
     """Convert a BASIC Program AST to Python source code."""
-    return Transpiler().transpile(program)
+    return Transpiler(options).transpile(program)
+
+
+def transpile_ast(program: Program, options: Optional[CompileOptions] = None) -> ast.Module:
+    """Convert a BASIC Program AST to a Python `ast.Module` (see Transpiler.transpile_ast)."""
+    return Transpiler(options).transpile_ast(program)
@@ -0,0 +1,163 @@
+"""
+A tree-walking interpreter: runs a parsed program without generating Python.
+
+It starts at once, where the transpiler pays for code generation and
+`compile()` before the first line runs, but each line then runs several
+times slower. It is the low tier of the tiered engine (src/tiered.py).
+
+Behaviour follows the generated code with table dispatch (src/runtime.py
+holds the shared helpers): the same values, output and exceptions, and a
+GOTO out of a FOR body leaves the loop. The closure engine and the bytecode
+VM behave as this one does.
+"""
+from typing import Any, Dict, List, Optional, TextIO
+
+from .analysis import build_line_index
+from .ast_nodes import (
+    Program, Stmt, Expr,
+    PrintStmt, LetStmt, InputStmt, IfStmt, GotoStmt, GosubStmt, ReturnStmt,
+    ForStmt, NextStmt, EndStmt, RemStmt,
+    NumberExpr, StringExpr, VarExpr, BinaryOpExpr, UnaryOpExpr, BuiltinCallExpr,
+)
+from .options import CompileOptions
+from .runtime import BINARY_OPS, UNARY_OPS, builtin, io_builtins, link_jumps, num, num_input, writer
+
+
+class Interpreter:
+    """Runs `program` with `stdin`/`stdout` as run_source does.
+
+    Statements return None to go on, or the index of the line to continue
+    at (the line count ends the program).
+    """
+    def __init__(self, program: Program, stdin: TextIO = None, stdout: TextIO = None,
+                 options: Optional[CompileOptions] = None) -> None:
+        self.options = options or CompileOptions()
+        self.program = program
+        self.lines: List[List[Stmt]] = [line.statements for line in program.lines]
+        self.line_index = build_line_index(program)
+        self.vars: Dict[str, Any] = {}
+        self.stack: List[int] = []  # GOSUB return points, as line indices
+        self.io = io_builtins(stdin, stdout)
+        self._write = writer(stdout)
+        self._line = 0  # index of the line running
+        # id(GOTO/GOSUB) -> line index, for literal targets
+        self._targets = link_jumps(program, self.line_index, self.options.strict_jumps)
+        self._statements = {
+            PrintStmt: self._print, LetStmt: self._let, InputStmt: self._input, IfStmt: self._if,
+            GotoStmt: self._goto, GosubStmt: self._gosub, ReturnStmt: self._return,
+            ForStmt: self._for, NextStmt: self._nothing, EndStmt: self._end, RemStmt: self._nothing,
+        }
+
+    def run(self) -> Dict[str, Any]:
+        """Run the program from its first line; return its variables."""
+        self._run(0)
+        return self.vars
+
+    def _run(self, pc: int) -> None:
+        lines, execute = self.lines, self._execute
+        n = len(lines)
+        while pc < n:
+            self._line = pc
+            after = pc + 1
+            for s in lines[pc]:
+                target = execute(s)
+                if target is not None:
+                    after = target
+                    break
+            pc = after
+
+    def _execute(self, s: Stmt) -> Optional[int]:
+        return self._statements[type(s)](s)
+
+    def eval(self, e: Expr) -> Any:
+        t = type(e)
+        if t is NumberExpr or t is StringExpr:
+            return e.value
+        if t is VarExpr:
+            return self.vars.get(e.name, 0)
+        if t is BinaryOpExpr:
+            return BINARY_OPS[e.op](self.eval(e.left), self.eval(e.right))
+        if t is UnaryOpExpr:
+            return UNARY_OPS[e.op](self.eval(e.operand))
+        if t is BuiltinCallExpr:
+            return builtin(e.name, [self.eval(a) for a in e.args])
+        raise ValueError(f"Unknown expr: {t}")
+
+    # --- statements ---
+
+    def _print(self, s: PrintStmt) -> None:
+        for item in s.items:
+            self._write(str(self.eval(item)))
+        self._write("\n")
+
+    def _let(self, s: LetStmt) -> None:
+        self.vars[s.name] = self.eval(s.value)
+
+    def _input(self, s: InputStmt) -> None:
+        for v in s.variables:
+            self.vars[v] = num_input(self.io["input"])
+
+    def _if(self, s: IfStmt) -> Optional[int]:
+        if BINARY_OPS[s.relop](self.eval(s.left), self.eval(s.right)):
+            return self._execute(s.then_stmt)
+        if s.else_stmt is not None:
+            return self._execute(s.else_stmt)
+        return None
+
+    def _jump(self, s) -> int:
+        target = self._targets.get(id(s))
+        if target is None:
+            target = self.line_index.get(num(self.eval(s.target)), self._line + 1)
+        return target
+
+    def _goto(self, s: GotoStmt) -> int:
+        return self._jump(s)
+
+    def _gosub(self, s: GosubStmt) -> int:
+        target = self._jump(s)
+        self.stack.append(self._line + 1)
+        return target
+
+    def _return(self, s: ReturnStmt) -> int:
+        return self.stack.pop()
+
+    def _end(self, s: EndStmt) -> int:
+        return len(self.lines)
+
+    def _nothing(self, s: Stmt) -> None:
+        return None
+
+    def _for(self, s: ForStmt) -> Optional[int]:
+        i = num(self.eval(s.start))
+        end = num(self.eval(s.end))
+        step = num(self.eval(s.step)) if s.step is not None else 1
+        execute, variables, body = self._execute, self.vars, s.body
+        hot = self._loop_hot_at(s)
+        count = 0
+        while (step > 0 and i <= end) or (step < 0 and i >= end):
+            count += 1
+            if count == hot and self._loop_hot(s, i, end, step):
+                return None
+            variables[s.var] = i
+            for b in body:
+                target = execute(b)
+                if target is not None:
+                    self._loop_ran(s, count)
+                    return target
+            i = i + step
+        self._loop_ran(s, count)
+        return None
+
+    # --- hooks for the tiered engine ---
+
+    def _loop_hot_at(self, s: ForStmt) -> int:
+        """The iteration of this run of `s` to call _loop_hot at; 0: never."""
+        return 0
+
+    def _loop_hot(self, s: ForStmt, i, end, step) -> bool:
+        """Called as a FOR loop starts iteration _loop_hot_at(s) with counter `i`;
+        True if it ran the rest of the loop itself."""
+        return False
+
+    def _loop_ran(self, s: ForStmt, count: int) -> None:
+        """Called as a run of `s` that started `count` iterations leaves the loop."""
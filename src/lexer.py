@@ -1,7 +1,15 @@
 """
 Lexer for BASIC source code.
+
+`Lexer` scans one character at a time and is the reference for what the
+token stream is. `RegexLexer` produces the same tokens, positions and errors
+from one compiled pattern, handing any token the pattern does not cover
+(non-ASCII names and digits, string escapes, NUL, bad characters) to
+`Lexer`. `tokenize` uses `RegexLexer`; `stream_tokens` is the same scanner
+reading a file a chunk of lines at a time.
 """
-from typing import List
+import re
+from typing import Generator, Iterator, List, Optional, TextIO
 
 from .tokens import Token, TokenType, KEYWORDS
 
@@ -208,5 +216,135 @@ class Lexer:
         return tokens
 
 
+# Whitespace, then one token the fast path handles on its own. A number or
+# name followed by a non-ASCII character might continue with a Unicode digit
+# or letter, and a string with escapes, a newline or NUL has special rules, so
+# those do not match here and go to `Lexer`. (The lookaheads also exclude the
+# ASCII characters a match could continue with, so that backtracking never
+# finds a shorter one.)
+_TOKEN_RE = re.compile(r"""
+    [ \t\r]*
+    (?:
+        (?P<NEWLINE>\n)
+      | (?P<NUMBER>[0-9]+(?:\.[0-9]+)?)(?![0-9\x80-\U0010ffff]|\.[0-9\x80-\U0010ffff])
+      | (?P<NAME>[A-Za-z_][A-Za-z0-9_]*)(?![A-Za-z0-9_\x80-\U0010ffff])
+      | (?P<STRING>"[^"\\\n\x00]*"|'[^'\\\n\x00]*')
+      | (?P<OP><>|<=|>=|[-+*/=<>(),:])
+      | (?P<EOF>\Z)
+    )""", re.VERBOSE)
+_REM_TEXT_RE = re.compile(r"[^\n\x00]*")
+
+_OPERATORS = {
+    "<>": TokenType.NE, "<=": TokenType.LE, ">=": TokenType.GE, "<": TokenType.LT,
+    ">": TokenType.GT, "+": TokenType.PLUS, "-": TokenType.MINUS, "*": TokenType.STAR,
+    "/": TokenType.SLASH, "=": TokenType.EQ, "(": TokenType.LPAREN, ")": TokenType.RPAREN,
+    ",": TokenType.COMMA, ":": TokenType.COLON,
+}
+
+
+def _scan(source: str, line: int = 1, final: bool = True) -> Generator[Token, None, Optional[int]]:
+    """Yield the tokens of `source`, whose first line is line number `line`.
+
+    If `final`, the text ends the program and an EOF token ends the tokens.
+    Otherwise the text must end with a newline; the return value is then the
+    number of the line that follows it, or None if the text held an EOF
+    (a NUL character) after all.
+    """
+    match, rem_text = _TOKEN_RE.match, _REM_TEXT_RE.match
+    keywords, operators = KEYWORDS, _OPERATORS
+    IDENT, NUMBER, STRING, NEWLINE, REM, EOF = (
+        TokenType.IDENT, TokenType.NUMBER, TokenType.STRING, TokenType.NEWLINE, TokenType.REM,
+        TokenType.EOF)
+    pos, line_start = 0, 0
+    fallback = None
+    while True:
+        m = match(source, pos)
+        if m is None:
+            # Let the reference lexer read this one token (or raise).
+            if fallback is None:
+                fallback = Lexer(source)
+            fallback.pos, fallback.line, fallback.line_start = pos, line, line_start
+            fallback.column = pos - line_start + 1
+            t = fallback._next_token()
+            yield t
+            if t.type is EOF:
+                return None
+            pos, line, line_start = fallback.pos, fallback.line, fallback.line_start
+            continue
+        kind = m.lastgroup
+        text = m[kind]
+        pos = m.end()
+        column = pos - len(text) - line_start + 1
+        if kind == "NAME":
+            name = text.upper()
+            token_type = keywords.get(name)
+            if token_type is None:
+                yield Token(IDENT, text, line, column)
+            elif token_type is REM:
+                # Like Lexer: the comment token starts after the keyword.
+                rest = rem_text(source, pos)
+                yield Token(REM, rest.group().strip(), line, pos - line_start + 1)
+                pos = rest.end()
+            else:
+                yield Token(token_type, name, line, column)
+        elif kind == "OP":
+            yield Token(operators[text], text, line, column)
+        elif kind == "NUMBER":
+            yield Token(NUMBER, float(text) if "." in text else int(text), line, column)
+        elif kind == "NEWLINE":
+            yield Token(NEWLINE, None, line, column)
+            line += 1
+            line_start = pos
+        elif kind == "STRING":
+            yield Token(STRING, text[1:-1], line, column)
+        elif final:
+            yield Token(EOF, None, line, column)
+            return None
+        else:
+            return line
+
+
+class RegexLexer:
+    """Same tokens as `Lexer`, matched a token at a time by `_TOKEN_RE`."""
+
+    def __init__(self, source: str):
+        self.source = source
+
+    def tokenize(self) -> List[Token]:
+        return list(_scan(self.source))
+
+
+def _split_point(text: str) -> int:
+    """Index just past the last newline in `text` that no token can span, or 0.
+
+    Only a string can continue past a newline, and only one escaped with a
+    backslash, so any other newline ends every token before it.
+    """
+    i = text.rfind("\n")
+    while i > 0 and text[i - 1] == "\\":
+        i = text.rfind("\n", 0, i - 1)
+    return i + 1
+
+
+def stream_tokens(f: TextIO, chunk_size: int = 1 << 16) -> Iterator[Token]:
+    """Yield the tokens of the text read from file `f`, as `tokenize` would
+    return them, holding only about `chunk_size` characters of it at a time."""
+    line, rest = 1, ""
+    while True:
+        data = f.read(chunk_size)
+        if not data:
+            yield from _scan(rest, line)
+            return
+        text = rest + data
+        cut = _split_point(text)
+        if not cut:
+            rest = text
+            continue
+        rest = text[cut:]
+        line = yield from _scan(text[:cut], line, final=False)
+        if line is None:
+            return
+
+
 def tokenize(source: str) -> List[Token]:
-    return Lexer(source).tokenize()
+    return RegexLexer(source).tokenize()
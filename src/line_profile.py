@@ -0,0 +1,68 @@
+"""
+Per-line runtime profiles of BASIC programs.
+
+A program compiled with `CompileOptions(profile_lines=True)` calls `_line(n)`
+as each BASIC line starts, which counts the line and charges the time since
+the previous call to the line that was running. Its `_line_profile` dict
+(line -> [times run, seconds]) becomes a `LineProfile` once the program has
+stopped; compiler.profile_source does both.
+
+A line's time is the time from its start to the start of the next line run,
+so a GOSUB line does not include the subroutine's lines. A FOR ... NEXT loop
+belongs to its FOR line, as the parser has it: its body lines are not
+profiled on their own. Lines without a number are keyed by their line in
+the source file.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+@dataclass(frozen=True)
+class LineStats:
+    line: int
+    count: int  # times the line started
+    time: float  # seconds spent in it, over all those times
+
+
+@dataclass
+class LineProfile:
+    """What each line of one run cost, hottest first."""
+    lines: List[LineStats] = field(default_factory=list)
+
+    @classmethod
+    def from_counters(cls, counters: Dict[int, list]) -> "LineProfile":
+        """From the generated `_line_profile` dict."""
+        lines = [LineStats(line, count, time) for line, (count, time) in counters.items()]
+        lines.sort(key=lambda s: (-s.time, -s.count, s.line))
+        return cls(lines)
+
+    @property
+    def total_time(self) -> float:
+        return sum(s.time for s in self.lines)
+
+    def __getitem__(self, line: int) -> LineStats:
+        for s in self.lines:
+            if s.line == line:
+                return s
+        raise KeyError(line)
+
+    def as_dict(self) -> dict:
+        """The profile as plain JSON-able values."""
+        return {
+            "total_time": self.total_time,
+            "lines": [{"line": s.line, "count": s.count, "time": s.time} for s in self.lines],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict(), indent=1)
+
+    def report(self, limit: int = None) -> str:
+        """Human-readable table, hottest line first; at most `limit` lines."""
+        total = self.total_time
+        rows = [f"{'line':>8} {'count':>10} {'ms':>10} {'%':>6}"]
+        for s in self.lines[:limit]:
+            share = s.time / total if total else 0.0
+            rows.append(f"{s.line:>8} {s.count:>10} {s.time * 1e3:10.3f} {share:6.1%}")
+        rows.append(f"{'total':>8} {sum(s.count for s in self.lines):>10} {total * 1e3:10.3f}")
+        return "\n".join(rows)
@@ -0,0 +1,9 @@
+from .manager import Pass, PassManager, default_passes, optimize
+from .fold import ConstantFolding
+from .simplify import AlgebraicSimplification
+from .branches import ConstantBranchFolding
+
+__all__ = [
+    "Pass", "PassManager", "default_passes", "optimize",
+    "ConstantFolding", "AlgebraicSimplification", "ConstantBranchFolding",
+]
@@ -0,0 +1,44 @@
+"""
+Constant branch folding: replace an IF whose condition is two literals by the taken branch.
+"""
+from typing import List, Optional
+
+from ..ast_nodes import Program, Stmt, IfStmt, ForStmt
+from .fold import compare
+from .manager import Pass
+
+
+class ConstantBranchFolding(Pass):
+    """`IF 1 < 2 THEN PRINT "x"` -> `PRINT "x"`; a false IF without ELSE disappears."""
+    name = "constant-branch-folding"
+
+    def _fold(self, s: Stmt) -> Optional[Stmt]:
+        if isinstance(s, ForStmt):
+            s.body = self._fold_list(s.body)
+            return s
+        if not isinstance(s, IfStmt):
+            return s
+        then_stmt = self._fold(s.then_stmt)
+        else_stmt = self._fold(s.else_stmt) if s.else_stmt is not None else None
+        taken = compare(s.relop, s.left, s.right)
+        if taken is not None:
+            return then_stmt if taken else else_stmt
+        # A nested IF that vanished leaves the outer condition, which may still raise: keep it whole.
+        if then_stmt is not None:
+            s.then_stmt = then_stmt
+        if else_stmt is not None:
+            s.else_stmt = else_stmt
+        return s
+
+    def _fold_list(self, stmts: List[Stmt]) -> List[Stmt]:
+        folded = []
+        for s in stmts:
+            s = self._fold(s)
+            if s is not None:
+                folded.append(s)
+        return folded
+
+    def run(self, program: Program) -> Program:
+        for line in program.lines:
+            line.statements = self._fold_list(line.statements)
+        return program
@@ -0,0 +1,86 @@
+"""
+Constant folding: evaluate operators whose operands are all literals.
+"""
+import math
+from typing import Optional, Union
+
+from ..ast_nodes import (
+    Program, Expr, NumberExpr, StringExpr, BinaryOpExpr, UnaryOpExpr, BuiltinCallExpr,
+)
+from .manager import Pass
+from .rewrite import ExprRewriter
+
+_ARITHMETIC = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": lambda a, b: a / b,
+}
+_COMPARE = {
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "=": lambda a, b: a == b,
+    "<>": lambda a, b: a != b,
+}
+MAX_LITERAL_LEN = 256  # don't let folding blow up the generated code ("A" * 10 ** 6)
+
+
+def literal_value(e: Expr) -> Optional[Union[int, float, str]]:
+    """Value of a number or string literal, else None."""
+    if isinstance(e, (NumberExpr, StringExpr)):
+        return e.value
+    return None
+
+
+def compare(relop: str, left: Expr, right: Expr) -> Optional[bool]:
+    """Result of `left relop right` for two literals, or None if unknown or it would raise."""
+    a, b = literal_value(left), literal_value(right)
+    if a is None or b is None:
+        return None
+    try:
+        return bool(_COMPARE[relop](a, b))
+    except TypeError:
+        return None
+
+
+def to_literal(value) -> Optional[Expr]:
+    """Literal node for a folded value, or None if it has no faithful literal form."""
+    if isinstance(value, bool):
+        return None  # comparisons print as True/False; there is no BASIC literal for that
+    if isinstance(value, str):
+        return StringExpr(value) if len(value) <= MAX_LITERAL_LEN else None
+    if isinstance(value, float) and not math.isfinite(value):
+        return None  # repr() would be `inf` / `nan`, not valid Python
+    if isinstance(value, int) and len(str(value)) > MAX_LITERAL_LEN:
+        return None
+    return NumberExpr(value)
+
+
+class _Folder(ExprRewriter):
+    def rewrite(self, e: Expr) -> Expr:
+        if isinstance(e, BinaryOpExpr) and e.op in _ARITHMETIC:
+            a, b = literal_value(e.left), literal_value(e.right)
+            if a is None or b is None:
+                return e
+            try:
+                value = _ARITHMETIC[e.op](a, b)
+            except (TypeError, ZeroDivisionError, OverflowError):
+                return e  # leave the error to runtime
+            return to_literal(value) or e
+        if isinstance(e, UnaryOpExpr) and isinstance(e.operand, NumberExpr):
+            value = e.operand.value
+            return NumberExpr(-value if e.op == "-" else +value)
+        if isinstance(e, BuiltinCallExpr) and e.name == "ABS" and len(e.args) == 1:
+            if isinstance(e.args[0], NumberExpr):
+                return NumberExpr(abs(e.args[0].value))
+        return e
+
+
+class ConstantFolding(Pass):
+    """`2 * 3 + 1` -> `7`, `-(4)` -> `-4`, `ABS(-2)` -> `2`, `"A" + "B"` -> `"AB"`."""
+    name = "constant-folding"
+
+    def run(self, program: Program) -> Program:
+        return _Folder().program(program)
@@ -0,0 +1,46 @@
+"""
+Pass manager for AST-level optimisations between parse() and transpile().
+"""
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional
+
+from ..ast_nodes import Program
+
+
+class Pass(ABC):
+    """One AST transformation. `run` may rewrite the program in place and returns it."""
+    name = ""
+
+    @abstractmethod
+    def run(self, program: Program) -> Program:
+        ...
+
+
+class PassManager:
+    def __init__(self, passes: Optional[Iterable[Pass]] = None) -> None:
+        self.passes: List[Pass] = list(passes or [])
+
+    def add(self, p: Pass) -> "PassManager":
+        self.passes.append(p)
+        return self
+
+    def run(self, program: Program) -> Program:
+        for p in self.passes:
+            program = p.run(program)
+        return program
+
+
+def default_passes(level: int) -> List[Pass]:
+    """The passes run at optimisation level `level` (0 = none)."""
+    from .fold import ConstantFolding
+    from .simplify import AlgebraicSimplification
+    from .branches import ConstantBranchFolding
+
+    if level <= 0:
+        return []
+    return [ConstantFolding(), AlgebraicSimplification(), ConstantBranchFolding()]
+
+
+def optimize(program: Program, level: int = 1) -> Program:
+    """Run the default pipeline for `level` over `program`."""
+    return PassManager(default_passes(level)).run(program)
@@ -0,0 +1,60 @@
+"""
+Bottom-up expression rewriting shared by the optimisation passes.
+"""
+from typing import List
+
+from ..ast_nodes import (
+    Program, Stmt, Expr,
+    PrintStmt, LetStmt, IfStmt, GotoStmt, GosubStmt, ForStmt,
+    BinaryOpExpr, UnaryOpExpr, BuiltinCallExpr,
+)
+
+
+class ExprRewriter:
+    """Rewrite every expression in a program, children first.
+
+    Subclasses override `rewrite(e)`, which receives a node whose children
+    have already been rewritten and returns the replacement (or `e` itself).
+    """
+
+    def rewrite(self, e: Expr) -> Expr:
+        return e
+
+    def expr(self, e: Expr) -> Expr:
+        if isinstance(e, BinaryOpExpr):
+            e.left = self.expr(e.left)
+            e.right = self.expr(e.right)
+        elif isinstance(e, UnaryOpExpr):
+            e.operand = self.expr(e.operand)
+        elif isinstance(e, BuiltinCallExpr):
+            e.args = [self.expr(a) for a in e.args]
+        return self.rewrite(e)
+
+    def stmts(self, stmts: List[Stmt]) -> None:
+        for s in stmts:
+            self.stmt(s)
+
+    def stmt(self, s: Stmt) -> None:
+        if isinstance(s, PrintStmt):
+            s.items = [self.expr(e) for e in s.items]
+        elif isinstance(s, LetStmt):
+            s.value = self.expr(s.value)
+        elif isinstance(s, IfStmt):
+            s.left = self.expr(s.left)
+            s.right = self.expr(s.right)
+            self.stmt(s.then_stmt)
+            if s.else_stmt is not None:
+                self.stmt(s.else_stmt)
+        elif isinstance(s, (GotoStmt, GosubStmt)):
+            s.target = self.expr(s.target)
+        elif isinstance(s, ForStmt):
+            s.start = self.expr(s.start)
+            s.end = self.expr(s.end)
+            if s.step is not None:
+                s.step = self.expr(s.step)
+            self.stmts(s.body)
+
+    def program(self, program: Program) -> Program:
+        for line in program.lines:
+            self.stmts(line.statements)
+        return program
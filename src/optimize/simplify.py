@@ -0,0 +1,60 @@
+"""
+Algebraic simplification: drop identity operations on values proven numeric.
+
+Each rule is guarded by type inference so it never changes a result: `S * 1`
+stays if S may be a string, `B + 0` stays if B may be a float (-0.0 + 0 is 0.0)
+or a comparison result (True + 0 is 1).
+"""
+from ..analysis import TypeInfo, VType, infer_types
+from ..ast_nodes import Program, Expr, NumberExpr, BinaryOpExpr, UnaryOpExpr
+from .manager import Pass
+from .rewrite import ExprRewriter
+
+
+def _is(e: Expr, value) -> bool:
+    return isinstance(e, NumberExpr) and type(e.value) is type(value) and e.value == value
+
+
+class _Simplifier(ExprRewriter):
+    def __init__(self, types: TypeInfo) -> None:
+        self.types = types
+
+    def _numeric(self, e: Expr) -> bool:
+        t = self.types.of(e)
+        return bool(t) and not (t & ~VType.NUM)
+
+    def _integer(self, e: Expr) -> bool:
+        return self.types.of(e) == VType.INT
+
+    def rewrite(self, e: Expr) -> Expr:
+        if isinstance(e, BinaryOpExpr):
+            left, right = e.left, e.right
+            if e.op == "*":
+                if _is(right, 1) and self._numeric(left):
+                    return left
+                if _is(left, 1) and self._numeric(right):
+                    return right
+            elif e.op == "+":
+                if _is(right, 0) and self._integer(left):
+                    return left
+                if _is(left, 0) and self._integer(right):
+                    return right
+            elif e.op == "-":
+                if _is(right, 0) and self._numeric(left):
+                    return left
+        elif isinstance(e, UnaryOpExpr):
+            inner = e.operand
+            if e.op == "+" and self._numeric(inner):
+                return inner
+            if e.op == "-" and isinstance(inner, UnaryOpExpr) and inner.op == "-":
+                if self._numeric(inner.operand):
+                    return inner.operand
+        return e
+
+
+class AlgebraicSimplification(Pass):
+    """`x * 1`, `1 * x`, `x - 0` -> `x` for numbers; `x + 0`, `0 + x` -> `x` for ints; `-(-x)` -> `x`."""
+    name = "algebraic-simplification"
+
+    def run(self, program: Program) -> Program:
+        return _Simplifier(infer_types(program)).program(program)
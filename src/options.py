@@ -0,0 +1,105 @@
+"""
+Compiler options shared by the pipeline stages.
+"""
+from dataclasses import dataclass
+
+DISPATCH_MODES = ("chain", "table")
+BACKENDS = ("text", "ast")
+MAX_OPT_LEVEL = 2
+
+
+@dataclass(frozen=True)
+class CompileOptions:
+    """Knobs that change the generated code but never program behaviour.
+
+    dispatch: "chain" emits one ``if _pc == i:`` test per block inside the
+    main loop (linear in the number of blocks); "table" emits every block as
+    its own function and dispatches by indexing a list (constant time).
+
+    fuse_blocks: merge runs of lines that no GOTO, GOSUB or RETURN can land
+    on into one block, so straight-line code skips the dispatcher.
+
+    strict_jumps: a literal GOTO/GOSUB to a line that does not exist raises
+    TranspileError instead of an UndefinedLineWarning (the jump then falls
+    through to the next line, as at runtime).
+
+    fast_locals: wrap the program in a generated `_main()` function so every
+    BASIC variable is a Python local instead of a `_vars` dict entry. `_vars`
+    still holds a snapshot of all variables once the program stops.
+
+    specialize_types: run type inference (analysis.infer_types) and drop the
+    `_num()` float normalisation wherever a value is proven never to be a float.
+
+    range_loops: emit FOR as `for ... in range(...)` when start and end are
+    proven ints, the step is a nonzero int constant and the body never assigns
+    the loop variable. Other FOR loops stay while loops.
+
+    eliminate_dead_code: build the control-flow graph (analysis.build_cfg) and
+    leave out lines no path reaches and lines holding only REMs.
+
+    structured: with table dispatch, emit GOTO loops and IF ... THEN GOTO
+    skips as Python `while`/`if` code (src.codegen.structure); only jumps
+    that fit no such shape go through the dispatcher.
+
+    subroutine_functions: compile single-entry GOSUB subroutines
+    (analysis.find_subroutines) to Python functions called directly, instead
+    of pushing a return point on `_gosub_stack` and dispatching twice.
+
+    profile_lines: count how often each BASIC line runs and the time spent in
+    it, into the `_line_profile` dict of the generated module (see
+    src/line_profile.py and compiler.profile_source). Off, the generated code
+    carries no trace of it.
+
+    backend: how `compile_code` gets a code object. "text" compiles the
+    generated Python source; "ast" builds a Python `ast.Module` directly
+    (codegen.emit.AstEmitter), skipping the parse, with each statement's line
+    number set to its BASIC source line. `compile_source` always returns text.
+
+    opt_level: AST optimisation passes run between parse and transpile
+    (src.optimize); 0 runs none. `CompileOptions.for_level(n)` also turns on
+    the codegen options appropriate to that level.
+    """
+    dispatch: str = "chain"
+    fuse_blocks: bool = False
+    strict_jumps: bool = False
+    fast_locals: bool = False
+    specialize_types: bool = False
+    range_loops: bool = False
+    eliminate_dead_code: bool = False
+    structured: bool = False
+    subroutine_functions: bool = False
+    profile_lines: bool = False
+    backend: str = "text"
+    opt_level: int = 0
+
+    def __post_init__(self) -> None:
+        if self.dispatch not in DISPATCH_MODES:
+            raise ValueError(f"Unknown dispatch mode: {self.dispatch!r}")
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {self.backend!r}")
+        if self.structured and self.dispatch != "table":
+            raise ValueError("structured requires dispatch='table'")
+        if not 0 <= self.opt_level <= MAX_OPT_LEVEL:
+            raise ValueError(f"Optimisation level must be 0..{MAX_OPT_LEVEL}, got {self.opt_level}")
+
+    @classmethod
+    def for_level(cls, level: int, **overrides) -> "CompileOptions":
+        """Preset for `-O<level>`.
+
+        0: the plain transpiler. 1: AST passes, block fusion, type
+        specialisation, dead-code elimination and subroutine functions; the
+        output keeps the `_pc` chain and `_vars` helpers.
+        2: additionally table dispatch, fast locals, range() loops and
+        structured control flow.
+        """
+        presets = {
+            0: {},
+            1: dict(opt_level=1, fuse_blocks=True, specialize_types=True, eliminate_dead_code=True,
+                    subroutine_functions=True),
+            2: dict(opt_level=2, fuse_blocks=True, specialize_types=True, eliminate_dead_code=True,
+                    subroutine_functions=True,
+                    dispatch="table", fast_locals=True, range_loops=True, structured=True),
+        }
+        if level not in presets:
+            raise ValueError(f"Optimisation level must be 0..{MAX_OPT_LEVEL}, got {level}")
+        return cls(**{**presets[level], **overrides})
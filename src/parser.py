@@ -1,7 +1,16 @@
 """
-Recursive descent parser for BASIC. Produces AST (Program with Lines and Stmts).
+Parser for BASIC. Produces AST (Program with Lines and Stmts).
+
+Statements are parsed by recursive descent, picked by their first token from
+`Parser._STATEMENTS`. Expressions are parsed by one operator-precedence loop
+with explicit stacks, so however deeply they are parenthesised they cannot
+overflow the Python stack.
+
+The parser needs one token of lookahead, so it reads its tokens from any
+iterable; given `lexer.stream_tokens`, neither the source text nor the token
+list is ever held in memory whole.
 """
-from typing import List, Optional
+from typing import Iterable, List, Optional, TextIO, Union
 
 from .tokens import Token, TokenType
 from .ast_nodes import (
@@ -12,6 +21,28 @@ from .ast_nodes import (
 )
 
 
+# Binary operators: token -> (operator, precedence). All are left-associative.
+_RELATIONAL, _ADDITIVE, _MULTIPLICATIVE, _NEGATION = 1, 2, 3, 4
+_BINARY = {
+    TokenType.EQ: ("=", _RELATIONAL), TokenType.NE: ("<>", _RELATIONAL),
+    TokenType.LT: ("<", _RELATIONAL), TokenType.LE: ("<=", _RELATIONAL),
+    TokenType.GT: (">", _RELATIONAL), TokenType.GE: (">=", _RELATIONAL),
+    TokenType.PLUS: ("+", _ADDITIVE), TokenType.MINUS: ("-", _ADDITIVE),
+    TokenType.STAR: ("*", _MULTIPLICATIVE), TokenType.SLASH: ("/", _MULTIPLICATIVE),
+}
+_RELOPS = {tt: op for tt, (op, prec) in _BINARY.items() if prec == _RELATIONAL}
+
+
+def _reduce(operands: List[Expr], entry: tuple) -> None:
+    """Apply the operator `entry` (precedence, op, arity) to the top operands."""
+    _, op, arity = entry
+    if arity == 1:
+        operands[-1] = UnaryOpExpr(op=op, operand=operands[-1])
+    else:
+        right = operands.pop()
+        operands[-1] = BinaryOpExpr(op=op, left=operands[-1], right=right)
+
+
 class ParseError(Exception):
     def __init__(self, message: str, token: Optional[Token] = None):
         self.message = message
@@ -23,14 +54,16 @@ class ParseError(Exception):
 
 
 class Parser:
-    def __init__(self, tokens: List[Token]):
-        self.tokens = tokens
-        self.pos = 0
+    def __init__(self, tokens: Iterable[Token]):
+        self._tokens = iter(tokens)
+        self._token = next(self._tokens)  # lookahead: the current token
 
     def _current(self) -> Token:
-        if self.pos >= len(self.tokens):
-            return self.tokens[-1]
-        return self.tokens[self.pos]
+        return self._token
+
+    def _advance(self) -> None:
+        # Past the last token (EOF) the current token stays where it is.
+        self._token = next(self._tokens, self._token)
 
     def _is_type(self, tt: TokenType) -> bool:
         return self._current().type == tt
@@ -39,12 +72,12 @@ class Parser:
         if self._current().type != tt:
             raise ParseError(msg or f"Expected {tt.name}", self._current())
         t = self._current()
-        self.pos += 1
+        self._advance()
         return t
 
     def _consume_if(self, tt: TokenType) -> bool:
         if self._current().type == tt:
-            self.pos += 1
+            self._advance()
             return True
         return False
 
@@ -65,9 +98,10 @@ class Parser:
     def _parse_line(self) -> Optional[Line]:
         # Optional line number (number at start of line)
         line_num: Optional[int] = None
+        source_line = self._current().line
         if self._is_type(TokenType.NUMBER):
             line_num = int(self._current().value)
-            self.pos += 1
+            self._advance()
         statements: List[Stmt] = []
         # First statement
         stmt = self._parse_statement()
@@ -80,33 +114,14 @@ class Parser:
                 statements.append(stmt)
         # If we had only line number and no statements (or only REM), still add the line
         if line_num is not None or statements:
-            return Line(number=line_num, statements=statements)
+            return Line(number=line_num, statements=statements, source_line=source_line)
         return None
 
     def _parse_statement(self) -> Optional[Stmt]:
         t = self._current()
-        if t.type == TokenType.PRINT:
-            return self._parse_print()
-        if t.type == TokenType.LET:
-            return self._parse_let()
-        if t.type == TokenType.INPUT:
-            return self._parse_input()
-        if t.type == TokenType.IF:
-            return self._parse_if()
-        if t.type == TokenType.GOTO:
-            return self._parse_goto()
-        if t.type == TokenType.GOSUB:
-            return self._parse_gosub()
-        if t.type == TokenType.RETURN:
-            return self._parse_return()
-        if t.type == TokenType.FOR:
-            return self._parse_for()
-        if t.type == TokenType.NEXT:
-            return self._parse_next()
-        if t.type == TokenType.END:
-            return self._parse_end()
-        if t.type == TokenType.REM:
-            return self._parse_rem()
+        parse_stmt = self._STATEMENTS.get(t.type)
+        if parse_stmt is not None:
+            return parse_stmt(self)
         if t.type in (TokenType.NEWLINE, TokenType.COLON, TokenType.EOF):
             return None
         raise ParseError(f"Unexpected token: {t.type.name}", t)
@@ -115,11 +130,7 @@ class Parser:
         self._consume(TokenType.PRINT)
         items: List[Expr] = []
         while True:
-            if self._is_type(TokenType.STRING):
-                items.append(StringExpr(value=self._current().value))
-                self.pos += 1
-            else:
-                items.append(self._parse_expression())
+            items.append(self._parse_expression())
             if not self._consume_if(TokenType.COMMA):
                 break
         return PrintStmt(items=items)
@@ -129,7 +140,7 @@ class Parser:
         if not self._is_type(TokenType.IDENT):
             raise ParseError("Expected variable name", self._current())
         name = self._current().value.upper()
-        self.pos += 1
+        self._advance()
         self._consume(TokenType.EQ, "Expected =")
         value = self._parse_expression()
         return LetStmt(name=name, value=value)
@@ -141,16 +152,17 @@ class Parser:
             if not self._is_type(TokenType.IDENT):
                 raise ParseError("Expected variable name", self._current())
             variables.append(self._current().value.upper())
-            self.pos += 1
+            self._advance()
             if not self._consume_if(TokenType.COMMA):
                 break
         return InputStmt(variables=variables)
 
     def _parse_if(self) -> IfStmt:
         self._consume(TokenType.IF)
-        left = self._parse_expression()
+        # The comparison is the IF's own; only a parenthesised one can be an operand.
+        left = self._parse_expression(_ADDITIVE)
         relop = self._parse_relop()
-        right = self._parse_expression()
+        right = self._parse_expression(_ADDITIVE)
         self._consume(TokenType.THEN, "Expected THEN")
         then_stmt = self._parse_statement()
         if then_stmt is None:
@@ -162,25 +174,11 @@ class Parser:
 
     def _parse_relop(self) -> str:
         t = self._current()
-        if t.type == TokenType.LT:
-            self.pos += 1
-            return "<"
-        if t.type == TokenType.LE:
-            self.pos += 1
-            return "<="
-        if t.type == TokenType.GT:
-            self.pos += 1
-            return ">"
-        if t.type == TokenType.GE:
-            self.pos += 1
-            return ">="
-        if t.type == TokenType.EQ:
-            self.pos += 1
-            return "="
-        if t.type == TokenType.NE:
-            self.pos += 1
-            return "<>"
-        raise ParseError("Expected comparison operator", t)
+        relop = _RELOPS.get(t.type)
+        if relop is None:
+            raise ParseError("Expected comparison operator", t)
+        self._advance()
+        return relop
 
     def _parse_goto(self) -> GotoStmt:
         self._consume(TokenType.GOTO)
@@ -201,7 +199,7 @@ class Parser:
         if not self._is_type(TokenType.IDENT):
             raise ParseError("Expected variable in FOR", self._current())
         var = self._current().value.upper()
-        self.pos += 1
+        self._advance()
         self._consume(TokenType.EQ, "Expected = in FOR")
         start = self._parse_expression()
         self._consume(TokenType.TO, "Expected TO in FOR")
@@ -213,9 +211,9 @@ class Parser:
         body: List[Stmt] = []
         while True:
             if self._is_type(TokenType.NEXT):
-                self.pos += 1
+                self._advance()
                 if self._is_type(TokenType.IDENT):
-                    self.pos += 1  # optional variable after NEXT
+                    self._advance()  # optional variable after NEXT
                 break
             if self._is_type(TokenType.EOF):
                 raise ParseError("FOR without NEXT", self._current())
@@ -223,10 +221,10 @@ class Parser:
                 self._skip_newlines()
                 continue
             if self._is_type(TokenType.COLON):
-                self.pos += 1
+                self._advance()
                 continue
             if self._is_type(TokenType.NUMBER):
-                self.pos += 1  # line number on new line
+                self._advance()  # line number on new line
                 continue
             stmt = self._parse_statement()
             if stmt is not None:
@@ -238,7 +236,7 @@ class Parser:
         var = None
         if self._is_type(TokenType.IDENT):
             var = self._current().value.upper()
-            self.pos += 1
+            self._advance()
         return NextStmt(var=var)
 
     def _parse_end(self) -> EndStmt:
@@ -249,62 +247,106 @@ class Parser:
         t = self._consume(TokenType.REM)
         return RemStmt(text=t.value or "")
 
-    def _parse_expression(self) -> Expr:
-        # Unary +/-
-        if self._consume_if(TokenType.PLUS):
-            return self._parse_term()
-        if self._consume_if(TokenType.MINUS):
-            return UnaryOpExpr(op="-", operand=self._parse_term())
-        expr = self._parse_term()
+    def _parse_expression(self, min_prec: int = _RELATIONAL) -> Expr:
+        """An expression, by operator precedence; prefix signs bind tightest.
+        Outside parentheses, a binary operator below `min_prec` ends it.
+        """
+        NUMBER, STRING, IDENT, LPAREN, RPAREN, COMMA, PLUS, MINUS = (
+            TokenType.NUMBER, TokenType.STRING, TokenType.IDENT, TokenType.LPAREN,
+            TokenType.RPAREN, TokenType.COMMA, TokenType.PLUS, TokenType.MINUS)
+        binary, advance = _BINARY, self._advance
+        operands: List[Expr] = []
+        # Pending operators (precedence, op, arity), and open brackets as
+        # (0, function name or None, index of the first argument in operands).
+        ops: List[tuple] = []
+        depth = 0
         while True:
-            if self._consume_if(TokenType.PLUS):
-                expr = BinaryOpExpr(op="+", left=expr, right=self._parse_term())
-            elif self._consume_if(TokenType.MINUS):
-                expr = BinaryOpExpr(op="-", left=expr, right=self._parse_term())
+            # One operand, after any prefix signs.
+            t = self._token
+            tt = t.type
+            if tt is MINUS:
+                ops.append((_NEGATION, "-", 1))
+                advance()
+                continue
+            if tt is PLUS:
+                advance()
+                continue
+            if tt is NUMBER:
+                operands.append(NumberExpr(value=t.value))
+                advance()
+            elif tt is STRING:
+                operands.append(StringExpr(value=t.value))
+                advance()
+            elif tt is IDENT:
+                name = t.value.upper()
+                advance()
+                if self._token.type is not LPAREN:
+                    operands.append(VarExpr(name=name))
+                else:
+                    advance()
+                    if self._token.type is not RPAREN:
+                        ops.append((0, name, len(operands)))
+                        depth += 1
+                        continue
+                    advance()
+                    operands.append(BuiltinCallExpr(name=name, args=[]))
+            elif tt is LPAREN:
+                ops.append((0, None, None))
+                depth += 1
+                advance()
+                continue
             else:
-                break
-        return expr
+                raise ParseError("Expected expression", t)
+            # Closing brackets, then the operator before the next operand.
+            while True:
+                t = self._token
+                tt = t.type
+                operator = binary.get(tt)
+                if operator is not None and (depth or operator[1] >= min_prec):
+                    op, prec = operator
+                    while ops and ops[-1][0] >= prec:
+                        _reduce(operands, ops.pop())
+                    ops.append((prec, op, 2))
+                    advance()
+                    break
+                if not depth:
+                    while ops:
+                        _reduce(operands, ops.pop())
+                    return operands[0]
+                while ops[-1][0]:
+                    _reduce(operands, ops.pop())
+                _, name, start = ops[-1]
+                if tt is COMMA and name is not None:
+                    advance()
+                    break
+                if tt is not RPAREN:
+                    raise ParseError("Expected )", t)
+                advance()
+                ops.pop()
+                depth -= 1
+                if name is not None:
+                    args = operands[start:]
+                    del operands[start:]
+                    operands.append(BuiltinCallExpr(name=name, args=args))
 
-    def _parse_term(self) -> Expr:
-        expr = self._parse_factor()
-        while True:
-            if self._consume_if(TokenType.STAR):
-                expr = BinaryOpExpr(op="*", left=expr, right=self._parse_factor())
-            elif self._consume_if(TokenType.SLASH):
-                expr = BinaryOpExpr(op="/", left=expr, right=self._parse_factor())
-            else:
-                break
-        return expr
+    _STATEMENTS = {
+        TokenType.PRINT: _parse_print,
+        TokenType.LET: _parse_let,
+        TokenType.INPUT: _parse_input,
+        TokenType.IF: _parse_if,
+        TokenType.GOTO: _parse_goto,
+        TokenType.GOSUB: _parse_gosub,
+        TokenType.RETURN: _parse_return,
+        TokenType.FOR: _parse_for,
+        TokenType.NEXT: _parse_next,
+        TokenType.END: _parse_end,
+        TokenType.REM: _parse_rem,
+    }
 
-    def _parse_factor(self) -> Expr:
-        t = self._current()
-        if t.type == TokenType.NUMBER:
-            self.pos += 1
-            return NumberExpr(value=t.value)
-        if t.type == TokenType.STRING:
-            self.pos += 1
-            return StringExpr(value=t.value)
-        if t.type == TokenType.IDENT:
-            name = t.value.upper()
-            self.pos += 1
-            if self._is_type(TokenType.LPAREN):
-                self.pos += 1
-                args: List[Expr] = []
-                if not self._is_type(TokenType.RPAREN):
-                    args.append(self._parse_expression())
-                    while self._consume_if(TokenType.COMMA):
-                        args.append(self._parse_expression())
-                self._consume(TokenType.RPAREN, "Expected )")
-                return BuiltinCallExpr(name=name, args=args)
-            return VarExpr(name=name)
-        if self._consume_if(TokenType.LPAREN):
-            expr = self._parse_expression()
-            self._consume(TokenType.RPAREN, "Expected )")
-            return expr
-        raise ParseError("Expected expression", t)
-
-
-def parse(source: str) -> Program:
-    from .lexer import tokenize
-    tokens = tokenize(source)
-    return Parser(tokens).parse()
+
+def parse(source: Union[str, TextIO]) -> Program:
+    """Parse BASIC source text, or a text file read as it is parsed (see lexer.stream_tokens)."""
+    from .lexer import tokenize, stream_tokens
+    if isinstance(source, str):
+        return Parser(tokenize(source)).parse()
+    return Parser(stream_tokens(source)).parse()
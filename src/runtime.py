@@ -0,0 +1,97 @@
+"""
+Runtime semantics shared by the engines that do not exec generated Python.
+
+Each function mirrors a helper or an expression the transpiler emits, so a
+program behaves the same whichever engine runs it.
+"""
+import operator
+import random
+import sys
+from typing import Callable, Dict, TextIO
+
+from .analysis import literal_target
+from .ast_nodes import Program, GotoStmt, GosubStmt, iter_stmts
+from .codegen import undefined_target
+
+# BASIC operator -> Python function, as the transpiler spells them.
+BINARY_OPS: Dict[str, Callable] = {
+    "+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv,
+    "=": operator.eq, "<>": operator.ne,
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+UNARY_OPS: Dict[str, Callable] = {"-": operator.neg, "+": operator.pos}
+
+
+def num(x):
+    """`_num`: an integral float becomes an int."""
+    return int(x) if isinstance(x, float) and x == int(x) else x
+
+
+def num_input(read: Callable[[], str]):
+    """`_num_input`: a number read from one line of input."""
+    s = read().strip()
+    return int(s) if '.' not in s else float(s)
+
+
+def rnd(x):
+    """RND(x): a random int in [0, x), or 0 if int(x) is 0."""
+    return int(x) and random.randrange(0, x) or 0
+
+
+# Builtins the transpiler compiles inline, by name (each takes one argument).
+# Any other call fails when it runs, as the generated `_builtin(...)` does.
+BUILTINS: Dict[str, Callable] = {"RND": rnd, "ABS": abs}
+
+
+def builtin(name: str, args: list):
+    function = BUILTINS.get(name)
+    if function is None or len(args) != 1:
+        raise NameError(f"BASIC function {name} with {len(args)} argument(s) is not defined")
+    return function(*args)
+
+
+def link_jumps(program: Program, line_index: Dict[int, int], strict: bool = False) -> Dict[int, int]:
+    """id(GOTO/GOSUB) -> line index it lands on, for every literal target.
+
+    A target that names no line falls through to the next line, after
+    undefined_target reports it, as when transpiling.
+    """
+    targets: Dict[int, int] = {}
+    for i, line in enumerate(program.lines):
+        for s in iter_stmts(line.statements):
+            if not isinstance(s, (GotoStmt, GosubStmt)):
+                continue
+            number = literal_target(s.target)
+            if number is None:
+                continue
+            if number not in line_index:
+                undefined_target("GOTO" if isinstance(s, GotoStmt) else "GOSUB", number, line, i, strict)
+            targets[id(s)] = line_index.get(number, i + 1)
+    return targets
+
+
+def io_builtins(stdin: TextIO = None, stdout: TextIO = None) -> dict:
+    """The `input` and `print` a program uses: reading lines from `stdin` and
+    printing to `stdout`, or the real ones for None."""
+    if stdin is not None:
+        def _input(prompt=""):
+            return stdin.readline().rstrip("\n")
+    else:
+        _input = input
+
+    if stdout is not None:
+        def _print(*args, sep=" ", end="\n", file=None, **kwargs):
+            if file is not None:
+                print(*args, sep=sep, end=end, file=file, **kwargs)
+            else:
+                print(*args, sep=sep, end=end, file=stdout, **kwargs)
+    else:
+        _print = print
+    return {"input": _input, "print": _print}
+
+
+def writer(stdout: TextIO = None) -> Callable[[str], object]:
+    """A function writing text where `io_builtins(stdout=stdout)["print"]` prints."""
+    if stdout is not None:
+        return stdout.write
+    return lambda text: sys.stdout.write(text)
@@ -0,0 +1,160 @@
+"""
+Per-phase compile statistics.
+
+Pass a `CompileStats` to compile_source, compile_code or run_source and it
+is filled in as the program compiles: the wall time of each phase in PHASES,
+the sizes of what each phase produced and, if asked for, the peak memory
+traced while compiling and a cProfile of chosen phases. Without one the
+compiler takes the same path as always and measures nothing.
+
+When a text file is compiled, it is lexed while it is parsed; "lex" is then
+the time spent producing tokens and "parse" the rest.
+"""
+import cProfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import CodeType
+from typing import Collection, Dict, Iterator, Optional
+
+from .ast_nodes import Program, iter_exprs, iter_stmts, stmt_exprs
+from .tokens import Token
+
+PHASES = ("lex", "parse", "optimize", "transpile", "compile")
+
+
+def count_nodes(program: Program) -> int:
+    """Nodes in the AST: the program, its lines, statements and expressions."""
+    count = 1 + len(program.lines)
+    for s in iter_stmts([s for line in program.lines for s in line.statements]):
+        count += 1 + sum(1 for e in stmt_exprs(s) for _ in iter_exprs(e))
+    return count
+
+
+def bytecode_size(code: CodeType) -> int:
+    """Bytes of bytecode in `code` and the code objects nested in it."""
+    return len(code.co_code) + sum(bytecode_size(c) for c in code.co_consts if isinstance(c, CodeType))
+
+
+@dataclass
+class CompileStats:
+    """What one compilation cost. The first two fields say what to record.
+
+    trace_memory: record `peak_memory` with tracemalloc, which makes
+    compiling several times slower (and so the phase times too).
+
+    profile: phases (from PHASES) to run under cProfile; each profile ends up
+    in `profiles`, e.g. for `pstats.Stats(stats.profiles["parse"])`.
+    """
+    trace_memory: bool = False
+    profile: Collection[str] = ()
+
+    times: Dict[str, float] = field(default_factory=dict)  # phase -> seconds
+    tokens: int = 0
+    nodes: int = 0  # AST nodes as parsed (see count_nodes)
+    blocks: int = 0  # dispatch blocks in the generated code
+    source_size: int = 0  # characters of generated Python (text backend only)
+    bytecode_size: int = 0  # bytes of bytecode, when a code object was compiled
+    peak_memory: Optional[int] = None  # bytes, with trace_memory
+    cache_hit: Optional[bool] = None  # with a cache: True if nothing was compiled
+    profiles: Dict[str, cProfile.Profile] = field(default_factory=dict)
+
+    def __post_init__(self):
+        unknown = set(self.profile) - set(PHASES)
+        if unknown:
+            raise ValueError(f"unknown phase(s) {sorted(unknown)}; expected some of {PHASES}")
+
+    @property
+    def total_time(self) -> float:
+        return sum(self.times.values())
+
+    def _profiler(self, phase: str) -> Optional[cProfile.Profile]:
+        if phase not in self.profile:
+            return None
+        return self.profiles.setdefault(phase, cProfile.Profile())
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time (and maybe profile) the body as phase `name`."""
+        profiler = self._profiler(name)
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+
+    def lexing(self, tokens: Iterator[Token]) -> Iterator[Token]:
+        """Yield `tokens`, counting them and timing their production as "lex".
+
+        A profile of "parse" already covers it, so "lex" is then not profiled
+        on its own (only one cProfile can be enabled at a time).
+        """
+        profiler = None if "parse" in self.profile else self._profiler("lex")
+        clock, spent, count = time.perf_counter, 0.0, 0
+        try:
+            while True:
+                start = clock()
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    token = next(tokens, None)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+                    spent += clock() - start
+                if token is None:
+                    return
+                count += 1
+                yield token
+        finally:
+            self.tokens += count
+            self.times["lex"] = self.times.get("lex", 0.0) + spent
+
+    @contextmanager
+    def tracing(self):
+        """Record the peak memory allocated in the body, with trace_memory."""
+        if not self.trace_memory:
+            yield
+            return
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            self.peak_memory = tracemalloc.get_traced_memory()[1] - base
+            if started:
+                tracemalloc.stop()
+
+    def as_dict(self) -> dict:
+        """The measurements as plain JSON-able values (no profiles)."""
+        return {
+            "times": {phase: self.times[phase] for phase in PHASES if phase in self.times},
+            "tokens": self.tokens, "nodes": self.nodes, "blocks": self.blocks,
+            "source_size": self.source_size, "bytecode_size": self.bytecode_size,
+            "peak_memory": self.peak_memory, "cache_hit": self.cache_hit,
+        }
+
+    def report(self) -> str:
+        """Human-readable summary, one measurement per line."""
+        lines = [f"{phase:>10} {self.times[phase] * 1e3:10.2f} ms" for phase in PHASES if phase in self.times]
+        lines.append(f"{'total':>10} {self.total_time * 1e3:10.2f} ms")
+        if self.cache_hit:
+            lines.append("cache hit: nothing compiled")
+        else:
+            lines.append(f"{self.tokens} tokens, {self.nodes} AST nodes, {self.blocks} blocks")
+            if self.source_size:
+                lines.append(f"{self.source_size} characters of Python")
+            if self.bytecode_size:
+                lines.append(f"{self.bytecode_size} bytes of bytecode")
+        if self.peak_memory is not None:
+            lines.append(f"peak memory {self.peak_memory / 1e6:.2f} MB")
+        return "\n".join(lines)
@@ -0,0 +1,210 @@
+"""
+Tiered execution: interpret first, compile what turns out to be hot.
+
+A program starts in the interpreter (src/interpreter.py), which costs
+nothing up front. Counters find the code that runs long:
+
+- HOT_LINE: a line that jumps (GOTO, GOSUB, RETURN) have landed on this
+  many times makes the program hot. That is a GOTO loop's head after as
+  many iterations, or a subroutine after as many calls.
+- HOT_LOOP: a FOR loop that has run this many iterations, over all the
+  times it started, makes the program hot. If its body cannot jump, the
+  loop is compiled on its own (a FOR loop is a single line, so the program
+  cannot switch inside it), once: the counter, end and step are passed in
+  as variables. The run that got hot continues as Python from the iteration
+  it had reached, and every later run of the loop is Python from the start,
+  so an inner loop is not compiled again for each round of an outer one.
+
+Once the program is hot, the whole program is transpiled and compiled once,
+resumable (see Transpiler) and with the line it is at made a block start,
+and execution switches over at the next dispatch point: the first line the
+interpreter reaches that starts a compiled block, with every GOSUB return
+point also a block start. From then on it runs compiled, with the compile
+options given (by default -O2). A program that stops before getting hot is never
+compiled at all.
+
+The defaults are where compiling pays for itself on the samples and
+bench.tiered programs: a line of interpreted BASIC costs a few microseconds
+more than compiled code, and compiling a program of a few dozen lines a few
+milliseconds.
+"""
+import copy
+import dataclasses
+import warnings
+from types import CodeType
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Tuple
+
+from .ast_nodes import (
+    Program, Line, ForStmt, NumberExpr, VarExpr, GotoStmt, GosubStmt, ReturnStmt, EndStmt, iter_stmts,
+)
+from .analysis import TypeInfo, infer_types, program_variables
+from .analysis.types import normalized
+from .codegen import Transpiler
+from .interpreter import Interpreter
+from .optimize import optimize
+from .options import CompileOptions, MAX_OPT_LEVEL
+
+HOT_LINE = 200
+HOT_LOOP = 1000
+
+_JUMPS = (GotoStmt, GosubStmt, ReturnStmt, EndStmt)
+
+
+def _unused(name: str, taken: Iterable[str]) -> str:
+    """`name`, with underscores added until it is not one of `taken`."""
+    while name in taken:
+        name += "_"
+    return name
+
+
+def tier_options(options: Optional[CompileOptions] = None) -> CompileOptions:
+    """The options the hot tier compiles with: `options`, by default -O2."""
+    options = options or CompileOptions.for_level(MAX_OPT_LEVEL)
+    return dataclasses.replace(options, profile_lines=False)
+
+
+class TieredEngine(Interpreter):
+    """Runs `program` as run_source does, interpreting it until it gets hot.
+
+    `events` records each tier-up as ("loop", line index) for a FOR loop
+    compiled on its own and ("program", line index) for the switch to the
+    compiled program.
+    """
+
+    def __init__(self, program: Program, stdin: TextIO = None, stdout: TextIO = None,
+                 options: Optional[CompileOptions] = None,
+                 hot_line: int = HOT_LINE, hot_loop: int = HOT_LOOP) -> None:
+        super().__init__(program, stdin, stdout, tier_options(options))
+        self.hot_line = hot_line
+        self.hot_loop = hot_loop
+        self.hot = False
+        self.events: List[Tuple[str, int]] = []
+        self._hits = [0] * (len(self.lines) + 1)  # line index -> jumps landed there
+        self._compiled: Optional[Tuple[CodeType, Dict[int, int]]] = None  # code, entries
+        self._types: Optional[TypeInfo] = None  # the program's, once a loop is compiled alone
+        self._loop_runs: Dict[int, int] = {}  # id(FOR) -> iterations interpreted so far
+        self._loops: Dict[int, Optional[CodeType]] = {}  # id(FOR) -> _compile_loop(FOR)
+        # The variables a compiled FOR loop reads its end and step from.
+        taken = set(program_variables(program))
+        self._end, self._step = _unused("_for_end", taken), _unused("_for_step", taken)
+
+    def _run(self, pc: int) -> None:
+        lines, execute, hits, hot_line = self.lines, self._execute, self._hits, self.hot_line
+        n = len(lines)
+        while pc < n:
+            self._line = pc
+            after = pc + 1
+            for s in lines[pc]:
+                target = execute(s)
+                if target is not None:
+                    after = target
+                    hits[target] += 1
+                    if hits[target] >= hot_line:
+                        self.hot = True
+                    break
+            pc = after
+            if self.hot and self._switch(pc):
+                return
+
+    def _compile(self, program: Program, options: CompileOptions, resume_at: Iterable[int] = (),
+                 types: Optional[TypeInfo] = None) -> Tuple[CodeType, Dict[int, int]]:
+        """`program` compiled resumable: (code, line index -> block index)."""
+        transpiler = Transpiler(options, resumable=True, resume_at=resume_at, types=types)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # the interpreter warned already
+            if options.backend == "ast":
+                python = transpiler.transpile_ast(program)
+            else:
+                python = transpiler.transpile(program)
+        return compile(python, "<basic>", "exec"), transpiler.entries
+
+    def _resume(self, code: CodeType, pc: int, stack: List[int]) -> None:
+        """Run `code` from block `pc` with GOSUB stack `stack`, on the interpreter's variables."""
+        exec(code, {"__name__": "__main__", **self.io,
+                    "_vars": self.vars, "_entry_pc": pc, "_entry_stack": stack})
+
+    # --- the whole program ---
+
+    def _switch(self, pc: int) -> bool:
+        """Continue in the compiled program at line index `pc`, if it can be entered there."""
+        if pc >= len(self.lines):
+            return False
+        if self._compiled is None:
+            # Compiled so that the line we are at, where a hot jump usually
+            # landed, can be entered.
+            program = optimize(copy.deepcopy(self.program), self.options.opt_level)
+            self._compiled = self._compile(program, self.options, resume_at=[pc])
+        code, entries = self._compiled
+        block = entries.get(pc)
+        stack = [entries.get(r) for r in self.stack]
+        if block is None or None in stack:
+            return False
+        self.events.append(("program", pc))
+        self._resume(code, block, stack)
+        return True
+
+    # --- one FOR loop ---
+
+    def _loop_hot_at(self, s: ForStmt) -> int:
+        if id(s) in self._loops:
+            return 1 if self._loops[id(s)] is not None else 0
+        return max(self.hot_loop - self._loop_runs.get(id(s), 0), 1)
+
+    def _loop_ran(self, s: ForStmt, count: int) -> None:
+        self._loop_runs[id(s)] = self._loop_runs.get(id(s), 0) + count
+
+    def _loop_hot(self, s: ForStmt, i, end, step) -> bool:
+        self.hot = True
+        if not all(type(v) in (int, float) for v in (i, end, step)):
+            return False
+        if id(s) not in self._loops:
+            self._loops[id(s)] = self._compile_loop(s)
+        code = self._loops[id(s)]
+        if code is None:
+            return False
+        while type(i) is float and i == int(i):
+            # The compiled FOR starts from num(i), an int, and would print
+            # differently; interpret iterations until the counter has a fraction.
+            if not ((step > 0 and i <= end) or (step < 0 and i >= end)):
+                return True
+            self.vars[s.var] = i
+            for b in s.body:
+                self._execute(b)
+            i = i + step
+        variables = self.vars
+        variables[s.var] = i
+        variables[self._end] = end
+        variables[self._step] = step
+        try:
+            self._resume(code, 0, [])
+        finally:
+            del variables[self._end], variables[self._step]
+        return True
+
+    def _compile_loop(self, s: ForStmt) -> Optional[CodeType]:
+        """The rest of loop `s`, compiled once for every later run of it: a FOR
+        from the loop variable to `self._end` by `self._step` (or the constant
+        end and step), which the caller sets. None if the body can jump."""
+        if any(isinstance(b, _JUMPS) for b in iter_stmts(s.body)):
+            return None
+        self.events.append(("loop", self._line))
+        end = s.end if isinstance(s.end, NumberExpr) else VarExpr(self._end)
+        step = s.step if s.step is None or isinstance(s.step, NumberExpr) else VarExpr(self._step)
+        rest = ForStmt(s.var, VarExpr(s.var), end, step, s.body)
+        # range() needs types; those of this loop alone would take the
+        # variables it does not set for ints, so use the whole program's.
+        if self._types is None:
+            self._types = infer_types(self.program)
+        types = self._types
+        bounds = {self._end: normalized(types.of(s.end))}
+        if s.step is not None:
+            bounds[self._step] = normalized(types.of(s.step))
+        options = CompileOptions(fast_locals=True, range_loops=True, backend=self.options.backend)
+        code, _ = self._compile(Program([Line(None, [rest])]), options,
+                                types=TypeInfo({**types.variables, **bounds}))
+        return code
+
+def run_tiered(program: Program, stdin: TextIO = None, stdout: TextIO = None,
+               options: Optional[CompileOptions] = None) -> Dict[str, Any]:
+    """Run `program` on a TieredEngine; return its variables."""
+    return TieredEngine(program, stdin, stdout, options).run()
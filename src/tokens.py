@@ -7,6 +7,10 @@ from typing import Any, Optional
 
 
 class TokenType(Enum):
+    # Members compare by identity, so hash them that way too: Enum.__hash__ is
+    # Python code, and the parser looks token types up in dicts.
+    __hash__ = object.__hash__
+
     # Literals and identifiers
     NUMBER = auto()
     STRING = auto()
@@ -68,7 +72,7 @@ KEYWORDS = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     type: TokenType
     value: Any
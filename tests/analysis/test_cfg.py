@@ -0,0 +1,62 @@
+"""Control-flow graph tests."""
+from src.parser import parse
+from src.analysis import build_cfg, drop_unreachable_statements, is_terminal
+from src.analysis.cfg import FALL, GOTO, GOSUB, RETURN_SITE, END, COMPUTED
+
+
+def test_edges_by_kind():
+    program = parse("10 GOSUB 40\n20 IF A > 0 THEN GOTO 10\n30 END\n40 RETURN")
+    cfg = build_cfg(program)
+    assert cfg.edges[0] == [(3, GOSUB), (1, RETURN_SITE)]
+    assert cfg.edges[1] == [(0, GOTO), (2, FALL)]
+    assert cfg.edges[2] == [(4, END)]
+    assert cfg.edges[3] == []
+    assert cfg.returns == {3}
+    assert cfg.exit == 4
+
+
+def test_reachability_skips_code_after_goto_and_end():
+    program = parse('10 GOTO 30\n20 PRINT "dead"\n30 END\n40 PRINT "dead too"')
+    cfg = build_cfg(program)
+    assert cfg.reachable() == {0, 2, 4}
+    assert not cfg.falls_through(0)
+    assert cfg.predecessors()[2] == {0, 1}  # the dead line still has its edge
+
+
+def test_if_with_terminal_branches_does_not_fall_through():
+    program = parse("10 IF A > 0 THEN GOTO 30 ELSE END\n20 PRINT 1\n30 PRINT 2")
+    cfg = build_cfg(program)
+    assert not cfg.falls_through(0)
+    assert 1 not in cfg.reachable()
+    assert is_terminal(program.lines[0].statements[0])
+
+
+def test_computed_jump_may_land_anywhere():
+    cfg = build_cfg(parse("10 GOTO A\n20 PRINT 1\n30 END"))
+    assert cfg.computed
+    assert {dest for dest, kind in cfg.edges[0] if kind == COMPUTED} == {0, 1, 2}
+    assert cfg.reachable() == {0, 1, 2, 3}
+
+
+def test_to_dot_uses_line_numbers():
+    program = parse("10 GOSUB 30\n20 END\n30 RETURN")
+    dot = build_cfg(program).to_dot(program)
+    assert '"10" -> "30" [label="gosub"];' in dot
+    assert '"20" -> "exit" [label="end"];' in dot
+
+
+def test_with_calls_lets_function_calls_fall_through():
+    program = parse("10 GOSUB 40\n20 IF A > 0 THEN GOSUB 50\n30 END\n40 RETURN\n50 RETURN")
+    cfg = build_cfg(program).with_calls({3})
+    assert cfg.edges[0] == [(3, GOSUB), (1, FALL)]
+    assert (2, RETURN_SITE) in cfg.edges[1]  # 50 is still an ordinary subroutine
+
+
+def test_drop_unreachable_statements():
+    program = parse("10 PRINT 1 : GOTO 30 : GOSUB 40\n20 FOR I = 1 TO 2 : GOSUB 40 : PRINT I : NEXT I\n"
+                    "30 IF A > 0 THEN GOTO 10 ELSE END : PRINT 2\n40 RETURN")
+    cut = drop_unreachable_statements(program)
+    assert [len(line.statements) for line in cut.lines] == [2, 1, 1, 1]
+    assert len(cut.lines[1].statements[0].body) == 1
+    assert cut.lines[3] is program.lines[3]  # nothing to cut: not copied
+    assert len(program.lines[0].statements) == 3  # the original is unchanged
@@ -0,0 +1,35 @@
+"""Jump-target analysis tests."""
+from src.parser import parse
+from src.analysis import build_line_index, find_jump_targets, resolve_target
+from src.ast_nodes import NumberExpr, VarExpr
+
+
+def test_line_index_numbers_and_implicit_indices():
+    program = parse("REM top\n10 PRINT 1\n20 END")
+    assert build_line_index(program) == {0: 0, 10: 1, 20: 2}
+
+
+def test_resolve_literal_target():
+    index = {10: 0, 20: 1}
+    assert resolve_target(NumberExpr(20), index, 5) == 1
+    assert resolve_target(NumberExpr(20.0), index, 5) == 1
+    assert resolve_target(NumberExpr(30), index, 5) == 5  # missing line falls through
+    assert resolve_target(VarExpr("X"), index, 5) is None
+
+
+def test_targets_include_entry_goto_and_gosub_return_point():
+    program = parse("10 GOSUB 40\n20 PRINT 1\n30 GOTO 10\n40 RETURN")
+    jumps = find_jump_targets(program)
+    assert not jumps.computed
+    assert jumps.targets == {0, 1, 3}
+
+
+def test_targets_inside_if_and_for():
+    program = parse("10 IF X > 0 THEN GOTO 30\n20 FOR I = 1 TO 2\nGOSUB 40\nNEXT I\n30 END\n40 RETURN")
+    jumps = find_jump_targets(program)
+    assert {2, 3} <= jumps.targets
+
+
+def test_computed_target_flagged():
+    program = parse("10 GOTO X * 10\n20 END")
+    assert find_jump_targets(program).computed
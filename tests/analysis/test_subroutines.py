@@ -0,0 +1,45 @@
+"""Subroutine (call-graph) analysis tests."""
+from pathlib import Path
+
+from src.parser import parse
+from src.analysis import find_subroutines
+
+SAMPLES = Path(__file__).resolve().parent.parent.parent / "samples"
+
+
+def numbers(program, subs):
+    return {program.lines[e].number: [program.lines[i].number for i in sub.lines]
+            for e, sub in subs.items()}
+
+
+def test_single_entry_subroutines_with_call_graph():
+    program = parse("10 GOSUB 100\n20 END\n100 GOSUB 200\n110 RETURN\n200 IF A > 0 THEN GOTO 220\n"
+                    "210 LET A = 1\n220 RETURN")
+    subs = find_subroutines(program)
+    assert numbers(program, subs) == {100: [100, 110], 200: [200, 210, 220]}
+    assert subs[2].calls == {4}
+
+
+def test_shared_and_fallen_into_code_is_not_a_function():
+    # 40 is entered both by GOSUB 40 and from inside the subroutine at 30;
+    # 60 is also reached by falling through from the main program.
+    program = parse("10 GOSUB 30\n20 GOSUB 40\n25 GOTO 60\n30 LET A = 1\n40 RETURN\n50 GOSUB 60\n"
+                    "60 RETURN")
+    assert find_subroutines(program) == {}
+
+
+def test_non_tail_calls_recursion_and_callers_excluded():
+    program = parse('10 GOSUB 100: PRINT "x"\n20 GOSUB 200\n30 GOSUB 300\n40 END\n'
+                    "100 RETURN\n200 IF A < 3 THEN GOSUB 200\n210 RETURN\n300 GOSUB 200\n310 RETURN")
+    assert find_subroutines(program) == {}
+
+
+def test_computed_jumps_disable_the_analysis():
+    assert find_subroutines(parse("10 GOSUB 30\n20 GOTO A\n30 RETURN")) == {}
+
+
+def test_city_game_subroutines_are_all_functions():
+    program = parse((SAMPLES / "city_game.bas").read_text())
+    subs = numbers(program, find_subroutines(program))
+    assert sorted(subs) == [200, 300, 350, 400, 500, 600, 700, 750, 770, 790, 1000, 1100, 1200]
+    assert subs[300][-1] == 335
@@ -0,0 +1,46 @@
+"""Type inference tests."""
+from src.parser import parse
+from src.analysis import VType, infer_types
+from src.ast_nodes import NumberExpr, StringExpr, VarExpr, BinaryOpExpr, UnaryOpExpr
+
+
+def var_types(source: str):
+    return infer_types(parse(source)).variables
+
+
+def test_literal_and_arithmetic_types():
+    types = var_types('LET A = 1\nLET B = A * 2 - 3\nLET C = 1.5\nLET D = A / 2\nLET S = "x"')
+    assert types["A"] == VType.INT
+    assert types["B"] == VType.INT
+    assert types["C"] == VType.INT | VType.FLOAT  # initial 0 is an int
+    assert types["D"] == VType.INT | VType.FLOAT
+    assert types["S"] == VType.INT | VType.STR
+
+
+def test_input_is_numeric_and_propagates():
+    types = var_types("INPUT N\nLET M = N + 1\nLET R = RND(N)")
+    assert types["N"] == VType.NUM
+    assert types["M"] == VType.NUM
+    assert types["R"] == VType.INT
+
+
+def test_fixpoint_through_cycles():
+    types = var_types("10 LET A = B\n20 LET B = C\n30 LET C = 0.5")
+    assert types["A"] == VType.NUM
+
+
+def test_for_variable_with_fractional_step():
+    assert var_types("FOR I = 1 TO 10\nNEXT I")["I"] == VType.INT
+    assert var_types("FOR I = 1 TO 2 STEP 0.5\nNEXT I")["I"] == VType.NUM
+
+
+def test_expression_types():
+    info = infer_types(parse("LET A = 1"))
+    compare = BinaryOpExpr("<", NumberExpr(1), NumberExpr(2))
+    assert info.of(compare) == VType.BOOL
+    assert info.of(BinaryOpExpr("+", StringExpr("a"), StringExpr("b"))) == VType.STR
+    assert info.of(BinaryOpExpr("-", StringExpr("a"), NumberExpr(1))) == VType.NONE  # always raises
+    negated = UnaryOpExpr("-", compare)
+    assert info.of(negated) == VType.INT
+    assert info.is_integral(negated)
+    assert not info.is_integral(BinaryOpExpr("/", VarExpr("A"), NumberExpr(2)))
@@ -0,0 +1,89 @@
+"""Precompiled artifact tests: build, load and run."""
+import dataclasses
+import random
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+from bench.fusion import CITY_GAME_INPUT
+from compiler import build_artifact, main, run_artifact, run_source
+from src import __version__
+from src.artifact import Artifact, ArtifactError, source_digest
+from src.options import CompileOptions
+from src.parser import Parser
+from src.stats import CompileStats
+
+SAMPLES = Path(__file__).resolve().parents[2] / "samples"
+PROGRAM = '10 INPUT N\n20 LET S = S + N\n30 IF S < 10 THEN GOTO 10\nPRINT "sum", S\n'
+
+
+def test_artifact_runs_like_source():
+    source = (SAMPLES / "city_game.bas").read_text(encoding="utf-8")
+    for level in (0, 2):
+        options = CompileOptions.for_level(level)
+        artifact = Artifact.from_bytes(build_artifact(source, options).to_bytes())
+        expected, out = StringIO(), StringIO()
+        random.seed(1234)
+        run_source(source, StringIO(CITY_GAME_INPUT), expected, options)
+        random.seed(1234)
+        run_artifact(artifact, StringIO(CITY_GAME_INPUT), out)
+        assert out.getvalue() == expected.getvalue()
+
+
+def test_metadata():
+    artifact = build_artifact(StringIO(PROGRAM), CompileOptions.for_level(1), name="sum.bas")
+    assert artifact.source_name == "sum.bas"
+    assert artifact.source_sha256 == source_digest(PROGRAM)
+    assert artifact.options == repr(CompileOptions.for_level(1))
+    assert artifact.lines == ((10, 1), (20, 2), (30, 3), (None, 4))
+    assert artifact.variables == ("N", "S")
+    assert artifact.compiler == __version__
+    loaded = Artifact.from_bytes(artifact.to_bytes())
+    assert dataclasses.replace(loaded, code=None) == dataclasses.replace(artifact, code=None)
+    assert run_artifact(loaded, StringIO("4\n7\n"), StringIO()) == {"N": 7, "S": 11}
+
+
+def test_build_parses_once(monkeypatch):
+    calls = []
+    parse = Parser.parse
+    monkeypatch.setattr(Parser, "parse", lambda self: calls.append(1) or parse(self))
+    stats = CompileStats()
+    build_artifact(PROGRAM, CompileOptions.for_level(2), stats=stats)
+    assert len(calls) == 1
+    assert set(stats.times) == {"lex", "parse", "optimize", "transpile", "compile"}
+
+def test_rejects_bad_files():
+    data = build_artifact(PROGRAM).to_bytes()
+    with pytest.raises(ArtifactError, match="magic"):
+        Artifact.from_bytes(PROGRAM.encode())
+    with pytest.raises(ArtifactError, match="version"):
+        Artifact.from_bytes(data[:8] + b"\0\x63" + data[10:])
+    with pytest.raises(ArtifactError, match="checksum"):
+        Artifact.from_bytes(data[:-1] + bytes([data[-1] ^ 1]))
+    foreign = dataclasses.replace(build_artifact(PROGRAM), python=b"\x00\x00\r\n")
+    with pytest.raises(ArtifactError, match="another Python"):
+        Artifact.from_bytes(foreign.to_bytes())
+
+
+def test_cli_build_and_run(tmp_path, capsys, monkeypatch):
+    path = tmp_path / "sum.bas"
+    path.write_text(PROGRAM)
+    assert main(["build", str(path)]) == 0
+    assert (tmp_path / "sum.bbc").is_file()
+    assert main(["build", "-O", "2", str(path), "-o", str(tmp_path / "fast.bbc")]) == 0
+    assert Artifact.read(tmp_path / "fast.bbc").options == repr(CompileOptions.for_level(2))
+    for built in ("sum.bbc", "fast.bbc"):
+        monkeypatch.setattr("sys.stdin", StringIO("4\n7\n"))
+        assert main(["run", str(tmp_path / built)]) == 0
+        assert capsys.readouterr().out == "sum11\n"
+
+
+def test_cli_errors(tmp_path, capsys):
+    path = tmp_path / "bad.bas"
+    path.write_text("10 LET = 1\n")
+    assert main(["build", str(path)]) == 1
+    assert "Parse error" in capsys.readouterr().err
+    assert main(["build", str(tmp_path / "missing.bas")]) == 1
+    assert main(["run", str(path)]) == 1
+    assert "Artifact error: not a BASIC artifact" in capsys.readouterr().err
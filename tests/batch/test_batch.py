@@ -0,0 +1,91 @@
+"""Batch compilation tests: finding sources, per-file results, outputs, CLI."""
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+import compiler
+
+from compiler import compile_many, compile_source, find_sources, main, run_artifact
+from src.artifact import Artifact
+
+GOOD = 'LET A = 1 + 2\nPRINT A\n'
+BAD = '10 LET = 1\n'
+WARNS = '10 GOTO 99\n20 PRINT "x"\n'
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    (tmp_path / "sub" / "deeper").mkdir(parents=True)
+    (tmp_path / "a.bas").write_text(GOOD)
+    (tmp_path / "sub" / "b.bas").write_text(BAD)
+    (tmp_path / "sub" / "deeper" / "c.bas").write_text(WARNS)
+    (tmp_path / "notes.txt").write_text("not BASIC")
+    return tmp_path
+
+
+def test_find_sources(corpus):
+    a, b, c = str(corpus / "a.bas"), str(corpus / "sub" / "b.bas"), str(corpus / "sub" / "deeper" / "c.bas")
+    assert find_sources([corpus]) == [a, b, c]
+    assert find_sources([str(corpus / "**" / "*.bas")]) == [a, b, c]
+    assert find_sources([str(corpus / "*.bas")]) == [a]
+    assert find_sources([c, corpus / "sub", a]) == [c, b, a]
+    assert find_sources([str(corpus / "missing.bas")]) == [str(corpus / "missing.bas")]
+
+
+def test_results(corpus):
+    good, bad, warns, missing = compile_many([corpus, corpus / "missing.bas"], workers=1)
+    assert good.ok and not good.warnings and good.output is None
+    assert set(good.stats.times) == {"lex", "parse", "optimize", "transpile", "compile"}
+    assert 0 < good.stats.total_time <= good.seconds
+    assert not bad.ok and bad.error.startswith("Parse error: ")
+    assert warns.ok and len(warns.warnings) == 1 and "99" in warns.warnings[0]
+    assert missing.error == "File not found"
+
+
+def test_unexpected_errors_are_reported_per_file(corpus, monkeypatch):
+    (corpus / "sub" / "latin1.bas").write_bytes('PRINT "café"\n'.encode("latin-1"))
+    results = compile_many([corpus], workers=2)
+    assert [r.ok for r in results] == [True, False, True, False]
+    assert results[3].error.startswith("UnicodeDecodeError: ")
+    compile_source = compiler.compile_source
+
+    def crash(source, *args, **kwargs):
+        if source == BAD:
+            raise KeyError(1)
+        return compile_source(source, *args, **kwargs)
+
+    monkeypatch.setattr(compiler, "compile_source", crash)
+    assert compile_many([corpus / "sub" / "b.bas"], workers=1)[0].error == "KeyError: 1"
+
+
+def test_workers_agree(corpus):
+    serial = compile_many([corpus], workers=1)
+    parallel = compile_many([corpus], workers=2)
+    assert [(r.path, r.error, r.warnings) for r in parallel] == [(r.path, r.error, r.warnings) for r in serial]
+
+
+def test_emit(corpus, tmp_path_factory):
+    out = tmp_path_factory.mktemp("out")
+    results = compile_many([corpus], workers=1, emit="python", output_dir=str(out))
+    assert [r.output for r in results] == [str(out / "a.py"), None, str(out / "sub" / "deeper" / "c.py")]
+    assert (out / "a.py").read_text() == compile_source(GOOD)
+    compile_many([corpus / "a.bas"], workers=1, emit="artifact")
+    stdout = StringIO()
+    run_artifact(Artifact.read(corpus / "a.bbc"), StringIO(), stdout)
+    assert stdout.getvalue() == "3\n"
+    with pytest.raises(ValueError):
+        compile_many([corpus], emit="exe")
+
+
+def test_cli(corpus, capsys):
+    assert main(["batch", "-j", "1", str(corpus / "a.bas")]) == 0
+    assert "a.bas: ok" in capsys.readouterr().out
+    assert main(["batch", "-q", "-j", "2", str(corpus)]) == 1
+    out = capsys.readouterr().out.splitlines()
+    assert "b.bas: Parse error: " in out[0]
+    assert "c.bas: ok" in out[1] and "c.bas: warning:" in out[2]
+    assert out[-1].startswith("3 files, 1 failed;")
+    assert main(["batch", str(corpus / "none" / "*.bas")]) == 1
+    with pytest.raises(SystemExit):
+        main(["batch", "--output-dir", "x", str(corpus)])
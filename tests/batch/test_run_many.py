@@ -0,0 +1,59 @@
+"""run_many tests: one compile, many stdin cases, statuses and timeouts."""
+import json
+from io import StringIO
+
+import pytest
+
+from compiler import TIMEOUT_STATUS, main, run_many, run_source
+from src.parser import ParseError
+
+PROGRAM = '10 INPUT N\n20 IF N = 0 THEN GOTO 20\n30 PRINT "half", N / 2\n40 PRINT 1 / (N - 1)\n'
+CASES = ["4\n", "1\n", "x\n", "0\n"]
+
+
+def expected(stdin):
+    out = StringIO()
+    run_source(PROGRAM, StringIO(stdin), out)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_statuses(workers):
+    ok, error, bad_input, timeout = run_many(PROGRAM, CASES, workers=workers, timeout=0.3)
+    assert ok.ok and ok.stdout == expected("4\n") and ok.error is None
+    assert error.status == 1 and error.error.startswith("ZeroDivisionError")
+    assert error.stdout == "half0.5\n"  # what it printed before failing
+    assert bad_input.status == 1 and bad_input.error.startswith("ValueError")
+    assert timeout.status == TIMEOUT_STATUS and timeout.error == "timed out after 0.3 s"
+    assert 0.3 <= timeout.seconds < 5
+    assert all(r.seconds >= 0 for r in (ok, error, bad_input))
+
+
+def test_many_cases_in_order():
+    cases = [f"{n}\n" for n in range(2, 40)]
+    results = run_many(StringIO(PROGRAM), cases, workers=3)
+    assert [r.stdout for r in results] == [expected(stdin) for stdin in cases]
+
+
+def test_compile_errors_raise():
+    with pytest.raises(ParseError):
+        run_many("10 LET = 1\n", ["\n"])
+
+
+def test_cli(tmp_path, capsys):
+    program = tmp_path / "p.bas"
+    program.write_text(PROGRAM)
+    cases = tmp_path / "cases"
+    cases.mkdir()
+    (cases / "a.in").write_text("4\n")
+    (cases / "b.in").write_text("3\n")
+    assert main(["run-many", str(program), "-c", str(cases), "-j", "1"]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert "a.in: ok, " in out[0] and "b.in: ok, " in out[1]
+    assert out[-1] == "1 programs x 2 cases, 0 failed"
+    (cases / "c.in").write_text("0\n")
+    assert main(["run-many", str(program), "-c", str(cases / "*.in"), "--timeout", "0.2", "--json"]) == 1
+    report = json.loads(capsys.readouterr().out)[str(program)]
+    assert report[str(cases / "b.in")]["stdout"] == expected("3\n")
+    assert report[str(cases / "c.in")]["status"] == TIMEOUT_STATUS
+    assert main(["run-many", str(tmp_path / "missing.bas"), "-c", str(cases)]) == 1
@@ -0,0 +1 @@
+"""Benchmark suite tests: generated programs and the regression gate."""
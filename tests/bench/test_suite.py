@@ -0,0 +1,58 @@
+"""Benchmark suite tests: generated programs and the regression gate."""
+import json
+import warnings
+from io import StringIO
+
+import pytest
+
+from bench.programs import SHAPES, generate
+from bench.suite import PHASES, compare, main, run_suite
+from compiler import run_source
+from src.options import CompileOptions, MAX_OPT_LEVEL
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("shape", sorted(SHAPES))
+def test_generated_programs_run_the_same_at_every_level(shape, seed):
+    workload = generate(shape, 80, seed)
+    assert 80 <= len(workload.source.splitlines()) <= 100
+    outputs = []
+    for level in range(MAX_OPT_LEVEL + 1):
+        out = StringIO()
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")  # e.g. a GOTO to a line that does not exist
+            variables = run_source(workload.source, StringIO(workload.stdin), out, CompileOptions.for_level(level))
+        # Variables default to 0, and with fast locals every one is reported.
+        outputs.append((out.getvalue(), {k: v for k, v in variables.items() if v != 0}))
+    assert outputs == [outputs[0]] * len(outputs)
+
+
+def test_generate_is_deterministic():
+    assert generate("input", 80, 7) == generate("input", 80, 7)
+    assert generate("input", 80, 7) != generate("input", 80, 8)
+
+
+def test_compare():
+    baseline = {"results": {"p -O0": {"lex": 0.010, "parse": 0.0001, "execute": 0.010}}}
+    current = {"results": {"p -O0": {"lex": 0.013, "parse": 0.0009, "execute": 0.011},
+                           "q -O0": {"lex": 1.0}}}
+    [regression] = compare(baseline, current, threshold=0.2, min_time=0.001)
+    assert (regression.name, regression.phase) == ("p -O0", "lex")
+    assert "+30%" in str(regression)
+    assert compare(baseline, current, threshold=0.5, min_time=0.001) == []
+
+
+def test_run_suite_and_gate(tmp_path, capsys):
+    results = run_suite(["straight"], [0], lines=20, seed=1, n=1)
+    assert list(results["results"]) == ["straight-20 -O0"]
+    assert list(results["results"]["straight-20 -O0"]) == PHASES
+    baseline = tmp_path / "baseline.json"
+    args = ["--shapes", "straight", "--levels", "0", "--lines", "20", "--n", "1"]
+    assert main(args + ["--out", str(baseline)]) == 0
+    slow = json.loads(baseline.read_text())
+    assert main(args + ["--baseline", str(baseline), "--threshold", "100"]) == 0
+    for phases in slow["results"].values():
+        phases["execute"] = 1e-9  # "was" far faster than anything can run
+    baseline.write_text(json.dumps(slow))
+    assert main(args + ["--baseline", str(baseline), "--min-time", "0", "--retries", "0"]) == 1
+    assert "REGRESSION straight-20 -O0 execute" in capsys.readouterr().out
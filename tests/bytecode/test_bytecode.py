@@ -0,0 +1,54 @@
+"""Bytecode compiler, serialised form and disassembler tests."""
+import pytest
+
+from compiler import main
+from src.bytecode import Bytecode, BytecodeError, compile_program, disassemble
+from src.bytecode import opcodes as op
+from src.parser import parse
+from tests.conftest import GOTO_LOOP
+
+
+def test_constants_and_line_table():
+    bytecode = compile_program(parse('10 PRINT 1, 1.0, 1\n20 LET A = A + 1\nPRINT "x"\n'))
+    assert bytecode.consts == (1, 1.0, "x")
+    assert bytecode.numbers == (10, 20, None)
+    assert bytecode.starts == (0, 7, 10, 13)
+    assert bytecode.code[2 * 8:2 * 9].tolist() == [op.ADD_CONST, 0]
+
+
+def test_serialised_form():
+    bytecode = compile_program(parse(GOTO_LOOP))
+    data = bytecode.to_bytes()
+    assert Bytecode.from_bytes(data) == bytecode
+    with pytest.raises(BytecodeError, match="magic"):
+        Bytecode.from_bytes(b"#!" + data)
+    with pytest.raises(BytecodeError, match="version"):
+        Bytecode.from_bytes(data[:8] + bytes([99]) + data[9:])
+    with pytest.raises(BytecodeError, match="corrupt"):
+        Bytecode.from_bytes(data[:20])
+
+
+def test_disassemble():
+    listing = disassemble(compile_program(parse("10 LET I = I + 1\n20 IF I < 3 THEN GOTO 10\n30 PRINT I\n")))
+    assert listing == (
+        "line 10:\n"
+        ">>     0  LOAD              0  (I)\n"
+        "       1  ADD_CONST         0  (1)\n"
+        "       2  STORE             0  (I)\n"
+        "line 20:\n"
+        "       3  LOAD              0  (I)\n"
+        "       4  LT_CONST          1  (3)\n"
+        "       5  JUMP_IF_TRUE      0\n"
+        "line 30:\n"
+        "       6  LOAD              0  (I)\n"
+        "       7  PRINT\n"
+        "       8  NEWLINE\n"
+        "       9  HALT\n"
+    )
+
+
+def test_cli_disassemble(tmp_path, capsys):
+    path = tmp_path / "prog.bas"
+    path.write_text(GOTO_LOOP)
+    assert main(["--disassemble", str(path)]) == 0
+    assert "JUMP_IF_TRUE" in capsys.readouterr().out
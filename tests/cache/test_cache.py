@@ -0,0 +1,94 @@
+"""Compile cache tests."""
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+import compiler
+import src.cache
+from compiler import compile_code, main, run_source
+from src.cache import CompileCache, cache_key
+from src.options import CompileOptions
+from src.parser import ParseError
+
+SRC = '10 PRINT "hi"\n20 LET A = 2'
+
+
+def run(source, cache, options=None):
+    out = StringIO()
+    variables = run_source(source, stdin=StringIO(), stdout=out, options=options, cache=cache)
+    return out.getvalue(), variables
+
+
+def test_hits_and_misses():
+    cache = CompileCache()
+    assert run(SRC, cache) == run(SRC, cache) == ("hi\n", {"A": 2})
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+    run(SRC, cache, CompileOptions.for_level(2))  # other options: another entry
+    assert cache.stats.misses == 2 and len(cache) == 2
+    assert cache.stats.hit_rate == pytest.approx(1 / 3)
+
+
+def test_key_covers_source_options_and_compiler(monkeypatch):
+    key = cache_key(SRC)
+    assert key == cache_key(SRC, CompileOptions())
+    assert key != cache_key(SRC + "\n30 END")
+    assert key != cache_key(SRC, CompileOptions(fuse_blocks=True))
+    monkeypatch.setattr(src.cache, "_fingerprint", "upgraded compiler")
+    assert key != cache_key(SRC)
+
+
+def test_fingerprint_covers_the_driver():
+    files = src.cache.compiler_files()
+    assert Path(compiler.__file__).resolve() in files
+    assert Path(src.cache.__file__).resolve() in files
+
+
+def test_lru_evicts_least_recently_used():
+    cache = CompileCache(maxsize=2)
+    first, second, third = (f"10 PRINT {i}" for i in range(3))
+    compile_code(first, cache=cache)
+    compile_code(second, cache=cache)
+    compile_code(first, cache=cache)  # now second is the oldest
+    compile_code(third, cache=cache)
+    assert cache.stats.evictions == 1
+    compile_code(first, cache=cache)
+    assert cache.stats.hits == 2
+    compile_code(second, cache=cache)
+    assert cache.stats.misses == 4
+
+
+def test_disk_cache_shared_between_instances(tmp_path):
+    run(SRC, CompileCache(directory=tmp_path))
+    assert len(list(tmp_path.glob("*.bcode"))) == 1
+    cache = CompileCache(directory=tmp_path)
+    assert run(SRC, cache)[0] == "hi\n"
+    assert (cache.stats.disk_hits, cache.stats.misses) == (1, 0)
+    run(SRC, cache)
+    assert cache.stats.hits == 1  # promoted to memory
+    cache.clear()
+    assert len(cache) == 0 and not list(tmp_path.glob("*.bcode"))
+
+
+def test_corrupt_disk_entry_is_recompiled(tmp_path):
+    cache = CompileCache(directory=tmp_path)
+    (tmp_path / (cache_key(SRC) + ".bcode")).write_bytes(b"\x00garbage")
+    assert run(SRC, cache)[0] == "hi\n"
+    assert cache.stats.misses == 1
+
+
+def test_compile_errors_are_not_cached():
+    cache = CompileCache()
+    for _ in range(2):
+        with pytest.raises(ParseError):
+            compile_code("10 PRINT (", cache=cache)
+    assert cache.stats.misses == 2 and len(cache) == 0
+
+
+def test_cli_cache_dir(tmp_path, capsys):
+    prog = tmp_path / "prog.bas"
+    prog.write_text(SRC)
+    for _ in range(2):
+        assert main(["--cache-dir", str(tmp_path / "cache"), str(prog)]) == 0
+    assert capsys.readouterr().out == "hi\nhi\n"
+    assert len(list((tmp_path / "cache").glob("*.bcode"))) == 1
@@ -0,0 +1,39 @@
+"""Closure engine tests."""
+import builtins
+from io import StringIO
+
+from src.closures import ClosureProgram
+from src.parser import parse
+from tests.conftest import compiled
+
+
+def test_runs_without_exec(monkeypatch):
+    def forbidden(*args, **kwargs):
+        raise AssertionError("exec/compile called")
+    src = ("10 LET A = 2\n20 LET B = A * 3 + 1\n30 LET C = 10 - A\n40 LET D = (A + 1) * (B - 1)\n"
+           '50 IF A < B THEN PRINT "lt" ELSE PRINT "ge"\n60 IF 3 = A + 1 THEN PRINT "eq"\n'
+           "70 IF (A + B) > 5 THEN GOTO 90\n80 PRINT 0\n90 IF C <> 8 THEN GOTO 10\n100 PRINT A, B, C, D\n")
+    program = parse(src)
+    out = StringIO()
+    with monkeypatch.context() as patch:
+        patch.setattr(builtins, "exec", forbidden)
+        patch.setattr(builtins, "compile", forbidden)
+        variables = ClosureProgram(program, stdout=out).run()
+    assert (out.getvalue(), variables) == compiled(src)
+    assert variables == {"A": 2, "B": 7, "C": 8, "D": 18}
+
+
+def test_literal_jumps_fuse_lines_into_blocks():
+    program = ClosureProgram(parse("10 PRINT 1\n20 LET A = 2\n30 GOSUB 60\n40 PRINT A\n50 END\n"
+                                   "60 LET A = 3\n70 RETURN\n"))
+    # Blocks start at the first line, after each jump and at each target.
+    assert [i for i, block in enumerate(program.blocks) if block] == [0, 3, 5]
+
+
+def test_computed_jumps_make_every_line_a_block():
+    src = "10 LET T = 40\n20 GOSUB T + 10\n30 GOTO T * 2\n40 PRINT 1\n50 PRINT 2\n60 RETURN\n80 PRINT 3\n"
+    out = StringIO()
+    program = ClosureProgram(parse(src), stdout=out)
+    assert all(program.blocks)
+    variables = program.run()
+    assert (out.getvalue(), variables) == compiled(src) == ("2\n3\n", {"T": 40})
@@ -0,0 +1,369 @@
+"""Transpiler tests: shape of the generated Python for each codegen mode."""
+import ast
+import traceback
+
+import pytest
+from io import StringIO
+
+from src.parser import parse
+from src.codegen import Transpiler, UndefinedLineWarning, transpile, transpile_ast
+from src.options import CompileOptions
+from src.runtime import io_builtins
+from compiler import run_source, compile_code
+
+
+TABLE = CompileOptions(dispatch="table")
+
+
+def test_chain_dispatch_is_default():
+    code = transpile(parse("PRINT 1\nEND"))
+    assert "if _pc == 0:" in code
+    assert "_table" not in code
+
+
+def test_table_dispatch_emits_block_functions():
+    code = transpile(parse("10 PRINT 1\n20 GOTO 10"), TABLE)
+    assert "def _block_0():" in code
+    assert "def _block_1():" in code
+    assert "_table = [_block_0, _block_1]" in code
+    assert "if _pc ==" not in code
+
+
+def test_table_dispatch_gosub_pushes_constant_return_point():
+    code = transpile(parse("10 GOSUB 30\n20 END\n30 RETURN"), TABLE)
+    assert "_gosub_stack.append(1)" in code
+    assert "return _gosub_stack.pop()" in code
+
+
+def test_table_dispatch_goto_out_of_for_body():
+    src = """
+FOR I = 1 TO 10
+  IF I = 3 THEN GOTO 100
+NEXT I
+100 PRINT I
+"""
+    out = StringIO()
+    run_source(src, stdin=StringIO(), stdout=out, options=TABLE)
+    assert out.getvalue() == "3\n"
+
+
+def test_unknown_dispatch_mode_rejected():
+    with pytest.raises(ValueError):
+        CompileOptions(dispatch="switch")
+
+
+FUSED = CompileOptions(fuse_blocks=True)
+
+
+def test_fusion_merges_lines_without_jump_targets():
+    t = Transpiler(FUSED)
+    t.transpile(parse("10 LET A = 1\n20 LET B = 2\n30 PRINT A + B\n40 GOTO 20"))
+    assert t._blocks == [[0], [1, 2, 3]]
+    assert t._line_index == {10: 0, 20: 1}
+
+
+def test_fusion_disabled_by_computed_target():
+    t = Transpiler(FUSED)
+    t.transpile(parse("10 LET A = 20\n20 GOTO A + 10\n30 END"))
+    assert t._blocks == [[0], [1], [2]]
+
+
+def test_fused_gosub_returns_to_next_line():
+    src = "10 GOSUB 100\n20 PRINT \"back\"\n30 END\n100 PRINT \"sub\"\n110 RETURN"
+    for dispatch in ("chain", "table"):
+        out = StringIO()
+        run_source(src, stdin=StringIO(), stdout=out,
+                   options=CompileOptions(dispatch=dispatch, fuse_blocks=True))
+        assert out.getvalue() == "sub\nback\n"
+
+
+def test_literal_targets_resolved_to_block_indices():
+    code = transpile(parse("10 GOSUB 30\n20 END\n30 GOTO 20"))
+    assert "_line_index.get" not in code
+    assert "_gosub_stack.append(1)" in code
+    assert "_pc = 1\n" in code.split("if _pc == 2:")[1]
+
+
+def test_computed_target_uses_runtime_lookup():
+    code = transpile(parse("10 LET A = 30\n20 GOTO A\n30 END"))
+    assert "_line_index.get(_num(_v(\"A\")), 2)" in code
+
+
+def test_undefined_target_warns_and_falls_through():
+    src = "10 GOTO 99\n20 PRINT \"next\""
+    with pytest.warns(UndefinedLineWarning, match="GOTO to undefined line 99 in line 10"):
+        out = StringIO()
+        run_source(src, stdin=StringIO(), stdout=out)
+    assert out.getvalue() == "next\n"
+
+
+LOCALS = CompileOptions(fast_locals=True)
+
+
+def test_fast_locals_compiles_variables_to_locals():
+    code = transpile(parse("LET A = B + 1\nINPUT C\nPRINT A"), LOCALS)
+    assert "def _main():" in code
+    assert "A = B = C = 0" in code
+    assert "A = (B + 1)" in code
+    assert "_v(" not in code and "_set(" not in code
+
+
+def test_fast_locals_table_blocks_declare_nonlocal():
+    code = transpile(parse("10 LET A = 1\n20 PRINT A\n30 GOTO 10"),
+                     CompileOptions(dispatch="table", fast_locals=True))
+    assert "nonlocal A" in code.split("def _block_0():")[1].split("def _block_1():")[0]
+    assert "nonlocal" not in code.split("def _block_1():")[1].split("def _block_2():")[0]
+
+
+@pytest.mark.parametrize("options", [None, LOCALS, CompileOptions(dispatch="table", fast_locals=True)])
+def test_run_source_returns_variable_snapshot(options):
+    src = "LET A = 2\nFOR I = 1 TO 3\nLET S = S + I\nNEXT I\nEND\nLET A = 99"
+    variables = run_source(src, stdin=StringIO(), stdout=StringIO(), options=options)
+    assert variables["A"] == 2
+    assert variables["S"] == 6
+    assert variables["I"] == 3
+
+
+def test_fast_locals_non_ascii_names_stay_distinct():
+    src = "LET ｘ = 1\nLET X = 2\nPRINT ｘ, X"
+    out = StringIO()
+    variables = run_source(src, stdin=StringIO(), stdout=out, options=LOCALS)
+    assert out.getvalue() == "12\n"
+    assert variables == {"Ｘ": 1, "X": 2}
+
+
+def test_specialize_types_drops_num_for_proven_ints():
+    src = "INPUT N\nLET K = 3\nFOR I = K TO N STEP 2\nNEXT I\nGOTO K * 10"
+    plain = transpile(parse(src))
+    typed = transpile(parse(src), CompileOptions(specialize_types=True))
+    assert "_for1_i = _num(_v(\"K\"))" in plain
+    assert "_for1_i = _v(\"K\")" in typed
+    assert "_for1_end = _num(_v(\"N\"))" in typed  # INPUT may yield a float
+    assert "_line_index.get((_v(\"K\") * 10)," in typed
+
+
+RANGE = CompileOptions(range_loops=True, fast_locals=True)
+
+
+def test_for_lowered_to_range():
+    code = transpile(parse("LET N = 10\nFOR I = N TO 1 STEP -2\nPRINT I\nNEXT I"), RANGE)
+    assert "for I in range(N, 0, -2):" in code
+    code = transpile(parse("LET N = 10\nFOR I = 1 TO N\nPRINT I\nNEXT I"), RANGE)
+    assert "for I in range(1, N + 1):" in code
+
+
+def test_for_falls_back_to_while_when_not_provable():
+    src = "INPUT N\nFOR I = 1 TO N\nNEXT I\nFOR J = 1 TO 3\nLET J = J + 1\nNEXT J\nFOR K = 1 TO 3 STEP N\nNEXT K"
+    code = transpile(parse(src), RANGE)
+    assert "range(" not in code
+    assert "while _for1_i <= _for1_end:" in code  # constant step: one-sided test
+    assert "while _for2_i <= _for2_end:" in code
+    assert "_for3_step = _num(N)" in code
+
+
+def test_range_loop_leaves_last_value():
+    src = "FOR I = 1 TO 3\nNEXT I\nFOR J = 5 TO 1\nNEXT J"
+    for options in (None, RANGE, CompileOptions(range_loops=True)):
+        variables = run_source(src, stdin=StringIO(), stdout=StringIO(), options=options)
+        assert variables["I"] == 3
+        assert variables.get("J", 0) == 0
+
+
+DCE = CompileOptions(eliminate_dead_code=True)
+
+
+def test_dead_code_elimination_drops_unreachable_and_rem_lines():
+    src = 'REM intro\n10 GOTO 30\n20 PRINT "dead"\n30 REM target\n40 PRINT "live"\n50 END\n60 PRINT "dead"'
+    t = Transpiler(DCE)
+    code = t.transpile(parse(src))
+    assert t._blocks == [[1], [4], [5]]
+    assert "dead" not in code and "REM" not in code
+    assert t._line_index[30] == t._line_index[40] == 1  # jump to a REM line lands on the next kept line
+
+
+def test_dead_code_elimination_keeps_everything_for_computed_jumps():
+    src = "10 LET A = 30\n20 GOTO A\n25 REM here\n30 PRINT 1"
+    t = Transpiler(DCE)
+    t.transpile(parse(src))
+    assert t._blocks == [[0], [1], [3]]
+    out = StringIO()
+    run_source(src, stdin=StringIO(), stdout=out, options=DCE)
+    assert out.getvalue() == "1\n"
+
+
+STRUCTURED = CompileOptions(dispatch="table", structured=True)
+
+
+def run(src, options):
+    out = StringIO()
+    run_source(src, stdin=StringIO(), stdout=out, options=options)
+    return out.getvalue()
+
+
+def test_structured_requires_table_dispatch():
+    with pytest.raises(ValueError):
+        CompileOptions(structured=True)
+
+
+def test_structured_goto_loop_becomes_while():
+    src = "10 LET I = I + 1\n20 IF I = 2 THEN GOTO 10\n30 IF I < 5 THEN GOTO 10\n40 PRINT I"
+    t = Transpiler(STRUCTURED)
+    code = t.transpile(parse(src))
+    assert len(t._blocks) == 1
+    assert "while True:" in code and "continue" in code and "break" in code
+    assert run(src, STRUCTURED) == run(src, None) == "5\n"
+
+
+def test_structured_skip_and_if_else():
+    src = ("10 INPUT A\n20 IF A > 0 THEN GOTO 50\n30 PRINT \"neg\"\n40 GOTO 60\n"
+           "50 PRINT \"pos\"\n60 IF A = 1 THEN GOTO 80\n70 PRINT \"not one\"\n80 END")
+    code = transpile(parse(src), STRUCTURED)
+    assert "else:" in code and "if not (" in code
+    assert "def _block_1" not in code
+    for stdin in ("1\n", "-1\n", "2\n"):
+        expected = StringIO()
+        run_source(src, stdin=StringIO(stdin), stdout=expected)
+        out = StringIO()
+        run_source(src, stdin=StringIO(stdin), stdout=out, options=STRUCTURED)
+        assert out.getvalue() == expected.getvalue()
+
+
+def test_structured_falls_back_to_dispatch_for_irreducible_jumps():
+    # 20 and 40 both enter the loop 30..50; a GOTO inside FOR can't be a `continue`.
+    src = ("10 IF A = 0 THEN GOTO 40\n20 LET A = A + 1\n30 PRINT A\n40 LET A = A + 2\n"
+           "50 IF A < 7 THEN GOTO 30\n60 FOR I = 1 TO 3: IF I = 2 THEN GOTO 80: NEXT I\n80 PRINT I")
+    t = Transpiler(STRUCTURED)
+    t.transpile(parse(src))
+    assert len(t._blocks) > 1
+    assert run(src, STRUCTURED) == run(src, TABLE)
+
+
+def test_structured_fast_locals_without_dispatcher():
+    src = "10 LET I = I + 1\n20 IF I < 3 THEN GOTO 10\n30 PRINT I"
+    code = transpile(parse(src), CompileOptions.for_level(2))
+    assert "_dispatch(" not in code.split("def _main")[1]
+    assert run(src, CompileOptions.for_level(2)) == "3\n"
+
+
+def test_structured_undefined_target_warns_once():
+    src = "10 GOTO 99\n20 PRINT 1"
+    with pytest.warns(UndefinedLineWarning) as record:
+        transpile(parse(src), STRUCTURED)
+    assert len(record) == 1
+
+
+def test_structured_keeps_dispatcher_for_gosub_into_own_segment():
+    src = "10 LET Y = Y + 1\n20 PRINT Y\n30 IF Y < 3 THEN GOSUB 10"
+    options = CompileOptions.for_level(2)
+    assert "_dispatch(" in transpile(parse(src), options).split("def _main")[1]
+    assert run(src, options) == run(src, None) == "1\n2\n3\n"
+
+
+
+@pytest.mark.parametrize("src, expected", [
+    ("10 GOTO 30 : GOSUB 40\n20 PRINT 1\n30 PRINT 3\n35 END\n40 RETURN", "3\n"),
+    ("10 GOTO 70 : GOSUB 110\n70 PRINT Y\n80 END\n110 LET Y = 2", "0\n"),
+    ("10 GOTO 4*10+0 : GOSUB 50\n20 PRINT 1\n40 PRINT 4\n45 END\n50 RETURN", "4\n"),
+])
+def test_structured_ignores_dead_gosub_after_goto(src, expected):
+    # The GOSUB never runs, so its return point is no entry and it is not emitted.
+    for options in (STRUCTURED, CompileOptions.for_level(2)):
+        assert run(src, options) == run(src, TABLE) == expected
+
+
+SUBS = CompileOptions(subroutine_functions=True)
+
+
+def test_subroutine_compiled_to_function_call():
+    src = "10 GOSUB 100\n20 IF A < 3 THEN GOSUB 100\n30 PRINT A\n40 END\n100 LET A = A + 2\n110 RETURN"
+    t = Transpiler(SUBS)
+    code = t.transpile(parse(src))
+    assert "def _sub_4():" in code and "_sub_4()" in code.split("def _sub_4():")[1]
+    assert "_gosub_stack.append" not in code
+    assert t._blocks == [[0], [1], [2], [3]]  # the subroutine's lines are in no block
+    for options in (SUBS, CompileOptions.for_level(1), CompileOptions.for_level(2)):
+        assert run(src, options) == run(src, None) == "4\n"
+
+
+def test_subroutine_end_and_unstructured_goto():
+    # 200's GOTO into the loop body at 230 fits no structured shape, so it stays on the stack.
+    src = ("10 GOSUB 100\n20 GOSUB 200\n30 END\n100 IF A = 0 THEN RETURN\n110 END\n"
+           "200 IF B = 0 THEN GOTO 230\n210 LET B = B + 1\n220 PRINT B\n230 LET B = B + 1\n"
+           "240 IF B < 5 THEN GOTO 210\n250 END")
+    t = Transpiler(SUBS)
+    code = t.transpile(parse(src))
+    assert list(t._subs) == [3]
+    assert "raise _End" in code and "_gosub_stack.append" in code
+    assert run(src, SUBS) == run(src, None) == "2\n4\n"
+
+
+def test_fused_subroutines_ignore_jumps_after_gosub():
+    # The GOTOs follow a GOSUB, so they never run and their targets start no block.
+    src = '10 GOSUB 100\n20 PRINT "A"\n30 GOSUB 200 : GOTO 20\n40 END\n100 RETURN\n200 RETURN'
+    for level in (1, 2):
+        assert run(src, CompileOptions.for_level(level)) == run(src, TABLE) == "A\n"
+    src = ("10 PRINT 1\n20 FOR I = 1 TO 2 : GOSUB 100 : GOTO 50 : NEXT I\n30 PRINT 3\n45 GOSUB 200\n"
+           "50 END\n100 PRINT I\n110 RETURN\n200 RETURN")
+    # -O1 uses chain dispatch, whose `continue` out of a FOR body stays in the
+    # loop (an older, separate problem), so there it is only compiled.
+    compile_code(src, CompileOptions.for_level(1))
+    assert run(src, CompileOptions.for_level(2)) == run(src, TABLE) == "1\n1\n3\n"
+
+
+AST_SOURCE = """10 INPUT N
+20 FOR I = 1 TO N STEP 2
+30 IF I = 3 THEN PRINT "three", I ELSE PRINT I
+40 NEXT I
+50 GOSUB 100
+60 IF N < 9 THEN GOTO 20
+70 LET X = RND(3 - N) + ABS(-N) : END
+100 LET N = N + 4
+110 RETURN
+"""
+
+
+@pytest.mark.parametrize("options", [
+    CompileOptions(), CompileOptions(dispatch="table", fast_locals=True),
+    CompileOptions.for_level(1), CompileOptions.for_level(2),
+], ids=["O0", "table-locals", "O1", "O2"])
+def test_ast_backend_builds_the_same_code_as_the_text(options):
+    def split(tree):
+        """(dump without the `_line_index` assignment, value of `_line_index`)"""
+        index = next(s for s in tree.body if isinstance(s, ast.Assign) and s.targets[0].id == "_line_index")
+        value = eval(compile(ast.Expression(index.value), "<test>", "eval"))
+        return ast.dump(ast.Module([s for s in tree.body if s is not index], [])), value
+
+    program = parse(AST_SOURCE)
+    tree = transpile_ast(program, options)
+    assert isinstance(tree, ast.Module)
+    assert split(tree) == split(ast.parse(transpile(program, options)))
+
+
+def test_ast_backend_line_numbers_are_basic_source_lines():
+    source = "10 LET A = 1\n\n20 LET B = 0\n30 PRINT A / B\n"
+    tree = transpile_ast(parse(source))
+    lines = {node.lineno for node in ast.walk(tree) if isinstance(node, ast.Expr)}
+    assert 4 in lines
+    code = compile_code(source, CompileOptions(backend="ast"))
+    with pytest.raises(ZeroDivisionError) as info:
+        exec(code, {"print": lambda *a, **k: None})
+    assert traceback.extract_tb(info.tb)[-1][:2] == ("<basic>", 4)
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        CompileOptions(backend="bytes")
+
+
+@pytest.mark.parametrize("options", [CompileOptions(), CompileOptions.for_level(1), CompileOptions.for_level(2)],
+                         ids=["O0", "O1", "O2"])
+def test_resumable_module_continues_a_run(options):
+    src = "10 LET A = 1\n20 LET I = I + 1\n30 LET B = B + A\n40 IF I < 3 THEN GOTO 20\n50 PRINT A, B\n"
+    t = Transpiler(options, resumable=True, resume_at=[2])
+    code = compile(t.transpile(parse(src)), "<basic>", "exec")
+    assert "_vars = {}" not in t.transpile(parse(src))
+    out, variables = StringIO(), {"A": 5, "I": 1}
+    # as if lines 10 and 20 had run with A = 5
+    exec(code, {**io_builtins(stdout=out), "_vars": variables, "_entry_pc": t.entries[2], "_entry_stack": []})
+    assert out.getvalue() == "515\n"
+    assert variables["B"] == 15 and variables["I"] == 3
@@ -1,8 +1,27 @@
-"""Pytest configuration and shared fixtures."""
+"""Pytest configuration and shared helpers."""
 import sys
+from io import StringIO
 from pathlib import Path
 
 # Add project root so "from src..." works
 root = Path(__file__).resolve().parent.parent
 if str(root) not in sys.path:
     sys.path.insert(0, str(root))
+
+from compiler import run_source
+from src.options import CompileOptions
+
+GOTO_LOOP = "10 LET I = I + 1\n20 LET S = S + I\n30 IF I < 500 THEN GOTO 10\n40 PRINT S\n"
+
+
+def compiled(source: str, stdin: str = "", options: CompileOptions = None) -> tuple:
+    """(output, variables) of `source` transpiled and exec'd, by default with
+    table dispatch: what every other engine must match."""
+    out = StringIO()
+    variables = run_source(source, StringIO(stdin), out, options or CompileOptions(dispatch="table"))
+    return out.getvalue(), variables
+
+
+def nonzero(variables: dict) -> dict:
+    # fast_locals and the VM report variables never assigned as 0
+    return {name: value for name, value in variables.items() if value != 0}
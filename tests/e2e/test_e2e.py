@@ -3,12 +3,18 @@ import pytest
 from io import StringIO
 
 from compiler import compile_source, run_source
+from src.options import CompileOptions, MAX_OPT_LEVEL
 
 
 def run_basic(source: str, stdin: str = "") -> str:
-    out = StringIO()
-    run_source(source, stdin=StringIO(stdin), stdout=out)
-    return out.getvalue()
+    """Run at every optimisation level; all levels must print the same thing."""
+    outputs = []
+    for level in range(MAX_OPT_LEVEL + 1):
+        out = StringIO()
+        run_source(source, stdin=StringIO(stdin), stdout=out, options=CompileOptions.for_level(level))
+        outputs.append(out.getvalue())
+    assert outputs == [outputs[0]] * len(outputs)
+    return outputs[0]
 
 
 def test_hello():
@@ -101,3 +107,28 @@ def test_compile_returns_python():
     assert "def _v(" in code
     assert "while _pc" in code
     assert "print(" in code
+
+
+def test_nested_for_loops():
+    src = """
+FOR I = 1 TO 2
+  FOR J = 3 TO 1 STEP -1
+    PRINT I, J
+  NEXT J
+NEXT I
+PRINT I, J
+"""
+    assert run_basic(src) == "13\n12\n11\n23\n22\n21\n21\n"
+
+
+def test_cli_optimisation_level(tmp_path, capsys):
+    from compiler import main
+    prog = tmp_path / "prog.bas"
+    prog.write_text("FOR I = 1 TO 3\nPRINT I * 1 + 0\nNEXT I\n")
+    assert main(["-O2", str(prog)]) == 0
+    assert capsys.readouterr().out == "1\n2\n3\n"
+
+
+def test_unary_minus_and_comparisons():
+    src = "LET A = 3\nPRINT -A + 5\nPRINT 8 / -2 / 2\nPRINT (A > 2) = (A < 4)\nEND"
+    assert run_basic(src).split() == ["2", "-2.0", "True"]
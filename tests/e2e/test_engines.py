@@ -0,0 +1,112 @@
+"""Every engine that does not exec the whole program must match compiled code."""
+from io import StringIO
+
+import pytest
+
+from bench.programs import SHAPES, generate
+from compiler import main, run_source
+from src.bytecode import Bytecode, compile_program, run_bytecode
+from src.closures import ClosureProgram
+from src.interpreter import Interpreter
+from src.options import CompileOptions
+from src.parser import parse
+from src.tiered import TieredEngine
+from tests.conftest import GOTO_LOOP, compiled, nonzero
+
+ENGINES = ("interpreter", "tiered", "closure", "vm")
+
+
+def run(engine: str, source: str, stdin: str = "", options: CompileOptions = None) -> tuple:
+    """(output, variables) of `source` on `engine`. The tiered engine tiers up
+    after a few jumps or iterations, and bytecode goes through its serialised form."""
+    program, out = parse(source), StringIO()
+    if engine == "interpreter":
+        variables = Interpreter(program, StringIO(stdin), out, options).run()
+    elif engine == "tiered":
+        variables = TieredEngine(program, StringIO(stdin), out, options, hot_line=3, hot_loop=2).run()
+    elif engine == "closure":
+        variables = ClosureProgram(program, StringIO(stdin), out, options).run()
+    else:
+        bytecode = compile_program(program, options)
+        variables = run_bytecode(Bytecode.from_bytes(bytecode.to_bytes()), StringIO(stdin), out)
+    return out.getvalue(), nonzero(variables)
+
+
+def expected(source: str, stdin: str = "") -> tuple:
+    out, variables = compiled(source, stdin)
+    return out, nonzero(variables)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_matches_compiled_code(engine):
+    src = ('10 PRINT "A", 1 + 2 * 3, 7 / 2, -(2 - 5), +4\n20 INPUT X, Y\n30 LET Z = -X + ABS(Y - 10)\n'
+           '40 IF Z > 2 THEN PRINT "big" ELSE PRINT "small"\n50 LET Q = 4.0 / 2\n60 GOTO Q * 40\n'
+           '70 PRINT "skipped"\n80 PRINT Z, Q, 3 < X, X = 3, "a" <> "b", 1 = 1.0\n90 LET R = RND(1)\n')
+    assert run(engine, src, "3\n2.5\n") == expected(src, "3\n2.5\n")
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_for_loops(engine):
+    src = ("10 FOR I = 10 TO 1 STEP -3\n20 PRINT I\n30 NEXT I\n"
+           "40 FOR J = 1 TO 5 STEP 0\n50 PRINT J\n60 NEXT J\n"
+           "70 FOR K = 1 TO 2 STEP 0.5\n80 PRINT K\n90 NEXT K\n"
+           "100 LET D = -2\n110 FOR M = 5 TO 1 STEP D\n120 LET M = M + 0\n130 PRINT M\n140 NEXT M\n")
+    assert run(engine, src) == expected(src) == ("10\n7\n4\n1\n1\n1.5\n2.0\n5\n3\n1\n",
+                                                 {"I": 1, "K": 2.0, "D": -2, "M": 1})
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("src, result", [
+    ("10 FOR I = 1 TO 5\n20 PRINT I\n30 IF I = 2 THEN GOTO 60 ELSE PRINT 0\n40 NEXT I\n50 PRINT 99\n"
+     "60 GOSUB I * 50\n70 LET T = 1000\n80 GOSUB T\n90 END\n100 PRINT I\n110 RETURN\n",
+     ("1\n0\n2\n2\n", {"I": 2, "T": 1000})),
+    ("10 FOR I = 1 TO 5\n20 PRINT I\n30 IF I = 2 THEN GOTO 60\n40 NEXT I\n50 PRINT 99\n"
+     "60 FOR J = 1 TO 3\n70 GOSUB 100\n80 NEXT J\n90 END\n100 PRINT J\n110 RETURN\n",
+     ("1\n2\n1\n", {"I": 2, "J": 1})),
+])
+def test_jumps(engine, src, result):
+    assert run(engine, src) == expected(src) == result
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("src, error", [
+    ("10 RETURN\n", IndexError),
+    ("10 PRINT 1 / 0\n", ZeroDivisionError),
+    ("10 PRINT FOO(1)\n", NameError),
+    ('10 LET A = "x" - 1\n', TypeError),
+])
+def test_runtime_errors(engine, src, error):
+    with pytest.raises(error):
+        run(engine, src)
+    with pytest.raises(error):
+        compiled(src)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("shape", sorted(SHAPES))
+def test_generated_programs(engine, shape):
+    for seed in range(3):
+        workload = generate(shape, 80, seed)
+        for options in (None, CompileOptions.for_level(1)):
+            assert run(engine, workload.source, workload.stdin, options) == \
+                expected(workload.source, workload.stdin)
+
+
+@pytest.mark.parametrize("engine", ENGINES[1:])
+@pytest.mark.parametrize("level", [0, 2])
+def test_run_source_engine(engine, level):
+    variables = run_source(GOTO_LOOP, stdout=StringIO(), options=CompileOptions.for_level(level), engine=engine)
+    assert nonzero(variables) == {"I": 500, "S": 125250}
+
+
+def test_run_source_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown engine"):
+        run_source(GOTO_LOOP, engine="jit")
+
+
+@pytest.mark.parametrize("engine", ENGINES[1:])
+def test_cli(engine, tmp_path, capsys):
+    path = tmp_path / "prog.bas"
+    path.write_text(GOTO_LOOP)
+    assert main(["--engine", engine, str(path)]) == 0
+    assert capsys.readouterr().out == "125250\n"
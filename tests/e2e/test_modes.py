@@ -0,0 +1,78 @@
+"""Every codegen mode must produce the same output as the default on the samples."""
+import random
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+from compiler import ENGINES, run_source
+from src.codegen import TranspileError, UndefinedLineWarning
+from src.options import CompileOptions
+
+SAMPLES = Path(__file__).resolve().parent.parent.parent / "samples"
+
+# sample file -> stdin transcript
+CASES = {
+    "hello.bas": "",
+    "add.bas": "",
+    "input_echo.bas": "42\n",
+    "condition.bas": "-3\n",
+    "fornext.bas": "",
+    "fibonacci.bas": "12\n",
+    "gosub.bas": "",
+    "city_game.bas": "1\n5\n2\n10\n3\n1\n4\n1\n5\n5\n5\n6\n7\n",
+    "city_game_cn.bas": "1\n5\n2\n10\n3\n1\n4\n1\n5\n5\n5\n6\n7\n",
+}
+
+MODES = {
+    "table": CompileOptions(dispatch="table"),
+    "fused": CompileOptions(fuse_blocks=True),
+    "table-fused": CompileOptions(dispatch="table", fuse_blocks=True),
+    "locals": CompileOptions(fast_locals=True),
+    "table-fused-locals": CompileOptions(dispatch="table", fuse_blocks=True, fast_locals=True),
+    "typed-locals": CompileOptions(fast_locals=True, specialize_types=True),
+    "range": CompileOptions(range_loops=True),
+    "range-locals": CompileOptions(range_loops=True, fast_locals=True, specialize_types=True),
+    "dce": CompileOptions(eliminate_dead_code=True),
+    "table-dce": CompileOptions(dispatch="table", eliminate_dead_code=True),
+    "structured": CompileOptions(dispatch="table", structured=True),
+    "structured-dce-locals": CompileOptions(dispatch="table", structured=True,
+                                            eliminate_dead_code=True, fast_locals=True),
+    "subs": CompileOptions(subroutine_functions=True),
+    "fused-subs-locals": CompileOptions(fuse_blocks=True, subroutine_functions=True, fast_locals=True),
+    "structured-subs": CompileOptions(dispatch="table", structured=True, subroutine_functions=True),
+    "O1": CompileOptions.for_level(1),
+    "O2": CompileOptions.for_level(2),
+    "ast": CompileOptions(backend="ast"),
+    "ast-O1": CompileOptions.for_level(1, backend="ast"),
+    "ast-O2": CompileOptions.for_level(2, backend="ast"),
+}
+
+
+def run_sample(name: str, options: CompileOptions = None, engine: str = "exec") -> str:
+    source = (SAMPLES / name).read_text(encoding="utf-8")
+    out = StringIO()
+    random.seed(1234)
+    run_source(source, stdin=StringIO(CASES[name]), stdout=out, options=options, engine=engine)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("mode", sorted(MODES))
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_mode_matches_default(name, mode):
+    assert run_sample(name, MODES[mode]) == run_sample(name)
+
+
+@pytest.mark.parametrize("engine", [e for e in ENGINES if e != "exec"])
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_engine_matches_default(name, engine):
+    assert run_sample(name, engine=engine) == run_sample(name)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engines_report_undefined_lines_alike(engine):
+    src = "10 GOSUB 99\n20 PRINT 1\n30 END\n40 RETURN\n"
+    with pytest.warns(UndefinedLineWarning, match="^GOSUB to undefined line 99 in line 10$"):
+        run_source(src, stdout=StringIO(), engine=engine)
+    with pytest.raises(TranspileError, match="^GOSUB to undefined line 99 in line 10$"):
+        run_source(src, stdout=StringIO(), options=CompileOptions(strict_jumps=True), engine=engine)
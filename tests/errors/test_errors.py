@@ -2,6 +2,8 @@
 import pytest
 from src.lexer import tokenize, LexerError
 from src.parser import parse, ParseError
+from src.codegen import TranspileError
+from src.options import CompileOptions
 from compiler import compile_source
 
 
@@ -35,3 +37,9 @@ def test_parser_for_without_next():
 def test_compile_valid_does_not_raise():
     compile_source("PRINT 1\nEND")
     compile_source("LET X = 1\nPRINT X\nEND")
+
+
+def test_strict_jumps_undefined_gosub():
+    with pytest.raises(TranspileError) as exc_info:
+        compile_source("10 GOSUB 500\n20 END", CompileOptions(strict_jumps=True))
+    assert "GOSUB to undefined line 500" in str(exc_info.value)
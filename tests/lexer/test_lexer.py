@@ -1,8 +1,14 @@
 """Lexer tests: token sequences and error cases."""
+import random
+from io import StringIO
+from pathlib import Path
+
 import pytest
-from src.lexer import tokenize, LexerError
+from src.lexer import tokenize, stream_tokens, Lexer, RegexLexer, LexerError
 from src.tokens import Token, TokenType
 
+SAMPLES = Path(__file__).resolve().parent.parent.parent / "samples"
+
 
 def test_empty():
     tokens = tokenize("")
@@ -91,3 +97,70 @@ def test_lexer_error_unterminated_string():
 def test_lexer_error_unexpected_char():
     with pytest.raises(LexerError):
         tokenize("PRINT @ 1")
+
+
+def test_tokens_have_no_instance_dict():
+    assert not hasattr(tokenize("PRINT 1")[0], "__dict__")
+
+
+def scan(lexer_class, source):
+    """Tokens (with value types) or the LexerError, for comparing lexers."""
+    try:
+        return [(t, type(t.value)) for t in lexer_class(source).tokenize()]
+    except LexerError as e:
+        return (e.message, e.line, e.column)
+
+
+@pytest.mark.parametrize("source", [
+    "10 PRINT \"Hi\", A1 : GOTO 10\r\n20 END",
+    "10 REM   spaced out  \n20 rem\n30 REMARK = 1\nREM",
+    "A=1.5+2.\nB=1..2",
+    "1.٣ + ٣ + X٣ + 城市 + REMé + 5x",
+    "\"esc \\\" \\n \\\nnext\" 'it''s'",
+    "PRINT 1\x00 PRINT 2",
+    "\"nul\x00\"",
+    "\"open\nPRINT",
+    "PRINT @",
+    "  \t",
+])
+def test_regex_lexer_matches_reference(source):
+    assert scan(RegexLexer, source) == scan(Lexer, source)
+
+
+@pytest.mark.parametrize("path", sorted(SAMPLES.glob("*.bas")), ids=lambda p: p.name)
+def test_regex_lexer_matches_reference_on_samples(path):
+    source = path.read_text(encoding="utf-8")
+    assert scan(RegexLexer, source) == scan(Lexer, source)
+
+
+def test_regex_lexer_matches_reference_on_random_text():
+    rng = random.Random(13)
+    alphabet = list("09.aRrEMm_ \t\r\n\"'\\<>=+-*/(),:;\x00é城٣") + ["REM", "GOTO", "1.5"]
+    for _ in range(2000):
+        source = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+        assert scan(RegexLexer, source) == scan(Lexer, source), repr(source)
+
+
+def scan_stream(source, chunk_size):
+    try:
+        return [(t, type(t.value)) for t in stream_tokens(StringIO(source), chunk_size)]
+    except LexerError as e:
+        return (e.message, e.line, e.column)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 1 << 16])
+@pytest.mark.parametrize("source", [
+    "10 PRINT 1\n20 PRINT 2\n",
+    "10 PRINT \"a \\\nb\\\n\" : REM x\n20 END",
+    "PRINT 1\n\x00\nPRINT 2\n",
+    "10 PRINT 1\n20 \"open\n30 END",
+    "",
+])
+def test_stream_tokens_matches_tokenize(source, chunk_size):
+    assert scan_stream(source, chunk_size) == scan(RegexLexer, source)
+
+
+@pytest.mark.parametrize("path", sorted(SAMPLES.glob("*.bas")), ids=lambda p: p.name)
+def test_stream_tokens_matches_tokenize_on_samples(path):
+    source = path.read_text(encoding="utf-8")
+    assert scan_stream(source, 64) == scan(RegexLexer, source)
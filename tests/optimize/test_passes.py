@@ -0,0 +1,91 @@
+"""Optimisation pass tests: AST in, simpler AST out, same behaviour."""
+import pytest
+from io import StringIO
+
+from src.parser import parse
+from src.ast_nodes import (
+    LetStmt, PrintStmt, IfStmt, NumberExpr, StringExpr, VarExpr, BinaryOpExpr, UnaryOpExpr,
+)
+from src.optimize import (
+    Pass, PassManager, optimize,
+    ConstantFolding, AlgebraicSimplification, ConstantBranchFolding,
+)
+from src.options import CompileOptions
+from compiler import compile_source, run_source
+
+
+def first_value(source: str, *passes: Pass):
+    program = PassManager(passes).run(parse(source))
+    return program.lines[-1].statements[0].value
+
+
+def test_constant_folding():
+    assert first_value("LET A = 2 * 3 + 4", ConstantFolding()) == NumberExpr(10)
+    assert first_value("LET A = 7 / 2", ConstantFolding()) == NumberExpr(3.5)
+    assert first_value("LET A = (1 + 2) * X", ConstantFolding()) == BinaryOpExpr("*", NumberExpr(3), VarExpr("X"))
+    assert first_value('LET A = "AB" + "C"', ConstantFolding()) == StringExpr("ABC")
+    assert first_value("LET A = -(4)", ConstantFolding()) == NumberExpr(-4)
+
+
+def test_constant_folding_leaves_runtime_errors_alone():
+    assert isinstance(first_value("LET A = 1 / 0", ConstantFolding()), BinaryOpExpr)
+    assert isinstance(first_value('LET A = "X" - 1', ConstantFolding()), BinaryOpExpr)
+
+
+def test_identity_simplification_guarded_by_types():
+    passes = (ConstantFolding(), AlgebraicSimplification())
+    assert first_value("LET B = 2\nLET A = B * 1 + 0", *passes) == VarExpr("B")
+    assert first_value("LET B = 2\nLET A = -(-B)", *passes) == VarExpr("B")
+    # B may be a string: "x" * 1 is fine but must stay a multiplication of a string
+    assert isinstance(first_value('LET B = "x"\nLET A = B * 1', *passes), BinaryOpExpr)
+    # B may be a float: -0.0 + 0 is 0.0, so + 0 stays
+    assert isinstance(first_value("LET B = 0.5\nLET A = B + 0", *passes), BinaryOpExpr)
+
+
+def test_constant_if_folded_to_taken_branch():
+    program = optimize(parse('IF 2 * 2 = 4 THEN PRINT "yes" ELSE PRINT "no"\nIF 1 > 2 THEN PRINT "x"'))
+    first, second = program.lines
+    assert isinstance(first.statements[0], PrintStmt)
+    assert first.statements[0].items == [StringExpr("yes")]
+    assert second.statements == []
+
+
+def test_nested_vanishing_if_keeps_outer_condition():
+    program = optimize(parse("IF A > 0 THEN IF 1 = 2 THEN PRINT 1"))
+    outer = program.lines[0].statements[0]
+    assert isinstance(outer, IfStmt) and isinstance(outer.then_stmt, IfStmt)
+
+
+def test_custom_pass_plugs_into_manager():
+    class Uppercase(Pass):
+        name = "uppercase-strings"
+
+        def run(self, program):
+            for line in program.lines:
+                for s in line.statements:
+                    if isinstance(s, PrintStmt):
+                        s.items = [StringExpr(i.value.upper()) if isinstance(i, StringExpr) else i
+                                   for i in s.items]
+            return program
+
+    program = PassManager().add(ConstantFolding()).add(Uppercase()).run(parse('PRINT "ab", 1 + 2'))
+    assert program.lines[0].statements[0].items == [StringExpr("AB"), NumberExpr(3)]
+
+
+def test_opt_level_from_compile_source():
+    assert "print(7, end='')" in compile_source("PRINT 3 + 4", CompileOptions(opt_level=1))
+    assert "print((3 + 4), end='')" in compile_source("PRINT 3 + 4")
+
+
+@pytest.mark.parametrize("level", [1, 2])
+def test_levels_match_unoptimised_output(level):
+    src = 'LET X = 2 * 3 + 0\nIF 1 = 1 THEN PRINT X * 1\nIF 1 = 2 THEN REM never\nLET S = "a" + "b"\nPRINT S, 10 / 4'
+    plain, optimised = StringIO(), StringIO()
+    run_source(src, stdin=StringIO(), stdout=plain)
+    run_source(src, stdin=StringIO(), stdout=optimised, options=CompileOptions.for_level(level))
+    assert optimised.getvalue() == plain.getvalue() == "6\nab2.5\n"
+
+
+def test_for_level_rejects_unknown_level():
+    with pytest.raises(ValueError):
+        CompileOptions.for_level(3)
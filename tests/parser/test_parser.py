@@ -1,9 +1,13 @@
 """Parser tests: valid programs produce AST, invalid raise ParseError."""
+from io import StringIO
+
 import pytest
-from src.parser import parse, ParseError
+from src.lexer import tokenize
+from src.parser import Parser, parse, ParseError
 from src.ast_nodes import (
     Program, Line, PrintStmt, LetStmt, InputStmt, IfStmt, GotoStmt,
-    EndStmt, ForStmt, NumberExpr, StringExpr, VarExpr, BinaryOpExpr,
+    EndStmt, ForStmt, NumberExpr, StringExpr, VarExpr, BinaryOpExpr, UnaryOpExpr, BuiltinCallExpr,
+    iter_exprs, iter_stmts, stmt_exprs,
 )
 
 
@@ -78,3 +82,81 @@ def test_parse_error_missing_then():
 def test_parse_error_missing_equals_let():
     with pytest.raises(ParseError):
         parse("LET A 1")
+
+
+def test_parse_file_matches_text():
+    source = "10 FOR I = 1 TO 3\n20 PRINT I\n30 NEXT I\n40 IF A < 1 THEN GOTO 10\nEND"
+    assert parse(StringIO(source)) == parse(source)
+
+
+def test_parser_reads_any_token_iterable():
+    source = "LET A = 1\nPRINT A"
+    assert Parser(iter(tokenize(source))).parse() == parse(source)
+
+
+def test_parse_file_error():
+    with pytest.raises(ParseError):
+        parse(StringIO("LET A = 1\nLET B 1"))
+
+
+def test_nodes_have_no_instance_dict():
+    program = parse("10 FOR I = 1 TO 2\n20 IF -I < 0 THEN PRINT LEN(\"A\"), I\n30 NEXT I")
+    stmts = list(iter_stmts([s for line in program.lines for s in line.statements]))
+    exprs = [e for s in stmts for top in stmt_exprs(s) for e in iter_exprs(top)]
+    assert len(stmts) == 3 and len(exprs) == 8
+    assert all(not hasattr(n, "__dict__") for n in [program, *program.lines, *stmts, *exprs])
+
+
+def expr(text):
+    return parse("PRINT " + text).lines[0].statements[0].items[0]
+
+
+def test_parse_precedence():
+    a, b, c = VarExpr("A"), VarExpr("B"), VarExpr("C")
+    assert expr("A + B * C") == BinaryOpExpr("+", a, BinaryOpExpr("*", b, c))
+    assert expr("A - B - C") == BinaryOpExpr("-", BinaryOpExpr("-", a, b), c)
+    assert expr("(A + B) / C") == BinaryOpExpr("/", BinaryOpExpr("+", a, b), c)
+    assert expr("A < B + C") == BinaryOpExpr("<", a, BinaryOpExpr("+", b, c))
+    assert expr("A = B <> C") == BinaryOpExpr("<>", BinaryOpExpr("=", a, b), c)
+
+
+def test_parse_unary_minus():
+    a, b = VarExpr("A"), VarExpr("B")
+    assert expr("-A + B") == BinaryOpExpr("+", UnaryOpExpr("-", a), b)
+    assert expr("A / -B / 2") == BinaryOpExpr("/", BinaryOpExpr("/", a, UnaryOpExpr("-", b)), NumberExpr(2))
+    assert expr("- -A") == UnaryOpExpr("-", UnaryOpExpr("-", a))
+    assert expr("+A * +B") == BinaryOpExpr("*", a, b)
+
+
+def test_parse_builtin_calls():
+    assert expr("F()") == BuiltinCallExpr("F", [])
+    assert expr("F((1), G(2, 3) + 1)") == BuiltinCallExpr("F", [
+        NumberExpr(1), BinaryOpExpr("+", BuiltinCallExpr("G", [NumberExpr(2), NumberExpr(3)]), NumberExpr(1))])
+
+
+def test_parse_if_comparison_operands():
+    s = parse("IF (A > B) = (C > 1) THEN PRINT 1").lines[0].statements[0]
+    assert isinstance(s, IfStmt) and s.relop == "="
+    assert s.left == BinaryOpExpr(">", VarExpr("A"), VarExpr("B"))
+    with pytest.raises(ParseError, match="Expected THEN"):
+        parse("IF A > B = C THEN PRINT 1")
+
+
+def test_parse_deep_expressions():
+    depth = 20000  # far past the recursion limit
+    assert expr("(" * depth + "A" + ")" * depth) == VarExpr("A")
+    assert expr("F(" * depth + "A" + ")" * depth) is not None
+    assert expr(" + ".join(["A"] * depth)).op == "+"
+
+
+@pytest.mark.parametrize("text, message", [
+    ("(A", "Expected )"),
+    ("F(A B)", "Expected )"),
+    ("(A, B)", "Expected )"),
+    ("A +", "Expected expression"),
+    ("F(A,)", "Expected expression"),
+])
+def test_parse_expression_errors(text, message):
+    with pytest.raises(ParseError) as e:
+        parse("PRINT " + text)
+    assert e.value.message == message
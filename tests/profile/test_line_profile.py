@@ -0,0 +1,88 @@
+"""Line profiler tests."""
+import json
+from io import StringIO
+
+import pytest
+
+from compiler import compile_source, main, profile_source, run_source
+from src.line_profile import LineProfile, LineStats
+from src.options import CompileOptions
+
+SRC = (
+    "10 LET S = 0\n"
+    "20 LET I = I + 1\n"
+    "30 LET S = S + I\n"
+    "40 IF I < 5 THEN GOTO 20\n"
+    "50 GOSUB 100\n"
+    "60 PRINT S\n"
+    "70 END\n"
+    "100 LET K = K + 1\n"
+    "110 RETURN\n"
+)
+COUNTS = {10: 1, 20: 5, 30: 5, 40: 5, 50: 1, 60: 1, 70: 1, 100: 1, 110: 1}
+
+MODES = [
+    CompileOptions(),
+    CompileOptions(dispatch="table", fuse_blocks=True),
+    CompileOptions.for_level(1),
+    CompileOptions.for_level(2),
+    CompileOptions.for_level(2, backend="ast"),
+]
+
+
+@pytest.mark.parametrize("options", MODES)
+def test_counts_per_line(options):
+    out = StringIO()
+    profile = profile_source(SRC, stdout=out, options=options)
+    assert out.getvalue() == "15\n"
+    assert {s.line: s.count for s in profile.lines} == COUNTS
+    assert all(s.time >= 0 for s in profile.lines)
+    assert profile.total_time == pytest.approx(sum(s.time for s in profile.lines))
+
+
+def test_hottest_line_first():
+    src = "10 LET A = 1\n20 FOR I = 1 TO 20000\n30 LET A = A + I\n40 NEXT I\n50 PRINT A\n"
+    profile = profile_source(src, stdout=StringIO())
+    assert profile.lines[0].line == 20  # the FOR line holds its whole loop
+    assert [s.time for s in profile.lines] == sorted((s.time for s in profile.lines), reverse=True)
+    assert profile[20].count == 1
+    with pytest.raises(KeyError):
+        profile[30]
+
+
+def test_unnumbered_lines_use_source_lines():
+    profile = profile_source("LET A = 1\nPRINT A\n", stdout=StringIO())
+    assert {s.line: s.count for s in profile.lines} == {1: 1, 2: 1}
+
+
+def test_no_instrumentation_when_off():
+    python = compile_source(SRC)
+    assert "_line(" not in python and "_clock" not in python
+    assert "_line(" in compile_source(SRC, CompileOptions(profile_lines=True))
+    assert "_line_profile" not in run_source(SRC, stdout=StringIO())
+
+
+def test_report_and_json():
+    profile = LineProfile.from_counters({10: [1, 0.5], 20: [3, 1.5]})
+    assert profile.lines == [LineStats(20, 3, 1.5), LineStats(10, 1, 0.5)]
+    rows = profile.report().splitlines()
+    assert rows[1].split() == ["20", "3", "1500.000", "75.0%"]
+    assert rows[-1].split() == ["total", "4", "2000.000"]
+    assert len(profile.report(limit=1).splitlines()) == 3
+    data = json.loads(profile.to_json())
+    assert data == {"total_time": 2.0, "lines": [{"line": 20, "count": 3, "time": 1.5},
+                                                 {"line": 10, "count": 1, "time": 0.5}]}
+
+
+@pytest.mark.parametrize("fmt", ["text", "json"])
+def test_cli_profile(tmp_path, capsys, fmt):
+    path = tmp_path / "prog.bas"
+    path.write_text(SRC)
+    assert main(["--profile", "--profile-format", fmt, "-O", "2", str(path)]) == 0
+    captured = capsys.readouterr()
+    assert captured.out == "15\n"
+    if fmt == "json":
+        counts = {entry["line"]: entry["count"] for entry in json.loads(captured.err)["lines"]}
+    else:
+        counts = {int(row.split()[0]): int(row.split()[1]) for row in captured.err.splitlines()[1:-1]}
+    assert counts == COUNTS
@@ -0,0 +1 @@
+"""Compile statistics tests."""
@@ -0,0 +1,100 @@
+"""Compile statistics tests."""
+import json
+import pstats
+from io import StringIO
+
+import pytest
+
+from compiler import compile_code, compile_source, main
+from src.cache import CompileCache
+from src.codegen import Transpiler
+from src.lexer import tokenize
+from src.options import CompileOptions
+from src.parser import parse
+from src.stats import PHASES, CompileStats, count_nodes
+
+SRC = "10 FOR I = 1 TO 3\n20 PRINT I * 2\n30 NEXT I\n40 IF I > 2 THEN GOTO 60\n50 PRINT -1\n60 END\n"
+
+
+def test_count_nodes():
+    # program, line, PRINT, its binary op and both operands
+    assert count_nodes(parse("PRINT A + 1")) == 6
+    # IF and the statement after THEN are both counted
+    assert count_nodes(parse("IF A > 1 THEN LET B = 2")) == 7
+
+
+def test_compile_source_stats():
+    options = CompileOptions(dispatch="table")
+    stats = CompileStats()
+    python = compile_source(SRC, options, stats=stats)
+    assert python == compile_source(SRC, options)
+    assert list(stats.times) == ["lex", "parse", "optimize", "transpile"]
+    assert all(t >= 0 for t in stats.times.values())
+    assert stats.tokens == len(tokenize(SRC))
+    assert stats.nodes == count_nodes(parse(SRC))
+    transpiler = Transpiler(options)
+    transpiler.transpile(parse(SRC))
+    assert stats.blocks == transpiler.blocks > 1
+    assert stats.source_size == len(python)
+    assert stats.bytecode_size == 0 and stats.peak_memory is None and stats.cache_hit is None
+
+
+@pytest.mark.parametrize("backend", ["text", "ast"])
+def test_compile_code_stats(backend):
+    stats = CompileStats()
+    compile_code(SRC, CompileOptions(backend=backend), stats=stats)
+    assert list(stats.times) == list(PHASES)
+    assert stats.bytecode_size > 0
+    assert (stats.source_size > 0) == (backend == "text")
+
+
+def test_stats_when_streaming_a_file():
+    stats = CompileStats()
+    assert compile_source(StringIO(SRC), stats=stats) == compile_source(SRC)
+    assert stats.tokens == len(tokenize(SRC))
+    assert stats.times["lex"] >= 0 and stats.times["parse"] >= 0
+
+
+def test_stats_with_cache():
+    cache = CompileCache()
+    first, second = CompileStats(), CompileStats()
+    compile_code(SRC, cache=cache, stats=first)
+    compile_code(SRC, cache=cache, stats=second)
+    assert first.cache_hit is False and "compile" in first.times
+    assert second.cache_hit is True and second.times == {}
+    assert "cache hit" in second.report()
+
+
+def test_trace_memory():
+    stats = CompileStats(trace_memory=True)
+    compile_code(SRC, stats=stats)
+    assert stats.peak_memory > 0
+    assert "peak memory" in stats.report()
+
+
+def test_profile_phase():
+    stats = CompileStats(profile=["parse"])
+    compile_source(SRC, stats=stats)
+    assert list(stats.profiles) == ["parse"]
+    out = StringIO()
+    pstats.Stats(stats.profiles["parse"], stream=out).print_stats()
+    assert "(parse)" in out.getvalue() and "_scan" not in out.getvalue()
+    with pytest.raises(ValueError):
+        CompileStats(profile=["link"])
+
+
+def test_as_dict_is_json():
+    stats = CompileStats()
+    compile_code(SRC, stats=stats)
+    d = json.loads(json.dumps(stats.as_dict()))
+    assert d["tokens"] == stats.tokens and set(d["times"]) == set(PHASES)
+
+
+def test_cli_stats(tmp_path, capsys):
+    path = tmp_path / "p.bas"
+    path.write_text(SRC)
+    assert main(["--stats", "--profile-phase", "transpile", str(path)]) == 0
+    captured = capsys.readouterr()
+    assert captured.out.split() == ["2", "4", "6"]
+    assert "transpile" in captured.err and "tokens" in captured.err
+    assert "cProfile of transpile" in captured.err
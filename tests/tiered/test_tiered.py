@@ -0,0 +1,98 @@
+"""Tiered engine tests."""
+from io import StringIO
+
+import pytest
+
+from compiler import main
+from src.options import CompileOptions
+from src.parser import parse
+from src.tiered import TieredEngine
+from tests.conftest import GOTO_LOOP, compiled, nonzero
+
+FOR_LOOP = "10 FOR I = 1 TO 3000\n20 LET S = S + I\n30 NEXT I\n40 PRINT S\n"
+SUB_LOOP = ("10 LET I = I + 1\n20 GOSUB 100\n30 IF I < 300 THEN GOTO 10\n40 PRINT S\n50 END\n"
+            "100 LET S = S + I\n110 GOSUB 200\n120 RETURN\n200 LET K = K + 1\n210 RETURN\n")
+
+
+def tiered(source: str, stdin: str = "", options: CompileOptions = None, **thresholds):
+    out = StringIO()
+    engine = TieredEngine(parse(source), StringIO(stdin), out, options, **thresholds)
+    variables = engine.run()
+    return out.getvalue(), variables, engine.events
+
+
+def test_short_run_is_never_compiled():
+    out, variables, events = tiered(GOTO_LOOP, hot_line=1000)
+    assert (out, variables) == compiled(GOTO_LOOP)
+    assert events == []
+
+
+def test_hot_goto_loop_switches_at_its_head():
+    out, variables, events = tiered(GOTO_LOOP, hot_line=50)
+    assert events == [("program", 0)]
+    assert (out, nonzero(variables)) == compiled(GOTO_LOOP)
+
+
+def test_hot_for_loop_compiles_the_rest_of_the_loop():
+    out, variables, events = tiered(FOR_LOOP, hot_loop=100)
+    assert events[0] == ("loop", 0)
+    assert (out, variables) == compiled(FOR_LOOP)
+
+
+def test_for_loop_that_jumps_is_not_compiled_alone():
+    src = "10 FOR I = 1 TO 3000\n20 IF I = 2000 THEN GOTO 50\n30 LET S = S + I\n40 NEXT I\n50 PRINT S\n"
+    out, variables, events = tiered(src, hot_loop=100)
+    assert ("loop", 0) not in events
+    assert (out, variables) == compiled(src)
+
+
+
+def test_hot_inner_loop_is_compiled_once():
+    src = "10 FOR I = 1 TO 300\n20 FOR J = 1 TO 50\n30 LET S = S + J\n40 NEXT J\n50 NEXT I\n60 PRINT S\n"
+    out, variables, events = tiered(src)
+    assert [event for event in events if event[0] == "loop"] == [("loop", 0)]
+    assert (out, variables) == compiled(src)
+
+
+@pytest.mark.parametrize("inner", ["FOR J = I TO I + 3", "FOR J = I TO 2 * I STEP I / 4",
+                                   "FOR J = 2 * I TO I STEP -1"])
+def test_compiled_inner_loop_takes_each_runs_bounds(inner):
+    src = f"10 FOR I = 1 TO 40\n20 {inner}\n30 LET S = S + J\n40 NEXT J\n50 NEXT I\n60 PRINT S\n"
+    out, variables, events = tiered(src, hot_loop=5)
+    assert events[0] == ("loop", 0)
+    assert (out, variables) == compiled(src)
+
+
+def test_hot_loop_keeps_types_of_variables_it_does_not_set():
+    # A is a float: the inner loop cannot become a range() over ints.
+    src = ("10 LET A = 1.5\n20 FOR L = 1 TO 1500\n30 FOR I = A TO 3\n40 LET S = S + I\n"
+           "50 NEXT I\n60 NEXT L\n70 PRINT S\n")
+    out, variables, events = tiered(src)
+    assert ("loop", 1) in events
+    assert (out, variables) == compiled(src) == ("6000.0\n", {"A": 1.5, "L": 1500, "I": 2.5, "S": 6000.0})
+
+
+@pytest.mark.parametrize("hot_loop", [2, 3, 1000])
+def test_hot_float_step_loop_keeps_its_counter(hot_loop):
+    # Iteration 2 and 1000 start at 1.0 and 500.0, which must not turn into ints.
+    src = "10 FOR X = 0.5 TO 600 STEP 0.5\n20 IF X = 500 THEN PRINT X\n30 NEXT X\n40 PRINT X\n"
+    out, variables, events = tiered(src, hot_loop=hot_loop)
+    assert events[0] == ("loop", 0)
+    assert (out, variables) == compiled(src) == ("500.0\n600.0\n", {"X": 600.0})
+
+
+@pytest.mark.parametrize("level", [0, 1, 2])
+@pytest.mark.parametrize("backend", ["text", "ast"])
+def test_switch_with_gosub_stack(level, backend):
+    options = CompileOptions.for_level(level, backend=backend)
+    for hot_line in (1, 7, 50):
+        out, variables, events = tiered(SUB_LOOP, options=options, hot_line=hot_line)
+        assert [kind for kind, _ in events] == ["program"]
+        assert (out, nonzero(variables)) == compiled(SUB_LOOP)
+
+
+def test_cli_rejects_stats(tmp_path):
+    path = tmp_path / "prog.bas"
+    path.write_text(FOR_LOOP)
+    with pytest.raises(SystemExit):
+        main(["--engine", "tiered", "--stats", str(path)])